@@ -1,21 +1,19 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from uuid import UUID
-import asyncpg
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import Database, LazyConnection
 from app.core.security import decode_access_token
-from app.repositories.user_repository import UserRepository
+from app.services.user_cache import user_cache
 
 security = HTTPBearer()
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    conn: asyncpg.Connection = Depends(get_db)
+async def get_token_payload(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> dict:
-    """Get current authenticated user"""
-    token = credentials.credentials
-    payload = decode_access_token(token)
+    """Claims of the request's bearer token"""
+    payload = decode_access_token(credentials.credentials)
     
     if payload is None:
         raise HTTPException(
@@ -24,8 +22,17 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    return payload
+
+
+async def get_current_user(
+    request: Request,
+    payload: dict = Depends(get_token_payload)
+) -> dict:
+    """Get current authenticated user"""
     user_id = UUID(payload.get("sub"))
-    user = await UserRepository.get_by_id(conn, user_id)
+    # Served from the user cache; a miss takes a short read-pool checkout
+    user = await user_cache.get_user(user_id)
     
     if not user:
         raise HTTPException(
@@ -34,20 +41,43 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Read-your-writes: routes this request's reads and, once a write
+    # request has succeeded, the user's next ones (see note_successful_write)
+    request.state.user_id = user['id']
+    
     return user
 
 
+async def note_successful_write(request: Request, call_next):
+    """Middleware starting the user's read-your-writes window after a write request succeeded.
+
+    Runs after the endpoint returned, so its transactions have committed.
+    """
+    response = await call_next(request)
+    user_id = getattr(request.state, "user_id", None)
+    if user_id is not None and request.method not in ("GET", "HEAD") and response.status_code < 400:
+        Database.note_write(user_id)
+    return response
+
+
+async def get_user_read_db(current_user: dict = Depends(get_current_user)) -> LazyConnection:
+    """Lazy read-pool handle for the current user's own data, honouring read-your-writes"""
+    return LazyConnection("read", current_user['id'])
+
+
 def require_profile(
     profile_type: str
 ):
     """Create a dependency that requires a specific profile"""
     async def _require_profile(
         current_user: dict = Depends(get_current_user),
-        conn: asyncpg.Connection = Depends(get_db)
+        payload: dict = Depends(get_token_payload)
     ) -> dict:
         """Require user to have a specific profile"""
-        profiles = await UserRepository.get_user_profiles(conn, current_user['id'])
-        profile_types = [p['profile_type'] for p in profiles]
+        if settings.profile_claims_version and payload.get("pv") == settings.profile_claims_version:
+            profile_types = payload.get("profiles", [])
+        else:
+            profile_types = await user_cache.get_profile_types(current_user['id'])
         
         if profile_type not in profile_types:
             raise HTTPException(
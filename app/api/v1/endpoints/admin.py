@@ -1,16 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from typing import Optional,List
-import asyncpg
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db, LazyConnection
 from app.api.v1.dependencies import get_current_user, require_profile
-from app.services.admin_service import AdminService
+from app.api.v1.streaming import ndjson_response
+from app.services.admin_service import AdminService, reports_flight
 from app.schemas.admin import (
     BusCreateRequest, TripCreateRequest, HourlyBookingsResponse,BusResponse,
-    BusRevenueResponse, BusiestDriverResponse,BusDriversResponse,RouteCreate,RouteResponse
+    BusRevenueResponse, BusiestDriverResponse,BusDriversResponse,RouteCreate,RouteResponse,
+    FlashSaleRequest, FlashSaleResponse, FlashSaleStatusResponse, SearchCacheStatusResponse,
+    SlowQueryResponse
 )
 from app.models.bus import BusCreate
 from app.models.trip import TripCreate
 from app.repositories.route_repository import RouteRepository
+from app.core.slow_query_log import slow_query_log
+from app.services.flash_sale import flash_sales
+from app.services.route_search import route_search
+from app.services.search_cache import search_cache
+from uuid import UUID
 router = APIRouter()
 
 
@@ -18,7 +25,7 @@ router = APIRouter()
 async def create_bus(
     request: BusCreateRequest,
     current_user: dict = Depends(require_profile("operator")),
-    conn: asyncpg.Connection = Depends(get_db)
+    conn: LazyConnection = Depends(get_db)
 ):
     """Create a new bus (operator/admin only)"""
     try:
@@ -35,7 +42,7 @@ async def create_bus(
 async def create_trip(
     request: TripCreateRequest,
     current_user: dict = Depends(require_profile("operator")),
-    conn: asyncpg.Connection = Depends(get_db)
+    conn: LazyConnection = Depends(get_db)
 ):
     """Create a new trip (operator/admin only)"""
     try:
@@ -46,14 +53,56 @@ async def create_trip(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/trips/{trip_id}/flash-sale", response_model=FlashSaleResponse)
+async def set_flash_sale(
+    trip_id: UUID,
+    request: FlashSaleRequest,
+    current_user: dict = Depends(require_profile("operator")),
+    conn: LazyConnection = Depends(get_db)
+):
+    """Switch flash-sale mode of a trip (operator/admin only)"""
+    try:
+        result = await AdminService.set_flash_sale(conn, trip_id, request.enabled)
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/flash-sales", response_model=List[FlashSaleStatusResponse])
+async def get_flash_sales(
+    current_user: dict = Depends(require_profile("operator"))
+):
+    """Queue depth, wait time and rejections of this worker's flash-sale queues"""
+    return flash_sales.status()
+
+
+@router.get("/search-cache", response_model=SearchCacheStatusResponse)
+async def get_search_cache_status(
+    current_user: dict = Depends(require_profile("operator"))
+):
+    """Hit rate, staleness and memory of this worker's available-trip search cache"""
+    return search_cache.status()
+
+
+@router.get("/slow-queries", response_model=list[SlowQueryResponse])
+async def get_slow_queries(
+    current_user: dict = Depends(require_profile("operator"))
+):
+    """Slow queries this worker captured, newest first, with their plans"""
+    return slow_query_log.entries()
+
+
 @router.get("/reports/hourly-bookings", response_model=list[HourlyBookingsResponse])
 async def get_hourly_bookings(
-    current_user: dict = Depends(require_profile("operator")),
-    conn: asyncpg.Connection = Depends(get_db)
+    current_user: dict = Depends(require_profile("operator"))
 ):
     """Get successful bookings per hour"""
     try:
-        result = await AdminService.get_hourly_bookings(conn)
+        result = await reports_flight.do_with_connection(
+            ("hourly_bookings",), AdminService.get_hourly_bookings, pool="reporting"
+        )
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -63,12 +112,15 @@ async def get_hourly_bookings(
 async def get_bus_revenue(
     month: Optional[int] = Query(None, ge=1, le=12),
     year: Optional[int] = Query(None, ge=2020),
-    current_user: dict = Depends(require_profile("operator")),
-    conn: asyncpg.Connection = Depends(get_db)
+    current_user: dict = Depends(require_profile("operator"))
 ):
     """Get reservations and revenue per bus per month"""
     try:
-        result = await AdminService.get_bus_revenue(conn, month, year)
+        result = await reports_flight.do_with_connection(
+            ("bus_revenue", month, year),
+            lambda conn: AdminService.get_bus_revenue(conn, month, year),
+            pool="reporting"
+        )
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -76,24 +128,26 @@ async def get_bus_revenue(
 
 @router.get("/reports/busiest-driver", response_model=BusiestDriverResponse)
 async def get_busiest_driver(
-    current_user: dict = Depends(require_profile("operator")),
-    conn: asyncpg.Connection = Depends(get_db)
+    current_user: dict = Depends(require_profile("operator"))
 ):
     """Get driver with most trips"""
     try:
-        result = await AdminService.get_busiest_driver(conn)
+        result = await reports_flight.do_with_connection(
+            ("busiest_driver",), AdminService.get_busiest_driver, pool="reporting"
+        )
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/reports/bus-drivers", response_model=List[BusDriversResponse])
 async def get_bus_drivers(
-    current_user: dict = Depends(require_profile("operator")),
-    conn: asyncpg.Connection = Depends(get_db)
+    current_user: dict = Depends(require_profile("operator"))
 ):
     """Get driver with most trips"""
     try:
-        result = await AdminService.get_bus_drivers(conn)
+        result = await reports_flight.do_with_connection(
+            ("bus_drivers",), AdminService.get_bus_drivers, pool="reporting"
+        )
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -109,11 +163,12 @@ async def get_bus_drivers(
 )
 async def create_route(
     route_data: RouteCreate,
-    conn: asyncpg.Connection = Depends(get_db),
+    conn: LazyConnection = Depends(get_db),
     current_user: dict = Depends(require_profile("operator")),  # بعداً اضافه کن
 ):
     try:
         route = await RouteRepository.create(conn, route_data)
+        route_search.add_route(route)
         return route
     except Exception as e:
         raise HTTPException(
@@ -127,7 +182,7 @@ async def create_route(
     summary="لیست همه مسیرها"
 )
 async def get_all_routes(
-    conn: asyncpg.Connection = Depends(get_db),
+    conn: LazyConnection = Depends(get_read_db),
     current_user: dict = Depends(require_profile("operator")),
 ):
     routes = await RouteRepository.get_all(conn)
@@ -140,7 +195,7 @@ async def get_all_routes(
             summary="لیست همه اتوبوس ها")
 async def get_bus_drivers(
     current_user: dict = Depends(require_profile("operator")),
-    conn: asyncpg.Connection = Depends(get_db)
+    conn: LazyConnection = Depends(get_read_db)
 ):
     """Get driver with most trips"""
     try:
@@ -148,4 +203,11 @@ async def get_bus_drivers(
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    
\ No newline at end of file
+
+
+@router.get("/get-all-bus/stream", summary="لیست همه اتوبوس ها (NDJSON)")
+async def stream_buses(
+    current_user: dict = Depends(require_profile("operator"))
+):
+    """Stream all buses as NDJSON"""
+    return ndjson_response(AdminService.stream_buses)
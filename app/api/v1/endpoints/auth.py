@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-import asyncpg
-from app.core.database import get_db
+from app.core.database import get_db, LazyConnection
+from app.core.security import PasswordHashingBusy
 from app.services.auth_service import AuthService
 from app.schemas.auth import SendVerificationRequest, VerifyCodeRequest, LoginRequest, TokenResponse
 
@@ -10,7 +10,7 @@ router = APIRouter()
 @router.post("/send-verification", response_model=dict)
 async def send_verification(
     request: SendVerificationRequest,
-    conn: asyncpg.Connection = Depends(get_db)
+    conn: LazyConnection = Depends(get_db)
 ):
     """Send SMS verification code"""
     try:
@@ -23,12 +23,14 @@ async def send_verification(
 @router.post("/verify-code", response_model=TokenResponse)
 async def verify_code(
     request: VerifyCodeRequest,
-    conn: asyncpg.Connection = Depends(get_db)
+    conn: LazyConnection = Depends(get_db)
 ):
     """Verify SMS code and register/login"""
     try:
         result = await AuthService.verify_code(conn, request)
         return result
+    except PasswordHashingBusy as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -38,12 +40,14 @@ async def verify_code(
 @router.post("/login", response_model=TokenResponse)
 async def login(
     request: LoginRequest,
-    conn: asyncpg.Connection = Depends(get_db)
+    conn: LazyConnection = Depends(get_db)
 ):
     """Login with mobile and password"""
     try:
         result = await AuthService.login(conn, request.mobile, request.password)
         return result
+    except PasswordHashingBusy as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=401, detail=str(e))
     except Exception as e:
@@ -1,13 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import Optional
-import asyncpg
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from datetime import date
+from typing import List, Optional, Union
+import asyncio
+import json
 from uuid import UUID
-from app.core.database import get_db
-from app.api.v1.dependencies import get_current_user
-from app.services.booking_service import BookingService
+from app.core.config import settings
+from app.core.database import get_db, LazyConnection
+from app.api.v1.dependencies import get_current_user, get_user_read_db
+from app.api.v1.streaming import ndjson_response
+from app.services.booking_service import BookingService, available_trips_flight
+from app.services.reservation_batcher import reservation_batcher
+from app.services.flash_sale import flash_sales, FlashSaleQueueFull
+from app.services.seat_events import seat_events
 from app.schemas.booking import (
     ReserveSeatRequest, ReserveSeatResponse, PayBookingRequest,
-    BookingResponse, ReservationResponse, AvailableTripResponse, AvailableTripsQuery
+    BookingResponse, ReservationResponse, AvailableTripResponse, AvailableTripsQuery,
+    GroupReserveRequest, GroupReserveResponse, AvailableTripSummaryResponse
 )
 
 router = APIRouter()
@@ -17,11 +27,52 @@ router = APIRouter()
 async def reserve_seat(
     request: ReserveSeatRequest,
     current_user: dict = Depends(get_current_user),
-    conn: asyncpg.Connection = Depends(get_db)
+    conn: LazyConnection = Depends(get_db)
 ):
     """Reserve a seat for 10 minutes"""
     try:
-        result = await BookingService.reserve_seat(conn, current_user['id'], request)
+        flash_sale = flash_sales.queue_for(request.trip_id)
+        if flash_sale is not None:
+            result = await flash_sale.reserve_seat(current_user['id'], request)
+        elif settings.reservation_batching_enabled:
+            result = await reservation_batcher.reserve_seat(current_user['id'], request)
+        else:
+            result = await BookingService.reserve_seat(conn, current_user['id'], request)
+        return result
+    except FlashSaleQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/reserve-group", response_model=GroupReserveResponse)
+async def reserve_group(
+    request: GroupReserveRequest,
+    current_user: dict = Depends(get_current_user),
+    conn: LazyConnection = Depends(get_db)
+):
+    """Reserve several seats of one trip for 10 minutes (all or nothing)"""
+    try:
+        result = await BookingService.reserve_group(conn, current_user['id'], request)
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/groups/{group_id}/pay", response_model=list[BookingResponse])
+async def pay_group(
+    group_id: str,
+    current_user: dict = Depends(get_current_user),
+    conn: LazyConnection = Depends(get_db)
+):
+    """Pay for all held reservations of a group"""
+    try:
+        group_uuid = UUID(group_id)
+        result = await BookingService.pay_group(conn, current_user['id'], group_uuid)
         return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -33,7 +84,7 @@ async def reserve_seat(
 async def pay_booking(
     reservation_id: str,
     current_user: dict = Depends(get_current_user),
-    conn: asyncpg.Connection = Depends(get_db)
+    conn: LazyConnection = Depends(get_db)
 ):
     """Pay for reserved booking"""
 
@@ -51,7 +102,7 @@ async def pay_booking(
 async def cancel_reservation(
     reservation_id: str,
     current_user: dict = Depends(get_current_user),
-    conn: asyncpg.Connection = Depends(get_db)
+    conn: LazyConnection = Depends(get_db)
 ):
     """Cancel a reservation"""
     from uuid import UUID
@@ -69,7 +120,7 @@ async def cancel_reservation(
 async def cancel_booking(
     booking_id: str,
     current_user: dict = Depends(get_current_user),
-    conn: asyncpg.Connection = Depends(get_db)
+    conn: LazyConnection = Depends(get_db)
 ):
     """Cancel a confirmed booking"""
     from uuid import UUID
@@ -83,25 +134,133 @@ async def cancel_booking(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/available", response_model=list[AvailableTripResponse])
+@router.get(
+    "/available",
+    response_model=Union[List[AvailableTripSummaryResponse], List[AvailableTripResponse]]
+)
 async def get_available_trips(
+    response: Response,
+    departure_from: date = Query(...),
+    departure_to: date = Query(...),
     origin: Optional[str] = Query(None),
     destination: Optional[str] = Query(None),
     sort_by: Optional[str] = Query(None, pattern="^(price_asc|price_desc)$"),
-    conn: asyncpg.Connection = Depends(get_db)
+    summary: bool = Query(False),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None)
 ):
-    """Get available trips with seats"""
+    """Get a page of available trips; the next page's cursor is in the X-Next-Cursor header"""
     try:
-        result = await BookingService.get_available_trips(conn, origin, destination, sort_by)
+        # Identical concurrent searches share one query; cache and index hits check out no connection
+        result, next_cursor = await available_trips_flight.do_with_connection(
+            (departure_from, departure_to, origin, destination, sort_by, summary, limit, cursor),
+            lambda conn: BookingService.get_available_trips(
+                conn, departure_from, departure_to, origin, destination, sort_by, summary, limit, cursor
+            ),
+            pool="read"
+        )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/available/stream")
+async def stream_available_trips(
+    departure_from: date = Query(...),
+    departure_to: date = Query(...),
+    origin: Optional[str] = Query(None),
+    destination: Optional[str] = Query(None)
+):
+    """Stream all available trips of a departure window as NDJSON, by departure time"""
+    try:
+        window_start, window_end = BookingService.departure_window(departure_from, departure_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return ndjson_response(
+        lambda conn: BookingService.stream_available_trips(conn, window_start, window_end, origin, destination)
+    )
+
+
+@router.get("/trips/{trip_id}/seats/events")
+async def stream_seat_map(trip_id: UUID):
+    """Seat map of a trip followed by seat updates, as server-sent events"""
+    if not seat_events.listening:
+        raise HTTPException(status_code=503, detail="Seat updates are unavailable, try again later")
+    queue = seat_events.subscribe(trip_id)
+    if queue is None:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    
+    async def events():
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), settings.seat_events_keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {message['type']}\ndata: {json.dumps(message, default=str)}\n\n"
+        finally:
+            seat_events.unsubscribe(trip_id, queue)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also unsubscribes when the client leaves before the stream starts
+        background=BackgroundTask(seat_events.unsubscribe, trip_id, queue)
+    )
+
+
+@router.websocket("/trips/{trip_id}/seats/ws")
+async def watch_seat_map(websocket: WebSocket, trip_id: UUID):
+    """Seat map of a trip followed by seat updates, over a WebSocket"""
+    if not seat_events.listening:
+        await websocket.close(code=1013, reason="Seat updates are unavailable, try again later")
+        return
+    queue = seat_events.subscribe(trip_id)
+    if queue is None:
+        await websocket.close(code=4404, reason="Trip not found")
+        return
+    
+    async def send_updates():
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), settings.seat_events_keepalive_seconds)
+            except asyncio.TimeoutError:
+                message = {"type": "ping"}
+            await websocket.send_text(json.dumps(message, default=str))
+    
+    async def wait_for_close():
+        while (await websocket.receive())['type'] != "websocket.disconnect":
+            pass
+    
+    try:
+        await websocket.accept()
+        # Stop as soon as either side is done instead of on the next send
+        tasks = {asyncio.create_task(send_updates()), asyncio.create_task(wait_for_close())}
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+        for task in done:
+            if task.exception() and not isinstance(task.exception(), WebSocketDisconnect):
+                raise task.exception()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        seat_events.unsubscribe(trip_id, queue)
+
+
 @router.get("/my-bookings", response_model=list[BookingResponse])
 async def get_my_bookings(
     current_user: dict = Depends(get_current_user),
-    conn: asyncpg.Connection = Depends(get_db)
+    conn: LazyConnection = Depends(get_user_read_db)
 ):
     """Get user's bookings"""
     try:
@@ -111,10 +270,21 @@ async def get_my_bookings(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/my-bookings/stream")
+async def stream_my_bookings(
+    current_user: dict = Depends(get_current_user)
+):
+    """Stream all of the user's bookings as NDJSON, newest first"""
+    return ndjson_response(
+        lambda conn: BookingService.stream_user_bookings(conn, current_user['id']),
+        user_id=current_user['id']
+    )
+
+
 @router.get("/my-reservations", response_model=list[ReservationResponse])
 async def get_my_reservations(
     current_user: dict = Depends(get_current_user),
-    conn: asyncpg.Connection = Depends(get_db)
+    conn: LazyConnection = Depends(get_user_read_db)
 ):
     """Get user's active reservations"""
     try:
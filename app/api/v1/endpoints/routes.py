@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List
+from app.core.database import get_read_db, LazyConnection
+from app.services.route_search import route_search
+from app.schemas.route import CitySuggestionResponse
+
+router = APIRouter()
+
+
+@router.get("/search", response_model=List[CitySuggestionResponse])
+async def search_cities(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    conn: LazyConnection = Depends(get_read_db)
+):
+    """Autocomplete route cities; spelling variants and small typos still match"""
+    try:
+        await route_search.ensure_loaded(conn)
+        return route_search.search(q, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, HTTPException
+from uuid import UUID
+from app.core.database import get_read_db, LazyConnection
+from app.services.booking_service import BookingService
+from app.schemas.booking import TripSeatMapResponse
+
+router = APIRouter()
+
+
+@router.get("/{trip_id}/seats", response_model=TripSeatMapResponse)
+async def get_trip_seat_map(
+    trip_id: UUID,
+    conn: LazyConnection = Depends(get_read_db)
+):
+    """Get the full seat map of one trip"""
+    try:
+        result = await BookingService.get_trip_seat_map(conn, trip_id)
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
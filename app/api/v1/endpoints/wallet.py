@@ -1,7 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-import asyncpg
-from app.core.database import get_db
-from app.api.v1.dependencies import get_current_user
+from app.core.database import get_db, LazyConnection
+from app.api.v1.dependencies import get_current_user, get_user_read_db
 from app.services.wallet_service import WalletService
 from app.schemas.wallet import WalletBalanceResponse, DepositRequest, TransactionResponse
 
@@ -11,9 +10,9 @@ router = APIRouter()
 @router.get("/balance", response_model=WalletBalanceResponse)
 async def get_balance(
     current_user: dict = Depends(get_current_user),
-    conn: asyncpg.Connection = Depends(get_db)
+    conn: LazyConnection = Depends(get_db)
 ):
-    """Get wallet balance"""
+    """Get wallet balance (creates the wallet on first use, so it runs on the primary)"""
     try:
         result = await WalletService.get_balance(conn, current_user['id'])
         return result
@@ -25,7 +24,7 @@ async def get_balance(
 async def deposit(
     request: DepositRequest,
     current_user: dict = Depends(get_current_user),
-    conn: asyncpg.Connection = Depends(get_db)
+    conn: LazyConnection = Depends(get_db)
 ):
     """Deposit money to wallet"""
     try:
@@ -38,7 +37,7 @@ async def deposit(
 @router.get("/transactions", response_model=list[TransactionResponse])
 async def get_transactions(
     current_user: dict = Depends(get_current_user),
-    conn: asyncpg.Connection = Depends(get_db)
+    conn: LazyConnection = Depends(get_user_read_db)
 ):
     """Get transaction history"""
     try:
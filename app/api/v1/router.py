@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, bookings, wallet, admin
+from app.api.v1.endpoints import auth, bookings, wallet, admin, routes, trips
 
 api_router = APIRouter()
 
@@ -7,4 +7,6 @@ api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(bookings.router, prefix="/bookings", tags=["bookings"])
 api_router.include_router(wallet.router, prefix="/wallet", tags=["wallet"])
 api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
+api_router.include_router(routes.router, prefix="/routes", tags=["routes"])
+api_router.include_router(trips.router, prefix="/trips", tags=["trips"])
 
@@ -0,0 +1,43 @@
+import json
+import asyncpg
+from datetime import date, datetime
+from typing import AsyncIterator, Callable, Optional
+from uuid import UUID
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.core.database import Database
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def ndjson_response(
+    source: Callable[[asyncpg.Connection], AsyncIterator[dict]],
+    pool: str = "read",
+    user_id: Optional[UUID] = None
+) -> StreamingResponse:
+    """Stream the items `source(conn)` yields as newline-delimited JSON.
+
+    The body runs on its own connection of the named pool (request
+    dependencies have released theirs before a streaming body is sent) inside a read-only
+    transaction, which server-side cursors need. Items are written in chunks
+    of STREAM_CHUNK_ROWS lines, so memory stays flat whatever the result size.
+    """
+    async def body():
+        async with Database.acquire(pool, user_id) as conn:
+            async with conn.transaction(readonly=True):
+                lines = []
+                async for item in source(conn):
+                    lines.append(json.dumps(item, ensure_ascii=False, default=_json_default))
+                    if len(lines) >= settings.stream_chunk_rows:
+                        yield "\n".join(lines) + "\n"
+                        lines = []
+                if lines:
+                    yield "\n".join(lines) + "\n"
+    
+    return StreamingResponse(body(), media_type="application/x-ndjson")
@@ -6,10 +6,57 @@ class Settings(BaseSettings):
     # Database
     database_url: str = os.getenv("DATABASE_URL")
     
+    # Connection pools per workload: booking (reservations, payments and other
+    # writes), read (searches and listings) and reporting (admin reports);
+    # statement timeouts are in seconds
+    db_booking_pool_min_size: int = 5
+    db_booking_pool_max_size: int = 20
+    db_booking_statement_timeout: float = 60
+    db_read_pool_min_size: int = 2
+    db_read_pool_max_size: int = 10
+    db_read_statement_timeout: float = 30
+    db_reporting_pool_min_size: int = 0
+    db_reporting_pool_max_size: int = 3
+    db_reporting_statement_timeout: float = 300
+    # Prepared statements kept per connection; room for every registered statement
+    db_statement_cache_size: int = 250
+    
+    # Read replicas (comma-separated DSNs) serving the read and reporting pools.
+    # A replica lagging more than replica_max_lag_seconds is skipped, and a
+    # user's reads go to the primary for read_your_writes_seconds after a write
+    database_replica_urls: str = ""
+    replica_max_lag_seconds: float = 5
+    replica_lag_check_seconds: float = 2
+    read_your_writes_seconds: float = 5
+    
+    # Slow-query log: statements of the listed repositories (statement name
+    # prefixes) taking at least slow_query_ms get their plan captured in the
+    # background, sampled and rate-limited
+    slow_query_ms: float = 500
+    slow_query_repositories: str = "trip,admin"
+    slow_query_sample_rate: float = 1.0
+    slow_query_max_per_minute: int = 10
+    slow_query_log_size: int = 100
+    slow_query_explain_timeout_seconds: float = 5
+    
+    # bcrypt runs on password_hash_workers threads (0: one per core); calls
+    # beyond password_hash_max_pending running or queued are turned away
+    password_hash_workers: int = 0
+    password_hash_max_pending: int = 64
+
     # JWT
     jwt_secret_key: str = os.getenv("JWT_SECRET_KEY")
     jwt_algorithm: str = "HS256"
     jwt_expiration_hours: int = 24
+    # Tokens carry the user's profile types under this version when it is set
+    # (0 disables); role checks trust claims of the current version without a
+    # lookup, so bump it to retire the claims of tokens already issued
+    profile_claims_version: int = 0
+
+    # Authenticated users and their profiles, dropped when this worker changes
+    # them; the TTL bounds staleness from changes made elsewhere (0 disables)
+    user_cache_seconds: float = 60
+    user_cache_size: int = 10000
     
     # ippanel SMS
     ippanel_api_key: str = os.getenv("IPPANEL_API_KEY")
@@ -19,6 +66,60 @@ class Settings(BaseSettings):
     debug: bool = os.getenv("DEBUG")
     app_name: str = os.getenv("APP_NAME")
     
+    # Reservations: "locking" (SELECT ... FOR UPDATE) or "constraint"
+    # (single-statement claim arbitrated by the held-seat unique index)
+    reservation_claim_mode: str = "locking"
+    
+    # Opt-in micro-batching of concurrent reserve-seat requests
+    reservation_batching_enabled: bool = False
+    reservation_batch_max_size: int = 50
+    reservation_batch_linger_ms: float = 5
+    # A batch that deadlocks or fails serialization is rerun this many times
+    reservation_batch_retries: int = 2
+    
+    # Payments: "single_statement" (one data-modifying CTE) or
+    # "multi_statement" (one round trip per step)
+    checkout_mode: str = "single_statement"
+    
+    # Reservation expiry worker; one worker at a time leads it via an advisory lock
+    reservation_expiry_batch_size: int = 500
+    reservation_expiry_max_sleep_seconds: float = 60
+    reservation_expiry_leader_retry_seconds: float = 30
+    
+    # Expired reservations are purged in batches once older than the retention
+    reservation_retention_minutes: int = 60
+    reservation_purge_batch_size: int = 1000
+    
+    # trip_inventory catches up with queued seat changes this often, in
+    # batches of changes
+    trip_inventory_refresh_seconds: float = 1
+    trip_inventory_refresh_batch_size: int = 1000
+
+    # Seat availability index
+    seat_index_refresh_seconds: int = 30
+    
+    # Longest departure window /bookings/available accepts
+    available_trips_max_window_days: int = 31
+    
+    # NDJSON streaming endpoints: lines per written chunk
+    stream_chunk_rows: int = 200
+    
+    # Seat-map subscriptions (WebSocket/SSE)
+    seat_events_subscriber_buffer: int = 256
+    seat_events_keepalive_seconds: float = 15
+    
+    # Flash-sale trips: reservation attempts waiting per trip before new ones are turned away
+    flash_sale_queue_max_depth: int = 1000
+    
+    # Daily booking limit counters; a cache TTL of 0 reads the counter on every check
+    daily_booking_count_cache_seconds: float = 0
+    daily_booking_count_cache_size: int = 10000
+    
+    # Available-trip search results, dropped as soon as a seat on one of their
+    # routes changes; the TTL bounds staleness from new trips and routes (0 disables)
+    search_cache_seconds: float = 30
+    search_cache_size: int = 1000
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -1,36 +1,255 @@
+import asyncio
 import asyncpg
-from typing import Optional
+import functools
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from starlette.requests import Request
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Histogram
+from app.core.statements import statements
+
+
+POOLS = ("booking", "read", "reporting")
+# Pools whose reads may be served by a replica
+REPLICA_POOLS = ("read", "reporting")
+# Replica lag query; a replica that has replayed all it received is not behind
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+pool_connections = Gauge(
+    "db_pool_connections",
+    "Open connections of a pool, idle or in use",
+    ["pool", "state"]
+)
+pool_max_connections = Gauge(
+    "db_pool_max_connections",
+    "Maximum connections of a pool",
+    ["pool"]
+)
+pool_saturation = Gauge(
+    "db_pool_saturation",
+    "Connections of a pool in use, as a share of its maximum",
+    ["pool"]
+)
+pool_waiting = Gauge(
+    "db_pool_waiting",
+    "Requests waiting for a connection of a pool",
+    ["pool"]
+)
+pool_acquire_wait = Histogram(
+    "db_pool_acquire_wait_seconds",
+    "Time spent waiting for a connection of a pool",
+    ["pool"]
+)
+replica_lag = Gauge(
+    "db_replica_lag_seconds",
+    "Replication lag of a read replica (+Inf when it cannot be reached)",
+    ["replica"]
+)
+read_routing = Counter(
+    "db_read_routing_total",
+    "Connections checked out of replica-capable pools, by where they went and why",
+    ["pool", "target", "reason"]
+)
+
+# user_id -> True while the user's reads stay on the primary after a write
+_recent_writers = TTLCache(100_000, settings.read_your_writes_seconds)
+
+
+def replica_urls() -> List[str]:
+    return [url.strip() for url in settings.database_replica_urls.split(",") if url.strip()]
 
 
 class Database:
-    _pool: Optional[asyncpg.Pool] = None
+    _pools: Dict[str, asyncpg.Pool] = {}
+    # pool name -> one pool per replica, in replica_urls() order
+    _replica_pools: Dict[str, List[asyncpg.Pool]] = {}
+    # Last measured lag per replica; unknown until the first check
+    _replica_lag: List[float] = []
+    _next_replica = 0
+    
+    @staticmethod
+    async def _create(name: str, dsn: str, replica: bool) -> asyncpg.Pool:
+        timeout = getattr(settings, f"db_{name}_statement_timeout")
+        server_settings = {"statement_timeout": str(int(timeout * 1000))}
+        if replica:
+            # A write sent to a replica by mistake fails instead of diverging
+            server_settings["default_transaction_read_only"] = "on"
+        return await asyncpg.create_pool(
+            dsn,
+            min_size=getattr(settings, f"db_{name}_pool_min_size"),
+            max_size=getattr(settings, f"db_{name}_pool_max_size"),
+            server_settings=server_settings,
+            # Client-side backstop for when the server does not answer
+            command_timeout=timeout + 5,
+            statement_cache_size=settings.db_statement_cache_size,
+            # Every new connection prepares the pool's hot statements before it is handed out
+            init=functools.partial(statements.prepare_warm, name)
+        )
+    
+    @classmethod
+    async def create_pool(cls, name: str = "booking"):
+        """Create a named database connection pool (and its replica pools)"""
+        if name not in POOLS:
+            raise ValueError(f"Unknown connection pool: {name}")
+        if name not in cls._pools:
+            pool = await cls._create(name, settings.database_url, replica=False)
+            replicas = []
+            if name in REPLICA_POOLS:
+                for url in replica_urls():
+                    replicas.append(await cls._create(name, url, replica=True))
+            if name in cls._pools:
+                # Created concurrently by another caller
+                for created in [pool, *replicas]:
+                    await created.close()
+            else:
+                cls._pools[name] = pool
+                if replicas:
+                    cls._replica_pools[name] = replicas
+                    if not cls._replica_lag:
+                        cls._replica_lag = [float("inf")] * len(replicas)
+        return cls._pools[name]
+    
+    @classmethod
+    async def create_pools(cls):
+        """Create every connection pool"""
+        for name in POOLS:
+            await cls.create_pool(name)
     
     @classmethod
-    async def create_pool(cls):
-        """Create database connection pool"""
-        if cls._pool is None:
-            cls._pool = await asyncpg.create_pool(
-                settings.database_url,
-                min_size=5,
-                max_size=20,
-                command_timeout=60
+    async def warm_up(cls):
+        """Check out min_size connections of every pool at once, so they are all open and initialized"""
+        pools = [*cls._pools.values(), *(p for group in cls._replica_pools.values() for p in group)]
+        
+        async def fill(pool: asyncpg.Pool):
+            results = await asyncio.gather(
+                *(pool.acquire() for _ in range(pool.get_min_size())),
+                return_exceptions=True
             )
-        return cls._pool
+            for result in results:
+                if not isinstance(result, BaseException):
+                    await pool.release(result)
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+        
+        await asyncio.gather(*(fill(pool) for pool in pools))
     
     @classmethod
-    async def get_pool(cls) -> asyncpg.Pool:
-        """Get database connection pool"""
-        if cls._pool is None:
-            await cls.create_pool()
-        return cls._pool
+    async def get_pool(cls, name: str = "booking") -> asyncpg.Pool:
+        """Get a named database connection pool (on the primary)"""
+        pool = cls._pools.get(name)
+        if pool is None:
+            pool = await cls.create_pool(name)
+        return pool
     
     @classmethod
     async def close_pool(cls):
-        """Close database connection pool"""
-        if cls._pool:
-            await cls._pool.close()
-            cls._pool = None
+        """Close all database connection pools"""
+        pools, cls._pools = cls._pools, {}
+        replica_pools, cls._replica_pools = cls._replica_pools, {}
+        cls._replica_lag = []
+        for pool in [*pools.values(), *(p for group in replica_pools.values() for p in group)]:
+            await pool.close()
+    
+    @staticmethod
+    def note_write(user_id):
+        """Keep the user's reads on the primary for the read-your-writes window.
+
+        Call it once the write has committed, so the window covers reads
+        that may still miss it on a replica.
+        """
+        if settings.read_your_writes_seconds > 0:
+            _recent_writers.set(user_id, True)
+    
+    @classmethod
+    def _pick_replica(cls) -> Optional[int]:
+        """Next replica (round robin) within the lag limit, None if there is none"""
+        count = len(cls._replica_lag)
+        for offset in range(count):
+            index = (cls._next_replica + offset) % count
+            if cls._replica_lag[index] <= settings.replica_max_lag_seconds:
+                cls._next_replica = index + 1
+                return index
+        return None
+    
+    @classmethod
+    async def _route(cls, name: str, user_id, primary: bool) -> Tuple[asyncpg.Pool, str]:
+        """Pool to serve a checkout from and its metrics label"""
+        pool = await cls.get_pool(name)
+        replicas = cls._replica_pools.get(name)
+        if not replicas:
+            return pool, name
+        if primary:
+            reason = "pinned"
+        elif user_id is not None and _recent_writers.get(user_id):
+            reason = "recent_write"
+        else:
+            index = cls._pick_replica()
+            if index is not None:
+                read_routing.inc(pool=name, target="replica", reason="replica")
+                return replicas[index], f"{name}:replica{index + 1}"
+            reason = "lagging"
+        read_routing.inc(pool=name, target="primary", reason=reason)
+        return pool, name
+    
+    @classmethod
+    @asynccontextmanager
+    async def acquire(
+        cls,
+        name: str = "booking",
+        user_id=None,
+        primary: bool = False
+    ) -> AsyncIterator[asyncpg.Connection]:
+        """Check out a connection of a named pool, recording the wait.
+
+        Read and reporting checkouts go to a replica when one is configured
+        and caught up, unless `primary` is set or `user_id` wrote recently.
+        """
+        pool, label = await cls._route(name, user_id, primary)
+        started = time.monotonic()
+        pool_waiting.inc(pool=label)
+        try:
+            conn = await pool.acquire()
+        finally:
+            pool_waiting.dec(pool=label)
+        pool_acquire_wait.observe(time.monotonic() - started, pool=label)
+        try:
+            yield conn
+        finally:
+            await pool.release(conn)
+    
+    @classmethod
+    async def check_replica_lag(cls):
+        """Measure every replica's lag; unreachable replicas count as infinitely behind"""
+        pools = cls._replica_pools.get("read") or cls._replica_pools.get("reporting") or []
+        for index, pool in enumerate(pools):
+            try:
+                async with pool.acquire(timeout=settings.replica_lag_check_seconds) as conn:
+                    lag = float(await conn.fetchval(REPLICA_LAG_QUERY) or 0)
+            except Exception as e:
+                print(f"Error checking replica {index + 1} lag: {e}")
+                lag = float("inf")
+            cls._replica_lag[index] = lag
+            replica_lag.set(lag, replica=f"replica{index + 1}")
+    
+    @classmethod
+    def _pool_stats(cls) -> Dict[str, Tuple[int, int, int]]:
+        """pool label -> (idle, in use, max) connections"""
+        labelled = list(cls._pools.items())
+        for name, replicas in cls._replica_pools.items():
+            labelled += [(f"{name}:replica{i + 1}", pool) for i, pool in enumerate(replicas)]
+        stats = {}
+        for label, pool in labelled:
+            idle = pool.get_idle_size()
+            stats[label] = (idle, pool.get_size() - idle, pool.get_max_size())
+        return stats
     
     @classmethod
     async def execute(cls, query: str, *args):
@@ -61,10 +280,117 @@ class Database:
             return await conn.fetchval(query, *args)
 
 
-# Dependency for FastAPI
-async def get_db():
-    """Database dependency for FastAPI"""
-    pool = await Database.get_pool()
-    async with pool.acquire() as conn:
-        yield conn
+pool_connections.set_function(lambda: {
+    key: value
+    for name, (idle, in_use, _) in Database._pool_stats().items()
+    for key, value in (((name, "idle"), idle), ((name, "in_use"), in_use))
+})
+pool_max_connections.set_function(lambda: {
+    (name,): max_size for name, (_, _, max_size) in Database._pool_stats().items()
+})
+pool_saturation.set_function(lambda: {
+    (name,): in_use / max_size for name, (_, in_use, max_size) in Database._pool_stats().items()
+})
+
+
+class LazyConnection:
+    """Connection handle that only holds a pool connection while it is used.
+
+    A query outside a transaction checks out a connection for just that
+    query; `transaction()` pins one connection until the outermost
+    transaction ends. Transactions always run on the primary, even on a
+    read or reporting handle. A request that fails before its first query
+    never touches the pool, and none is held while the response is serialized.
+    """
+
+    def __init__(self, pool: str = "booking", user_id=None, request: Optional[Request] = None):
+        self._pool = pool
+        self._user_id = user_id
+        self._request = request
+        self._pinned: Optional[asyncpg.Connection] = None
+        self._checkout = None
+        self._depth = 0
+
+    @property
+    def user_id(self):
+        """User whose recent writes keep the handle's reads on the primary"""
+        if self._user_id is None and self._request is not None:
+            # Set by get_current_user, which may be resolved after this handle
+            return getattr(self._request.state, "user_id", None)
+        return self._user_id
+
+    @asynccontextmanager
+    async def checkout(self) -> AsyncIterator[asyncpg.Connection]:
+        """The pinned connection, or one checked out for the block"""
+        if self._pinned is not None:
+            yield self._pinned
+        else:
+            async with Database.acquire(self._pool, self.user_id) as conn:
+                yield conn
+
+    async def _pin(self):
+        if self._depth == 0:
+            checkout = Database.acquire(self._pool, self.user_id, primary=True)
+            self._pinned = await checkout.__aenter__()
+            self._checkout = checkout
+        self._depth += 1
+
+    async def _unpin(self):
+        self._depth -= 1
+        if self._depth == 0:
+            checkout, self._checkout, self._pinned = self._checkout, None, None
+            await checkout.__aexit__(None, None, None)
+
+    @asynccontextmanager
+    async def transaction(self, **kwargs):
+        """A transaction (a savepoint when nested) on the pinned connection"""
+        await self._pin()
+        try:
+            transaction = self._pinned.transaction(**kwargs)
+            async with transaction:
+                yield transaction
+        finally:
+            await self._unpin()
+
+    def is_in_transaction(self) -> bool:
+        return self._pinned is not None and self._pinned.is_in_transaction()
+
+    async def execute(self, query: str, *args, timeout: Optional[float] = None) -> str:
+        async with self.checkout() as conn:
+            return await conn.execute(query, *args, timeout=timeout)
+
+    async def executemany(self, command: str, args, *, timeout: Optional[float] = None):
+        async with self.checkout() as conn:
+            return await conn.executemany(command, args, timeout=timeout)
+
+    async def fetch(self, query: str, *args, timeout: Optional[float] = None) -> list:
+        async with self.checkout() as conn:
+            return await conn.fetch(query, *args, timeout=timeout)
+
+    async def fetchrow(self, query: str, *args, timeout: Optional[float] = None):
+        async with self.checkout() as conn:
+            return await conn.fetchrow(query, *args, timeout=timeout)
+
+    async def fetchval(self, query: str, *args, column: int = 0, timeout: Optional[float] = None):
+        async with self.checkout() as conn:
+            return await conn.fetchval(query, *args, column=column, timeout=timeout)
+
+    def cursor(self, query: str, *args, prefetch: Optional[int] = None, timeout: Optional[float] = None):
+        """Server-side cursor; only inside transaction(), like on a plain connection"""
+        if self._pinned is None:
+            raise asyncpg.InterfaceError("cursor cannot be created outside of a transaction")
+        return self._pinned.cursor(query, *args, prefetch=prefetch, timeout=timeout)
+
+
+def get_db_for(pool: str):
+    """Database dependency for FastAPI: a lazy handle on the named connection pool"""
+    async def _get_db(request: Request) -> LazyConnection:
+        return LazyConnection(pool, request=request)
+    return _get_db
+
+
+# Dependencies for FastAPI; get_db serves the booking-critical paths
+get_db = get_db_for("booking")
+get_read_db = get_db_for("read")
+get_reporting_db = get_db_for("reporting")
 
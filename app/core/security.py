@@ -1,8 +1,35 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Callable, Optional, TypeVar
 from jose import JWTError, jwt
 import bcrypt
 from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Histogram
+
+T = TypeVar("T")
+
+hash_queue_wait = Histogram(
+    "password_hash_queue_wait_seconds",
+    "Time a password hash or check waited for a hashing thread",
+    ["operation"]
+)
+hash_duration = Histogram(
+    "password_hash_duration_seconds",
+    "Time a hashing thread spent on a password hash or check",
+    ["operation"]
+)
+hash_pending = Gauge(
+    "password_hash_pending",
+    "Password hashes and checks running or waiting for a hashing thread"
+)
+hash_rejections = Counter(
+    "password_hash_rejections_total",
+    "Password hashes and checks turned away because too many were pending",
+    ["operation"]
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -28,6 +55,71 @@ def get_password_hash(password: str) -> str:
     return hashed.decode('utf-8')
 
 
+class PasswordHashingBusy(ValueError):
+    """Too many password hashes and checks are already pending"""
+
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded thread pool so it never blocks the event loop.
+
+    bcrypt releases the GIL while it works, so the threads (one per core by
+    default) hash in parallel. Once PASSWORD_HASH_MAX_PENDING calls are
+    running or queued, further ones are turned away instead of queueing
+    without bound.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        hash_pending.set_function(lambda: {(): self._pending})
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.password_hash_workers or os.cpu_count() or 1,
+                thread_name_prefix="bcrypt"
+            )
+        return self._executor
+
+    async def _run(self, operation: str, fn: Callable[..., T], *args) -> T:
+        if self._pending >= settings.password_hash_max_pending:
+            hash_rejections.inc(operation=operation)
+            raise PasswordHashingBusy("Too many sign-ins in progress, try again")
+
+        def timed():
+            started = time.perf_counter()
+            return fn(*args), started, time.perf_counter()
+
+        self._pending += 1
+        try:
+            queued_at = time.perf_counter()
+            result, started, finished = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), timed
+            )
+        finally:
+            self._pending -= 1
+        hash_queue_wait.observe(started - queued_at, operation=operation)
+        hash_duration.observe(finished - started, operation=operation)
+        return result
+
+    async def hash(self, password: str) -> str:
+        """get_password_hash() on a hashing thread"""
+        return await self._run("hash", get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """verify_password() on a hashing thread"""
+        return await self._run("verify", verify_password, plain_password, hashed_password)
+
+    def shutdown(self):
+        """Stop the hashing threads once the calls in flight are done"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -0,0 +1,76 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, List, TypeVar
+from app.core.database import LazyConnection
+from app.core.metrics import Counter, Gauge
+
+T = TypeVar("T")
+
+calls = Counter(
+    "singleflight_calls_total",
+    "Coalesced calls, by whether they ran the work (leader) or joined a call in flight (shared)",
+    ["name", "role"]
+)
+coalescing_ratio = Gauge(
+    "singleflight_coalescing_ratio",
+    "Share of coalesced calls that joined a call already in flight",
+    ["name"]
+)
+
+_flights: List["SingleFlight"] = []
+
+
+def _ratios() -> dict:
+    ratios = {}
+    for flight in _flights:
+        shared = calls.get(name=flight.name, role="shared")
+        total = shared + calls.get(name=flight.name, role="leader")
+        ratios[(flight.name,)] = shared / total if total else 0.0
+    return ratios
+
+
+coalescing_ratio.set_function(_ratios)
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls: while a call for a key is in
+    flight, further calls for that key wait for it and get its result (or
+    exception) instead of doing the work again.
+
+    The work runs in its own task, so a caller that goes away does not
+    cancel it for the others.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        _flights.append(self)
+
+    def _done(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Retrieve the exception even when every caller went away
+            task.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Result of fn(), shared with identical calls in flight"""
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda done: self._done(key, done))
+            calls.inc(name=self.name, role="leader")
+        else:
+            calls.inc(name=self.name, role="shared")
+        return await asyncio.shield(task)
+
+    async def do_with_connection(
+        self,
+        key: Hashable,
+        fn: Callable[[LazyConnection], Awaitable[T]],
+        pool: str = "booking"
+    ) -> T:
+        """Like do(), with fn run on a lazy handle on the named pool: only the
+        leading call's queries check out connections, and fn answering from
+        memory checks out none
+        """
+        return await self.do(key, lambda: fn(LazyConnection(pool)))
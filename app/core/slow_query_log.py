@@ -0,0 +1,114 @@
+import asyncio
+import json
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import List, Set
+from app.core.config import settings
+from app.core.database import Database
+from app.core.metrics import Counter
+from app.core.statements import Statement, statements
+
+# Plans captured at a time; further slow queries in the meantime are skipped
+MAX_CONCURRENT_EXPLAINS = 1
+
+slow_queries = Counter(
+    "slow_queries_total",
+    "Statements of the watched repositories that took at least SLOW_QUERY_MS",
+    ["statement"]
+)
+captures = Counter(
+    "slow_query_captures_total",
+    "Slow-query plan captures, by outcome (captured, failed, sampled_out, rate_limited, busy)",
+    ["result"]
+)
+
+
+def _shape(value) -> str:
+    """Type (and size) of a parameter, without its value"""
+    if isinstance(value, (list, tuple, str, bytes)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+class SlowQueryLog:
+    """Ring buffer of slow statements with their EXPLAIN (FORMAT JSON) plans.
+
+    Plans are captured in background tasks on a reporting connection, with
+    the parameters of the slow run; only their shapes are kept. Sampling, a
+    per-minute rate limit and a single capture at a time keep the capture
+    from adding to an overload.
+    """
+
+    def __init__(self):
+        self._entries = deque(maxlen=settings.slow_query_log_size)
+        self._tokens = float(settings.slow_query_max_per_minute)
+        self._refilled_at = time.monotonic()
+        self._tasks: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def _watched(statement: Statement) -> bool:
+        prefixes = [p.strip() for p in settings.slow_query_repositories.split(",") if p.strip()]
+        return statement.name.split(".", 1)[0] in prefixes
+
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        rate = settings.slow_query_max_per_minute / 60
+        self._tokens = min(settings.slow_query_max_per_minute, self._tokens + (now - self._refilled_at) * rate)
+        self._refilled_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def record(self, statement: Statement, args: tuple, seconds: float):
+        """Statement listener: schedule a plan capture of a slow run"""
+        if not self._watched(statement):
+            return
+        slow_queries.inc(statement=statement.name)
+        if random.random() >= settings.slow_query_sample_rate:
+            captures.inc(result="sampled_out")
+        elif len(self._tasks) >= MAX_CONCURRENT_EXPLAINS:
+            captures.inc(result="busy")
+        elif not self._take_token():
+            captures.inc(result="rate_limited")
+        else:
+            task = asyncio.create_task(self._capture(statement, args, seconds))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, statement: Statement, args: tuple):
+        async with Database.acquire("reporting") as conn:
+            # Prepared outside the statement cache, which is kept for the registered statements
+            explain = await conn.prepare(f"EXPLAIN (FORMAT JSON) {statement.sql}")
+            plan = await explain.fetchval(*args)
+        return json.loads(plan)
+
+    async def _capture(self, statement: Statement, args: tuple, seconds: float):
+        entry = {
+            "statement": statement.name,
+            "sql": " ".join(statement.sql.split()),
+            "params": [_shape(arg) for arg in args],
+            "duration_ms": seconds * 1000,
+            "captured_at": datetime.now(timezone.utc),
+            "plan": None,
+            "error": None
+        }
+        try:
+            entry["plan"] = await asyncio.wait_for(
+                self._explain(statement, args), timeout=settings.slow_query_explain_timeout_seconds
+            )
+            captures.inc(result="captured")
+        except Exception as e:
+            entry["error"] = f"{type(e).__name__}: {e}"
+            captures.inc(result="failed")
+        self._entries.append(entry)
+
+    def entries(self) -> List[dict]:
+        """Captured slow queries, newest first"""
+        return list(reversed(self._entries))
+
+
+slow_query_log = SlowQueryLog()
+statements.slow_listener = slow_query_log.record
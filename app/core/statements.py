@@ -0,0 +1,114 @@
+import asyncpg
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from asyncpg.cursor import CursorFactory
+from app.core.config import settings
+from app.core.metrics import Counter
+
+prepared = Counter(
+    "db_statements_prepared_total",
+    "Hot statements prepared by new pool connections",
+    ["statement"]
+)
+
+PLACEHOLDER = re.compile(r"\$(\d+)")
+
+
+class Statement:
+    """A named SQL statement.
+
+    Runs through the connection's statement cache, so it is parsed and
+    planned once per connection and reused by every later run.
+    """
+    __slots__ = ("name", "sql", "warm", "parameters")
+
+    def __init__(self, name: str, sql: str, warm: Tuple[str, ...] = ()):
+        self.name = name
+        self.sql = sql
+        # Number of arguments, from the highest $n placeholder
+        self.parameters = max((int(n) for n in PLACEHOLDER.findall(sql)), default=0)
+        # Pools whose new connections prepare the statement up front
+        self.warm = warm
+
+    async def _run(self, conn: asyncpg.Connection, method: str, args: tuple, timeout: Optional[float]):
+        checkout = getattr(conn, "checkout", None)
+        if checkout is not None:
+            # A lazy handle: time the query, not the wait for a pool connection
+            async with checkout() as checked_out:
+                return await self._run(checked_out, method, args, timeout)
+        started = time.perf_counter()
+        try:
+            return await getattr(conn, method)(self.sql, *args, timeout=timeout)
+        finally:
+            # Also on errors: a query cancelled by statement_timeout is the slowest of all
+            elapsed = time.perf_counter() - started
+            if elapsed * 1000 >= settings.slow_query_ms and statements.slow_listener is not None:
+                statements.slow_listener(self, args, elapsed)
+
+    async def fetch(self, conn: asyncpg.Connection, *args, timeout: Optional[float] = None) -> List[asyncpg.Record]:
+        return await self._run(conn, "fetch", args, timeout)
+
+    async def fetchrow(self, conn: asyncpg.Connection, *args, timeout: Optional[float] = None) -> Optional[asyncpg.Record]:
+        return await self._run(conn, "fetchrow", args, timeout)
+
+    async def fetchval(self, conn: asyncpg.Connection, *args, timeout: Optional[float] = None) -> Any:
+        return await self._run(conn, "fetchval", args, timeout)
+
+    async def execute(self, conn: asyncpg.Connection, *args, timeout: Optional[float] = None) -> str:
+        """Run the statement and return its status (e.g. "UPDATE 3")"""
+        return await self._run(conn, "execute", args, timeout)
+
+    def cursor(self, conn: asyncpg.Connection, *args, prefetch: Optional[int] = None) -> CursorFactory:
+        """Rows through a server-side cursor (needs a transaction)"""
+        return conn.cursor(self.sql, *args, prefetch=prefetch)
+
+
+class StatementRegistry:
+    """Every SQL statement the repositories run, by name"""
+
+    def __init__(self):
+        self._statements: Dict[str, Statement] = {}
+        # Called with (statement, args, seconds) when a run takes at least SLOW_QUERY_MS
+        self.slow_listener: Optional[Callable[[Statement, tuple, float], None]] = None
+
+    def __len__(self) -> int:
+        return len(self._statements)
+
+    def register(self, name: str, sql: str, warm: Tuple[str, ...] = ()) -> Statement:
+        """Statement for the SQL, registered on first use.
+
+        Queries assembled at run time register each variant under the same
+        name; they are built from a fixed set of fragments, so the number of
+        variants stays small.
+        """
+        statement = self._statements.get(sql)
+        if statement is None:
+            statement = self._statements[sql] = Statement(name, sql, warm)
+        return statement
+
+    def names(self) -> List[str]:
+        return sorted({statement.name for statement in self._statements.values()})
+
+    def warm_for(self, pool: str) -> List[Statement]:
+        """Statements the pool's connections prepare when they are opened"""
+        return [statement for statement in self._statements.values() if pool in statement.warm]
+
+    async def prepare_warm(self, pool: str, conn: asyncpg.Connection):
+        """Connection init hook: put the pool's hot statements in the connection's statement cache.
+
+        Each statement is run once, through the same cached path as the
+        repositories, with NULL arguments in a read-only transaction: the run
+        parses and plans it into the cache, and cannot change data (writes
+        fail once planned, and NULL keys match no rows).
+        """
+        for statement in self.warm_for(pool):
+            try:
+                async with conn.transaction(readonly=True):
+                    await conn.fetch(statement.sql, *[None] * statement.parameters)
+            except asyncpg.PostgresError:
+                pass
+            prepared.inc(statement=statement.name)
+
+
+statements = StatementRegistry()
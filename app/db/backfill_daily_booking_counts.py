@@ -0,0 +1,32 @@
+import asyncio
+import asyncpg
+from datetime import timedelta
+from app.core.config import settings
+from app.repositories.booking_repository import BookingRepository
+
+
+async def backfill_daily_booking_counts():
+    """Rebuild user_daily_booking_counts from the bookings table, one day at a time"""
+    conn = await asyncpg.connect(settings.database_url)
+    
+    try:
+        date_range = await BookingRepository.get_booking_date_range(conn)
+        if not date_range:
+            print("No bookings, nothing to backfill")
+            return
+        
+        day = date_range['first_day']
+        while day <= date_range['last_day']:
+            users = await BookingRepository.rebuild_daily_booking_counts(conn, day)
+            if users:
+                print(f"{day}: {users} users")
+            day += timedelta(days=1)
+        
+        print("Daily booking counts backfilled!")
+        
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill_daily_booking_counts())
@@ -0,0 +1,93 @@
+# Per-payment latency of pay_booking, per checkout mode. Payments are refunded
+# afterwards, but run it against a seeded, disposable database.
+#
+#   python -m app.db.benchmarks.pay_booking --payments 200 --concurrency 10
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from app.core.config import settings
+from app.core.database import Database
+from app.repositories.booking_repository import BookingRepository
+from app.services.booking_service import BookingService
+from app.db.benchmarks.reserve_hot_seat import percentile
+
+MODES = ("multi_statement", "single_statement")
+
+
+async def hold_seats(pool, count: int) -> list:
+    """Hold `count` free seats, each for a different user with enough balance"""
+    async with pool.acquire() as conn:
+        pairs = await conn.fetch("""
+            WITH free_seats AS (
+                SELECT s.id, s.trip_id, s.price, row_number() OVER () as n
+                FROM seats s
+                JOIN trips t ON t.id = s.trip_id
+                WHERE t.status = 'active'
+                  AND NOT EXISTS (SELECT 1 FROM reservations r WHERE r.seat_id = s.id AND r.status = 'held')
+                  AND NOT EXISTS (SELECT 1 FROM bookings b WHERE b.seat_id = s.id AND b.status = 'confirmed')
+                LIMIT $1
+            ),
+            payers AS (
+                SELECT user_id, row_number() OVER () as n
+                FROM user_wallets
+                WHERE balance >= 1000000
+                LIMIT $1
+            )
+            SELECT f.id as seat_id, f.trip_id, p.user_id
+            FROM free_seats f
+            JOIN payers p USING (n)
+        """, count)
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=10)
+        held = []
+        for pair in pairs:
+            reservation = await BookingRepository.claim_seat(
+                conn, pair['user_id'], pair['seat_id'], pair['trip_id'],
+                "bench", "bench", "0000000000", True, expires_at
+            )
+            held.append((pair['user_id'], reservation['id']))
+        return held
+
+
+async def pay(pool, semaphore, user_id, reservation_id) -> tuple:
+    async with semaphore:
+        async with pool.acquire() as conn:
+            started = time.perf_counter()
+            booking = await BookingService.pay_booking(conn, user_id, reservation_id)
+            return time.perf_counter() - started, booking
+
+
+async def main(payments: int, concurrency: int):
+    pool = await Database.create_pool()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    for mode in MODES:
+        settings.checkout_mode = mode
+        held = await hold_seats(pool, payments)
+        started = time.perf_counter()
+        results = await asyncio.gather(*(pay(pool, semaphore, u, r) for u, r in held))
+        elapsed = time.perf_counter() - started
+
+        latencies = [latency for latency, _ in results]
+        print(
+            f"{mode:>16}: {len(latencies)} payments | "
+            f"p50 {statistics.median(latencies) * 1000:.2f} ms, "
+            f"p99 {percentile(latencies, 99) * 1000:.2f} ms, "
+            f"{len(latencies) / elapsed:.0f} payments/s"
+        )
+
+        # Refund everything so wallets and seats are back where they were
+        async with pool.acquire() as conn:
+            for _, booking in results:
+                await BookingService.cancel_booking(conn, booking['user_id'], booking['id'])
+
+    await Database.close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pay_booking checkout modes")
+    parser.add_argument("--payments", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.payments, args.concurrency))
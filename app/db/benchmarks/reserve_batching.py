@@ -0,0 +1,96 @@
+# Throughput and latency of many concurrent reserve-seat requests on distinct
+# seats, unbatched (one pooled connection and transaction per request) versus
+# micro-batched. Reservations are cancelled afterwards.
+#
+#   python -m app.db.benchmarks.reserve_batching --requests 1000
+import argparse
+import asyncio
+import statistics
+import time
+from app.core.config import settings
+from app.core.database import Database
+from app.schemas.booking import ReserveSeatRequest
+from app.services.booking_service import BookingService
+from app.services.reservation_batcher import reservation_batcher
+from app.db.benchmarks.reserve_hot_seat import percentile
+
+
+async def free_seat_requests(pool, count: int) -> list:
+    async with pool.acquire() as conn:
+        users = [row['id'] for row in await conn.fetch("SELECT id FROM users LIMIT 100")]
+        seats = await conn.fetch("""
+            SELECT s.id, s.trip_id
+            FROM seats s
+            JOIN trips t ON t.id = s.trip_id
+            WHERE t.status = 'active'
+              AND NOT EXISTS (SELECT 1 FROM reservations r WHERE r.seat_id = s.id AND r.status = 'held')
+              AND NOT EXISTS (SELECT 1 FROM bookings b WHERE b.seat_id = s.id AND b.status = 'confirmed')
+            LIMIT $1
+        """, count)
+    return [
+        (users[i % len(users)], ReserveSeatRequest(
+            trip_id=seat['trip_id'],
+            seat_id=seat['id'],
+            first_name="bench",
+            last_name="bench",
+            national_id="0000000000",
+            gender=True
+        ))
+        for i, seat in enumerate(seats)
+    ]
+
+
+async def unbatched(pool, user_id, request) -> dict:
+    async with pool.acquire() as conn:
+        return await BookingService.reserve_seat(conn, user_id, request)
+
+
+async def batched(pool, user_id, request) -> dict:
+    return await reservation_batcher.reserve_seat(user_id, request)
+
+
+async def timed(call, pool, user_id, request) -> tuple:
+    started = time.perf_counter()
+    try:
+        result = await call(pool, user_id, request)
+    except ValueError:
+        result = None
+    return time.perf_counter() - started, result
+
+
+async def main(requests: int):
+    pool = await Database.create_pool()
+
+    for name, call in (("unbatched", unbatched), ("batched", batched)):
+        claims = await free_seat_requests(pool, requests)
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(timed(call, pool, u, r) for u, r in claims))
+        elapsed = time.perf_counter() - started
+
+        latencies = [latency for latency, _ in outcomes]
+        reserved = [result['reservation_id'] for _, result in outcomes if result]
+        print(
+            f"{name:>9}: {len(reserved)}/{len(latencies)} reserved | "
+            f"{len(latencies) / elapsed:.0f} req/s, "
+            f"p50 {statistics.median(latencies) * 1000:.1f} ms, "
+            f"p99 {percentile(latencies, 99) * 1000:.1f} ms"
+        )
+
+        async with pool.acquire() as conn:
+            await conn.execute(
+                "UPDATE reservations SET status = 'cancelled' WHERE id = ANY($1::uuid[])",
+                reserved
+            )
+
+    await Database.close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark micro-batched reservations")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=settings.reservation_batch_max_size)
+    parser.add_argument("--linger-ms", type=float, default=settings.reservation_batch_linger_ms)
+    args = parser.parse_args()
+    settings.reservation_batch_max_size = args.batch_size
+    settings.reservation_batch_linger_ms = args.linger_ms
+    asyncio.run(main(args.requests))
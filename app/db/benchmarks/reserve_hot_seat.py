@@ -0,0 +1,103 @@
+# Many concurrent clients race for one seat, per reservation claim mode.
+#
+#   python -m app.db.benchmarks.reserve_hot_seat --clients 200 --rounds 5
+import argparse
+import asyncio
+import statistics
+import time
+from uuid import UUID
+from app.core.config import settings
+from app.core.database import Database
+from app.schemas.booking import ReserveSeatRequest
+from app.services.booking_service import BookingService
+
+MODES = ("locking", "constraint")
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def pick_free_seat(conn) -> dict:
+    return await conn.fetchrow("""
+        SELECT s.id, s.trip_id
+        FROM seats s
+        JOIN trips t ON t.id = s.trip_id
+        WHERE t.status = 'active'
+          AND NOT EXISTS (SELECT 1 FROM reservations r WHERE r.seat_id = s.id AND r.status = 'held')
+          AND NOT EXISTS (SELECT 1 FROM bookings b WHERE b.seat_id = s.id AND b.status = 'confirmed')
+        ORDER BY random()
+        LIMIT 1
+    """)
+
+
+async def attempt(pool, user_id: UUID, request: ReserveSeatRequest) -> tuple:
+    started = time.perf_counter()
+    async with pool.acquire() as conn:
+        try:
+            result = await BookingService.reserve_seat(conn, user_id, request)
+        except ValueError:
+            result = None
+    return time.perf_counter() - started, result
+
+
+async def run_round(pool, user_ids: list) -> dict:
+    async with pool.acquire() as conn:
+        seat = await pick_free_seat(conn)
+    request = ReserveSeatRequest(
+        trip_id=seat['trip_id'],
+        seat_id=seat['id'],
+        first_name="bench",
+        last_name="bench",
+        national_id="0000000000",
+        gender=True
+    )
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(attempt(pool, user_id, request) for user_id in user_ids))
+    elapsed = time.perf_counter() - started
+
+    winners = [result for _, result in outcomes if result]
+    # Release the seat again so the benchmark leaves no holds behind
+    async with pool.acquire() as conn:
+        await conn.execute(
+            "UPDATE reservations SET status = 'cancelled' WHERE id = ANY($1::uuid[])",
+            [w['reservation_id'] for w in winners]
+        )
+    return {
+        "latencies": [latency for latency, _ in outcomes],
+        "winners": len(winners),
+        "elapsed": elapsed
+    }
+
+
+async def main(clients: int, rounds: int):
+    pool = await Database.create_pool()
+    async with pool.acquire() as conn:
+        user_ids = [row['id'] for row in await conn.fetch("SELECT id FROM users LIMIT $1", clients)]
+
+    for mode in MODES:
+        settings.reservation_claim_mode = mode
+        latencies, winners, elapsed = [], 0, 0.0
+        for _ in range(rounds):
+            result = await run_round(pool, user_ids)
+            latencies += result["latencies"]
+            winners += result["winners"]
+            elapsed += result["elapsed"]
+        print(
+            f"{mode:>10}: {len(latencies)} attempts, {winners} winners over {rounds} rounds | "
+            f"p50 {statistics.median(latencies) * 1000:.1f} ms, "
+            f"p99 {percentile(latencies, 99) * 1000:.1f} ms, "
+            f"{len(latencies) / elapsed:.0f} attempts/s"
+        )
+
+    await Database.close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark reservation claim modes on one hot seat")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.clients, args.rounds))
@@ -0,0 +1,34 @@
+import asyncio
+import asyncpg
+import sys
+from app.core.config import settings
+from app.repositories.trip_repository import TripRepository
+
+
+async def check_trip_inventory(repair: bool = False):
+    """Compare trip_inventory with a recount of seats/reservations/bookings, optionally rebuilding it"""
+    conn = await asyncpg.connect(settings.database_url)
+    
+    try:
+        mismatches = await TripRepository.get_trip_inventory_mismatches(conn)
+        for mismatch in mismatches:
+            print(f"{mismatch['trip_id']}: stored {mismatch['stored']}, expected {mismatch['expected']}")
+        
+        if not mismatches:
+            print("Trip inventory is consistent")
+            return
+        print(f"{len(mismatches)} trips out of step")
+        
+        if repair:
+            trips = await TripRepository.rebuild_trip_inventory(conn)
+            print(f"Trip inventory rebuilt for {trips} trips!")
+        else:
+            print("Run with --repair to rebuild the trip inventory")
+            sys.exit(1)
+        
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(check_trip_inventory(repair="--repair" in sys.argv[1:]))
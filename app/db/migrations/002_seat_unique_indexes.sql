@@ -0,0 +1,49 @@
+-- At most one live hold per seat, so concurrent claims are arbitrated by the
+-- database instead of SELECT ... FOR UPDATE on the seat row, and at most one
+-- confirmed booking per seat.
+
+-- Holds past their expiry are no longer live
+UPDATE reservations
+SET status = 'expired'
+WHERE status = 'held' AND expires_at <= now();
+
+-- Keep only the newest hold of any seat that was double-reserved
+UPDATE reservations r
+SET status = 'cancelled'
+FROM (
+    SELECT id, row_number() OVER (PARTITION BY seat_id ORDER BY created_at DESC) as rn
+    FROM reservations
+    WHERE status = 'held'
+) dup
+WHERE r.id = dup.id AND dup.rn > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS reservations_held_seat_uidx
+    ON reservations (seat_id)
+    WHERE status = 'held';
+
+-- The claim statement checks for a confirmed booking in its snapshot, which
+-- cannot see a hold that is paid while the claim waits on it in ON CONFLICT;
+-- a unique index on confirmed bookings makes paying the second hold fail
+-- instead of selling the seat twice.
+
+-- Seats already sold twice need a refund decided by hand, so stop rather
+-- than pick a booking to cancel
+DO $$
+DECLARE
+    duplicates INTEGER;
+BEGIN
+    SELECT count(*) INTO duplicates FROM (
+        SELECT seat_id FROM bookings
+        WHERE status = 'confirmed'
+        GROUP BY seat_id
+        HAVING count(*) > 1
+    ) dup;
+    IF duplicates > 0 THEN
+        RAISE EXCEPTION '% seats have more than one confirmed booking; cancel the extra bookings before applying this migration', duplicates;
+    END IF;
+END;
+$$;
+
+CREATE UNIQUE INDEX IF NOT EXISTS bookings_confirmed_seat_uidx
+    ON bookings (seat_id)
+    WHERE status = 'confirmed';
@@ -0,0 +1,12 @@
+-- Expiry and purge of reservations only touch the rows they need
+
+-- Holds due for expiry (background task)
+CREATE INDEX IF NOT EXISTS reservations_held_expires_at_idx
+    ON reservations (expires_at)
+    WHERE status = 'held';
+
+-- Expired reservations in expiry order (bounded purge batches); confirmed
+-- and cancelled ones are kept as booking history
+CREATE INDEX IF NOT EXISTS reservations_expired_expires_at_idx
+    ON reservations (expires_at)
+    WHERE status = 'expired';
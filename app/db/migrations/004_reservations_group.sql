@@ -0,0 +1,7 @@
+-- Reservations made together in one group request share a group_id
+
+ALTER TABLE reservations ADD COLUMN IF NOT EXISTS group_id UUID;
+
+CREATE INDEX IF NOT EXISTS reservations_group_id_idx
+    ON reservations (group_id)
+    WHERE group_id IS NOT NULL;
@@ -0,0 +1,3 @@
+-- Trips in flash-sale mode admit reservations through a per-worker queue
+
+ALTER TABLE trips ADD COLUMN IF NOT EXISTS flash_sale BOOLEAN NOT NULL DEFAULT false;
@@ -0,0 +1,10 @@
+-- Confirmed bookings per user and (UTC) day of booking, kept up to date by the
+-- statements that confirm and cancel bookings. Fill it for existing bookings
+-- with: python -m app.db.backfill_daily_booking_counts
+
+CREATE TABLE IF NOT EXISTS user_daily_booking_counts (
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    bookings INTEGER NOT NULL DEFAULT 0 CHECK (bookings >= 0),
+    PRIMARY KEY (user_id, day)
+);
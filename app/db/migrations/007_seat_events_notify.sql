@@ -0,0 +1,51 @@
+-- Seat state changes are announced on the seat_events channel (delivered on
+-- commit) so every worker can push seat-map deltas to its subscribers
+
+CREATE OR REPLACE FUNCTION notify_reservation_seat_event() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' AND NEW.status = 'held' THEN
+        PERFORM pg_notify('seat_events', json_build_object(
+            'event', 'held',
+            'trip_id', NEW.trip_id,
+            'seat_id', NEW.seat_id,
+            'expires_at', NEW.expires_at
+        )::text);
+    ELSIF TG_OP = 'UPDATE' AND OLD.status = 'held' AND NEW.status IN ('cancelled', 'expired') THEN
+        PERFORM pg_notify('seat_events', json_build_object(
+            'event', 'released',
+            'trip_id', NEW.trip_id,
+            'seat_id', NEW.seat_id
+        )::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS reservations_seat_events ON reservations;
+CREATE TRIGGER reservations_seat_events
+    AFTER INSERT OR UPDATE OF status ON reservations
+    FOR EACH ROW EXECUTE FUNCTION notify_reservation_seat_event();
+
+CREATE OR REPLACE FUNCTION notify_booking_seat_event() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' AND NEW.status = 'confirmed' THEN
+        PERFORM pg_notify('seat_events', json_build_object(
+            'event', 'booked',
+            'trip_id', NEW.trip_id,
+            'seat_id', NEW.seat_id
+        )::text);
+    ELSIF TG_OP = 'UPDATE' AND OLD.status = 'confirmed' AND NEW.status <> 'confirmed' THEN
+        PERFORM pg_notify('seat_events', json_build_object(
+            'event', 'unbooked',
+            'trip_id', NEW.trip_id,
+            'seat_id', NEW.seat_id
+        )::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bookings_seat_events ON bookings;
+CREATE TRIGGER bookings_seat_events
+    AFTER INSERT OR UPDATE OF status ON bookings
+    FOR EACH ROW EXECUTE FUNCTION notify_booking_seat_event();
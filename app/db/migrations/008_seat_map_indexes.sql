@@ -0,0 +1,6 @@
+-- Support reading one trip's seat map with per-seat index lookups; confirmed
+-- bookings are looked up by seat through bookings_confirmed_seat_uidx
+-- (migration 002)
+
+CREATE INDEX IF NOT EXISTS seats_trip_id_seat_number_idx
+    ON seats (trip_id, seat_number);
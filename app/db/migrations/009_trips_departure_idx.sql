@@ -0,0 +1,5 @@
+-- Available-trip listings are bounded by a departure window
+
+CREATE INDEX IF NOT EXISTS trips_active_departure_time_idx
+    ON trips (departure_time, id)
+    WHERE status = 'active';
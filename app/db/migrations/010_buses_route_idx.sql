@@ -0,0 +1,4 @@
+-- Availability searches filter on the route IDs resolved from origin/destination text
+
+CREATE INDEX IF NOT EXISTS buses_route_id_idx
+    ON buses (route_id);
@@ -0,0 +1,268 @@
+-- One row per trip with its seat counts and free-seat price range, so trip
+-- listings do not recount seat state. A seat counts as held while it has a
+-- reservation in status 'held' (overdue ones until the expiry task runs).
+-- python -m app.db.check_trip_inventory compares it with the source tables.
+--
+-- Statement-level triggers on trips, seats, reservations and bookings only
+-- append the affected trip ids to trip_inventory_changes, an insert-only
+-- queue: writers never wait on each other or on a trip's inventory row. The
+-- trip inventory task drains the queue every TRIP_INVENTORY_REFRESH_SECONDS
+-- and recounts the drained trips, locking their inventory rows in trip_id
+-- order. A queued change only becomes visible once its transaction commits,
+-- so the recount that drains it sees the change.
+
+CREATE TABLE IF NOT EXISTS trip_inventory (
+    trip_id UUID PRIMARY KEY REFERENCES trips(id) ON DELETE CASCADE,
+    departure_time TIMESTAMPTZ NOT NULL,
+    active BOOLEAN NOT NULL,
+    seats INTEGER NOT NULL DEFAULT 0,
+    held_seats INTEGER NOT NULL DEFAULT 0,
+    booked_seats INTEGER NOT NULL DEFAULT 0,
+    free_seats INTEGER NOT NULL DEFAULT 0,
+    min_price INTEGER,
+    max_price INTEGER,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS trip_inventory_available_idx
+    ON trip_inventory (departure_time, trip_id)
+    WHERE active AND free_seats > 0;
+
+CREATE TABLE IF NOT EXISTS trip_inventory_changes (
+    id BIGSERIAL PRIMARY KEY,
+    trip_id UUID NOT NULL,
+    queued_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Inventory rows as computed from the source tables
+CREATE OR REPLACE FUNCTION trip_inventory_source(trip_ids UUID[])
+RETURNS TABLE (
+    trip_id UUID,
+    departure_time TIMESTAMPTZ,
+    active BOOLEAN,
+    seats INTEGER,
+    held_seats INTEGER,
+    booked_seats INTEGER,
+    free_seats INTEGER,
+    min_price INTEGER,
+    max_price INTEGER
+) AS $$
+    SELECT
+        t.id,
+        t.departure_time,
+        t.status = 'active',
+        count(s.id)::int,
+        (count(s.id) FILTER (WHERE s.held AND NOT s.booked))::int,
+        (count(s.id) FILTER (WHERE s.booked))::int,
+        (count(s.id) FILTER (WHERE NOT s.held AND NOT s.booked))::int,
+        min(s.price) FILTER (WHERE NOT s.held AND NOT s.booked),
+        max(s.price) FILTER (WHERE NOT s.held AND NOT s.booked)
+    FROM trips t
+    LEFT JOIN LATERAL (
+        SELECT
+            seats.id,
+            seats.price,
+            EXISTS (
+                SELECT 1 FROM bookings bk
+                WHERE bk.seat_id = seats.id AND bk.status = 'confirmed'
+            ) as booked,
+            EXISTS (
+                SELECT 1 FROM reservations res
+                WHERE res.seat_id = seats.id AND res.status = 'held'
+            ) as held
+        FROM seats
+        WHERE seats.trip_id = t.id
+    ) s ON true
+    WHERE t.id = ANY(trip_ids)
+    GROUP BY t.id
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION queue_trip_inventory(trip_ids UUID[]) RETURNS void AS $$
+    INSERT INTO trip_inventory_changes (trip_id)
+    SELECT DISTINCT unnest(trip_ids)
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION refresh_trip_inventory(trip_ids UUID[]) RETURNS void AS $$
+BEGIN
+    IF cardinality(trip_ids) = 0 THEN
+        RETURN;
+    END IF;
+    INSERT INTO trip_inventory (trip_id, departure_time, active)
+    SELECT id, departure_time, status = 'active' FROM trips WHERE id = ANY(trip_ids)
+    ORDER BY id
+    ON CONFLICT (trip_id) DO NOTHING;
+    -- Recount only once the rows are locked (in trip_id order, so concurrent
+    -- refreshes cannot deadlock): the recount then sees every change
+    -- committed by refreshes that updated them before us
+    PERFORM 1 FROM trip_inventory
+    WHERE trip_id = ANY(trip_ids)
+    ORDER BY trip_id
+    FOR UPDATE;
+    UPDATE trip_inventory i
+    SET departure_time = src.departure_time,
+        active = src.active,
+        seats = src.seats,
+        held_seats = src.held_seats,
+        booked_seats = src.booked_seats,
+        free_seats = src.free_seats,
+        min_price = src.min_price,
+        max_price = src.max_price,
+        updated_at = now()
+    FROM trip_inventory_source(trip_ids) src
+    WHERE i.trip_id = src.trip_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recount the trips of up to batch_size queued changes; returns the number
+-- of changes drained. Concurrent callers skip each other's changes.
+CREATE OR REPLACE FUNCTION drain_trip_inventory_changes(batch_size INTEGER) RETURNS INTEGER AS $$
+DECLARE
+    drained INTEGER;
+    trip_ids UUID[];
+BEGIN
+    WITH taken AS (
+        DELETE FROM trip_inventory_changes
+        WHERE id IN (
+            SELECT id FROM trip_inventory_changes
+            ORDER BY id
+            LIMIT batch_size
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING trip_id
+    )
+    SELECT count(*), array_agg(DISTINCT trip_id ORDER BY trip_id)
+    INTO drained, trip_ids
+    FROM taken;
+    -- Trips deleted since their change was queued are gone from trip_inventory already
+    PERFORM refresh_trip_inventory(coalesce(trip_ids, '{}'));
+    RETURN drained;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables cannot be combined with several events or column lists,
+-- so each table gets one trigger per event and filters the rows itself
+
+CREATE OR REPLACE FUNCTION reservations_trip_inventory() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM queue_trip_inventory(ARRAY(
+            SELECT trip_id FROM new_rows WHERE status = 'held'
+        ));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM queue_trip_inventory(ARRAY(
+            SELECT n.trip_id FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE (n.status, n.seat_id, n.trip_id) IS DISTINCT FROM (o.status, o.seat_id, o.trip_id)
+            UNION
+            SELECT o.trip_id FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE (n.status, n.seat_id, n.trip_id) IS DISTINCT FROM (o.status, o.seat_id, o.trip_id)
+        ));
+    ELSE
+        PERFORM queue_trip_inventory(ARRAY(
+            SELECT trip_id FROM old_rows WHERE status = 'held'
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS reservations_trip_inventory_insert ON reservations;
+CREATE TRIGGER reservations_trip_inventory_insert
+    AFTER INSERT ON reservations REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION reservations_trip_inventory();
+DROP TRIGGER IF EXISTS reservations_trip_inventory_update ON reservations;
+CREATE TRIGGER reservations_trip_inventory_update
+    AFTER UPDATE ON reservations REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION reservations_trip_inventory();
+DROP TRIGGER IF EXISTS reservations_trip_inventory_delete ON reservations;
+CREATE TRIGGER reservations_trip_inventory_delete
+    AFTER DELETE ON reservations REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION reservations_trip_inventory();
+
+CREATE OR REPLACE FUNCTION bookings_trip_inventory() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM queue_trip_inventory(ARRAY(
+            SELECT trip_id FROM new_rows WHERE status = 'confirmed'
+        ));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM queue_trip_inventory(ARRAY(
+            SELECT n.trip_id FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE (n.status, n.seat_id, n.trip_id) IS DISTINCT FROM (o.status, o.seat_id, o.trip_id)
+            UNION
+            SELECT o.trip_id FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE (n.status, n.seat_id, n.trip_id) IS DISTINCT FROM (o.status, o.seat_id, o.trip_id)
+        ));
+    ELSE
+        PERFORM queue_trip_inventory(ARRAY(
+            SELECT trip_id FROM old_rows WHERE status = 'confirmed'
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bookings_trip_inventory_insert ON bookings;
+CREATE TRIGGER bookings_trip_inventory_insert
+    AFTER INSERT ON bookings REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bookings_trip_inventory();
+DROP TRIGGER IF EXISTS bookings_trip_inventory_update ON bookings;
+CREATE TRIGGER bookings_trip_inventory_update
+    AFTER UPDATE ON bookings REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bookings_trip_inventory();
+DROP TRIGGER IF EXISTS bookings_trip_inventory_delete ON bookings;
+CREATE TRIGGER bookings_trip_inventory_delete
+    AFTER DELETE ON bookings REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bookings_trip_inventory();
+
+CREATE OR REPLACE FUNCTION seats_trip_inventory() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM queue_trip_inventory(ARRAY(SELECT trip_id FROM new_rows));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM queue_trip_inventory(ARRAY(
+            SELECT trip_id FROM new_rows UNION SELECT trip_id FROM old_rows
+        ));
+    ELSE
+        PERFORM queue_trip_inventory(ARRAY(SELECT trip_id FROM old_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS seats_trip_inventory_insert ON seats;
+CREATE TRIGGER seats_trip_inventory_insert
+    AFTER INSERT ON seats REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION seats_trip_inventory();
+DROP TRIGGER IF EXISTS seats_trip_inventory_update ON seats;
+CREATE TRIGGER seats_trip_inventory_update
+    AFTER UPDATE ON seats REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION seats_trip_inventory();
+DROP TRIGGER IF EXISTS seats_trip_inventory_delete ON seats;
+CREATE TRIGGER seats_trip_inventory_delete
+    AFTER DELETE ON seats REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION seats_trip_inventory();
+
+CREATE OR REPLACE FUNCTION trips_trip_inventory() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM queue_trip_inventory(ARRAY(SELECT id FROM new_rows));
+    ELSE
+        PERFORM queue_trip_inventory(ARRAY(
+            SELECT n.id FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE (n.departure_time, n.status) IS DISTINCT FROM (o.departure_time, o.status)
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trips_trip_inventory_insert ON trips;
+CREATE TRIGGER trips_trip_inventory_insert
+    AFTER INSERT ON trips REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION trips_trip_inventory();
+DROP TRIGGER IF EXISTS trips_trip_inventory_update ON trips;
+CREATE TRIGGER trips_trip_inventory_update
+    AFTER UPDATE ON trips REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION trips_trip_inventory();
+
+SELECT refresh_trip_inventory(ARRAY(SELECT id FROM trips));
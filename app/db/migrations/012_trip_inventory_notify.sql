@@ -0,0 +1,20 @@
+-- Announce trip_inventory recounts on the trip_inventory channel (delivered
+-- on commit). The counts lag the seat events by up to a refresh interval, so
+-- a summary search cached in between holds the old counts; every worker
+-- drops the cached searches of a trip's route once its recount commits.
+
+CREATE OR REPLACE FUNCTION notify_trip_inventory() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('trip_inventory', n.trip_id::text)
+    FROM new_rows n JOIN old_rows o ON o.trip_id = n.trip_id
+    WHERE (n.active, n.departure_time, n.free_seats, n.held_seats, n.booked_seats, n.min_price, n.max_price)
+        IS DISTINCT FROM (o.active, o.departure_time, o.free_seats, o.held_seats, o.booked_seats, o.min_price, o.max_price);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trip_inventory_notify ON trip_inventory;
+CREATE TRIGGER trip_inventory_notify
+    AFTER UPDATE ON trip_inventory
+    REFERENCING NEW TABLE AS new_rows OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_trip_inventory();
@@ -1,20 +1,49 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.core.database import Database
+from app.core.metrics import registry
+from app.core.security import password_hasher
+from app.api.v1.dependencies import note_successful_write
 from app.api.v1.router import api_router
-from app.tasks.reservation_cleanup import start_reservation_cleanup_task
+from app.tasks.replica_lag import start_replica_lag_task, stop_replica_lag_task
+from app.tasks.reservation_cleanup import start_reservation_cleanup_task, stop_reservation_cleanup_task
+from app.tasks.trip_inventory_refresh import start_trip_inventory_refresh_task, stop_trip_inventory_refresh_task
+from app.tasks.seat_availability_refresh import (
+    start_seat_availability_refresh_task, stop_seat_availability_refresh_task
+)
+from app.services.route_search import route_search
+from app.services.seat_availability import seat_availability
+from app.services.seat_events import seat_events
 from app.core.config import settings
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    await Database.create_pool()
+    await Database.create_pools()
+    # Serve the first requests from open connections with their hot statements prepared
+    await Database.warm_up()
+    start_replica_lag_task()
+    # The in-process indexes are loaded from the primary: events applied to
+    # them must not be rolled back by a lagging replica
+    async with Database.acquire("read", primary=True) as conn:
+        await seat_availability.load(conn)
+        await route_search.load(conn)
+    seat_events.start()
     start_reservation_cleanup_task()
+    start_seat_availability_refresh_task()
+    start_trip_inventory_refresh_task()
     yield
     # Shutdown
+    await seat_events.stop()
+    await stop_seat_availability_refresh_task()
+    await stop_trip_inventory_refresh_task()
+    await stop_reservation_cleanup_task()
+    await stop_replica_lag_task()
     await Database.close_pool()
+    password_hasher.shutdown()
 
 
 app = FastAPI(
@@ -34,6 +63,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.middleware("http")(note_successful_write)
+
 app.include_router(api_router, prefix="/api/v1")
 
 
@@ -46,3 +77,9 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """This worker's metrics in the Prometheus text format"""
+    return PlainTextResponse(registry.exposition(), media_type="text/plain; version=0.0.4")
+
@@ -1,9 +1,377 @@
 import asyncpg
-from typing import Optional, List
+from typing import AsyncIterator, Optional, List
 from uuid import UUID
-from datetime import datetime, timedelta,timezone   
+from datetime import date, datetime, timedelta,timezone   
+from app.core.statements import statements
+from app.schemas.booking import SeatPassenger
+from app.repositories.instrumentation import instrumented
 
+# Unique index refusing a second confirmed booking of a seat (migration 002)
+CONFIRMED_SEAT_INDEX = "bookings_confirmed_seat_uidx"
 
+LOCK_SEAT = statements.register("booking.lock_seat", """
+    SELECT id, trip_id, seat_number, price
+    FROM seats
+    WHERE id = $1
+    FOR UPDATE
+""")
+SEAT_HELD = statements.register("booking.seat_held", """
+    SELECT id FROM reservations
+    WHERE seat_id = $1 
+      AND status = 'held'
+      AND expires_at > now()
+""")
+SEAT_BOOKED = statements.register("booking.seat_booked", """
+    SELECT id FROM bookings
+    WHERE seat_id = $1
+      AND status = 'confirmed'
+""")
+LOCK_BOOKINGS = statements.register("booking.lock_bookings", "LOCK TABLE bookings IN SHARE MODE")
+CREATE_RESERVATION = statements.register("booking.create_reservation", """
+    INSERT INTO reservations (user_id, seat_id, trip_id, first_name, last_name, national_id, gender, expires_at, status)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, 'held')
+    RETURNING id, user_id, seat_id, trip_id, first_name, last_name, national_id, gender, expires_at, status, created_at
+""")
+CLAIM_SEAT = statements.register("booking.claim_seat", """
+    WITH seat AS (
+        SELECT id, trip_id FROM seats WHERE id = $2
+    ),
+    takeover AS (
+        UPDATE reservations
+        SET status = 'expired'
+        WHERE seat_id = $2
+          AND status = 'held'
+          AND expires_at <= now()
+          AND EXISTS (SELECT 1 FROM seat WHERE trip_id = $3)
+        RETURNING id
+    ),
+    claimed AS (
+        INSERT INTO reservations (user_id, seat_id, trip_id, first_name, last_name, national_id, gender, expires_at, status)
+        SELECT $1, seat.id, seat.trip_id, $4, $5, $6, $7, $8, 'held'
+        FROM seat
+        WHERE seat.trip_id = $3
+          -- reading takeover makes the expired hold go away before the insert
+          AND (SELECT count(*) FROM takeover) >= 0
+          AND NOT EXISTS (
+              SELECT 1 FROM bookings WHERE seat_id = $2 AND status = 'confirmed'
+          )
+        ON CONFLICT (seat_id) WHERE status = 'held' DO NOTHING
+        RETURNING id, user_id, seat_id, trip_id, first_name, last_name, national_id, gender, expires_at, status, created_at
+    )
+    SELECT (SELECT trip_id FROM seat) as seat_trip_id, claimed.*
+    FROM (SELECT 1) one
+    LEFT JOIN claimed ON true
+""", warm=('booking',))
+# Seats claimed together are locked first in one global order, so batches and
+# groups sharing seats queue on each other instead of deadlocking
+LOCK_SEATS = statements.register("booking.lock_seats", """
+    SELECT id FROM seats
+    WHERE id = ANY($1::uuid[])
+    ORDER BY trip_id, id
+    FOR UPDATE
+""")
+CLAIM_SEATS_BATCH = statements.register("booking.claim_seats_batch", """
+    WITH req AS (
+        SELECT *
+        FROM unnest($1::uuid[], $2::uuid[], $3::uuid[], $4::text[], $5::text[], $6::text[], $7::bool[])
+            WITH ORDINALITY AS r(user_id, trip_id, seat_id, first_name, last_name, national_id, gender, ord)
+    ),
+    seat AS (
+        SELECT id, trip_id FROM seats WHERE id IN (SELECT seat_id FROM req)
+    ),
+    takeover AS (
+        UPDATE reservations r
+        SET status = 'expired'
+        FROM req
+        JOIN seat ON seat.id = req.seat_id AND seat.trip_id = req.trip_id
+        WHERE r.seat_id = req.seat_id
+          AND r.status = 'held'
+          AND r.expires_at <= now()
+        RETURNING r.id
+    ),
+    claimed AS (
+        INSERT INTO reservations (user_id, seat_id, trip_id, first_name, last_name, national_id, gender, expires_at, status, group_id)
+        SELECT req.user_id, req.seat_id, seat.trip_id, req.first_name, req.last_name, req.national_id, req.gender, $8, 'held', $9
+        FROM req
+        JOIN seat ON seat.id = req.seat_id AND seat.trip_id = req.trip_id
+        -- reading takeover makes expired holds go away before the insert
+        WHERE (SELECT count(*) FROM takeover) >= 0
+          AND NOT EXISTS (
+              SELECT 1 FROM bookings bk WHERE bk.seat_id = req.seat_id AND bk.status = 'confirmed'
+          )
+        ON CONFLICT (seat_id) WHERE status = 'held' DO NOTHING
+        RETURNING id, user_id, seat_id, trip_id, first_name, last_name, national_id, gender, expires_at, status, created_at, group_id
+    )
+    SELECT req.seat_id as requested_seat_id, seat.trip_id as seat_trip_id, claimed.*
+    FROM req
+    LEFT JOIN seat ON seat.id = req.seat_id
+    LEFT JOIN claimed ON claimed.seat_id = req.seat_id
+    ORDER BY req.ord
+""", warm=('booking',))
+GET_RESERVATION = statements.register("booking.get_reservation", """
+    SELECT id, user_id, seat_id, trip_id, first_name, last_name, national_id, gender, expires_at, status, created_at
+    FROM reservations
+    WHERE id = $1
+""")
+CANCEL_RESERVATION = statements.register("booking.cancel_reservation", """
+    UPDATE reservations
+    SET status = 'cancelled'
+    WHERE id = $1 AND status = 'held'
+    RETURNING id, user_id, seat_id, trip_id, first_name, last_name, national_id, gender, expires_at, status, created_at
+""")
+CREATE_BOOKING = statements.register("booking.create_booking", """
+    WITH booking AS (
+        INSERT INTO bookings (
+            user_id, trip_id, seat_id, first_name, last_name, 
+            national_id, gender, price_paid, status
+        )
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, 'confirmed')
+        RETURNING id, user_id, trip_id, seat_id, first_name, last_name,
+                  national_id, gender, price_paid, status, created_at, cancelled_at
+    ),
+    counted AS (
+        INSERT INTO user_daily_booking_counts (user_id, day, bookings)
+        SELECT user_id, (created_at AT TIME ZONE 'UTC')::date, 1 FROM booking
+        ON CONFLICT (user_id, day)
+        DO UPDATE SET bookings = user_daily_booking_counts.bookings + EXCLUDED.bookings
+    )
+    SELECT * FROM booking
+""")
+CONFIRM_RESERVATION = statements.register(
+    "booking.confirm_reservation",
+    "UPDATE reservations SET status = 'confirmed' WHERE id = $1"
+)
+CHECKOUT_RESERVATION = statements.register("booking.checkout_reservation", """
+    WITH res AS (
+        SELECT r.id, r.user_id, r.seat_id, r.trip_id, r.first_name, r.last_name,
+               r.national_id, r.gender, r.status, r.expires_at, s.price
+        FROM reservations r
+        LEFT JOIN seats s ON s.id = r.seat_id
+        WHERE r.id = $1
+        FOR UPDATE OF r
+    ),
+    payable AS (
+        SELECT * FROM res
+        WHERE user_id = $2
+          AND status = 'held'
+          AND expires_at > now()
+          AND price IS NOT NULL
+    ),
+    debit AS (
+        UPDATE user_wallets w
+        SET balance = w.balance - p.price, updated_at = now()
+        FROM payable p
+        WHERE w.user_id = p.user_id AND w.balance >= p.price
+        RETURNING w.user_id
+    ),
+    booking AS (
+        INSERT INTO bookings (
+            user_id, trip_id, seat_id, first_name, last_name,
+            national_id, gender, price_paid, status
+        )
+        SELECT p.user_id, p.trip_id, p.seat_id, p.first_name, p.last_name,
+               p.national_id, p.gender, p.price, 'confirmed'
+        FROM payable p
+        WHERE EXISTS (SELECT 1 FROM debit)
+        RETURNING id, user_id, trip_id, seat_id, first_name, last_name,
+                  national_id, gender, price_paid, status, created_at, cancelled_at
+    ),
+    ledger AS (
+        INSERT INTO wallet_transactions (user_id, amount, transaction_type, booking_id)
+        SELECT user_id, -price_paid, 'payment', id FROM booking
+    ),
+    counted AS (
+        INSERT INTO user_daily_booking_counts (user_id, day, bookings)
+        SELECT user_id, (created_at AT TIME ZONE 'UTC')::date, count(*) FROM booking
+        GROUP BY 1, 2
+        ON CONFLICT (user_id, day)
+        DO UPDATE SET bookings = user_daily_booking_counts.bookings + EXCLUDED.bookings
+    ),
+    confirmed AS (
+        UPDATE reservations r
+        SET status = 'confirmed'
+        FROM booking
+        WHERE r.id = $1
+    )
+    SELECT res.user_id as reservation_user_id,
+           res.status as reservation_status,
+           res.expires_at > now() as reservation_live,
+           res.price as seat_price,
+           booking.*
+    FROM (SELECT 1) one
+    LEFT JOIN res ON true
+    LEFT JOIN booking ON true
+""", warm=('booking',))
+CHECKOUT_GROUP = statements.register("booking.checkout_group", """
+    WITH res AS (
+        SELECT r.id, r.user_id, r.seat_id, r.trip_id, r.first_name, r.last_name,
+               r.national_id, r.gender, r.expires_at, s.price
+        FROM reservations r
+        JOIN seats s ON s.id = r.seat_id
+        WHERE r.group_id = $1 AND r.status = 'held'
+        FOR UPDATE OF r
+    ),
+    total AS (
+        SELECT count(*) as seats,
+               count(*) FILTER (WHERE user_id <> $2) as foreign_seats,
+               count(*) FILTER (WHERE expires_at <= now()) as expired_seats,
+               COALESCE(sum(price), 0) as amount
+        FROM res
+    ),
+    debit AS (
+        UPDATE user_wallets w
+        SET balance = w.balance - t.amount, updated_at = now()
+        FROM total t
+        WHERE w.user_id = $2
+          AND t.seats > 0
+          AND t.foreign_seats = 0
+          AND t.expired_seats = 0
+          AND w.balance >= t.amount
+        RETURNING w.user_id
+    ),
+    booking AS (
+        INSERT INTO bookings (
+            user_id, trip_id, seat_id, first_name, last_name,
+            national_id, gender, price_paid, status
+        )
+        SELECT user_id, trip_id, seat_id, first_name, last_name,
+               national_id, gender, price, 'confirmed'
+        FROM res
+        WHERE EXISTS (SELECT 1 FROM debit)
+        RETURNING id, user_id, trip_id, seat_id, first_name, last_name,
+                  national_id, gender, price_paid, status, created_at, cancelled_at
+    ),
+    ledger AS (
+        INSERT INTO wallet_transactions (user_id, amount, transaction_type, booking_id)
+        SELECT user_id, -price_paid, 'payment', id FROM booking
+    ),
+    counted AS (
+        INSERT INTO user_daily_booking_counts (user_id, day, bookings)
+        SELECT user_id, (created_at AT TIME ZONE 'UTC')::date, count(*) FROM booking
+        GROUP BY 1, 2
+        ON CONFLICT (user_id, day)
+        DO UPDATE SET bookings = user_daily_booking_counts.bookings + EXCLUDED.bookings
+    ),
+    confirmed AS (
+        UPDATE reservations r
+        SET status = 'confirmed'
+        FROM res
+        WHERE r.id = res.id AND EXISTS (SELECT 1 FROM debit)
+    )
+    SELECT t.seats, t.foreign_seats, t.expired_seats, booking.*
+    FROM total t
+    LEFT JOIN booking ON true
+    ORDER BY booking.created_at, booking.id
+""", warm=('booking',))
+GET_USER_BOOKINGS = statements.register("booking.get_user_bookings", """
+    SELECT id, user_id, trip_id, seat_id, first_name, last_name,
+           national_id, gender, price_paid, status, created_at, cancelled_at
+    FROM bookings
+    WHERE user_id = $1
+    ORDER BY created_at DESC
+    LIMIT $2
+""")
+STREAM_USER_BOOKINGS = statements.register("booking.stream_user_bookings", """
+    SELECT id, user_id, trip_id, seat_id, first_name, last_name,
+           national_id, gender, price_paid, status, created_at, cancelled_at
+    FROM bookings
+    WHERE user_id = $1
+    ORDER BY created_at DESC, id
+""")
+GET_USER_RESERVATIONS = statements.register("booking.get_user_reservations", """
+    SELECT id, user_id, seat_id, trip_id, first_name, last_name, national_id, gender, expires_at, status, created_at
+    FROM reservations
+    WHERE user_id = $1 AND status = 'held' AND expires_at > now()
+    ORDER BY created_at DESC
+""")
+CANCEL_BOOKING = statements.register("booking.cancel_booking", """
+    WITH cancelled AS (
+        UPDATE bookings
+        SET status = 'cancelled', cancelled_at = now()
+        WHERE id = $1 AND status = 'confirmed'
+        RETURNING id, user_id, trip_id, seat_id, first_name, last_name,
+                  national_id, gender, price_paid, status, created_at, cancelled_at
+    ),
+    uncounted AS (
+        UPDATE user_daily_booking_counts c
+        SET bookings = c.bookings - 1
+        FROM cancelled b
+        WHERE c.user_id = b.user_id
+          AND c.day = (b.created_at AT TIME ZONE 'UTC')::date
+          AND c.bookings > 0
+    )
+    SELECT * FROM cancelled
+""")
+GET_DAILY_BOOKING_COUNT = statements.register("booking.get_daily_booking_count", """
+    SELECT bookings
+    FROM user_daily_booking_counts
+    WHERE user_id = $1 AND day = $2
+""", warm=('booking',))
+GET_DAILY_BOOKING_COUNTS = statements.register("booking.get_daily_booking_counts", """
+    SELECT user_id, bookings
+    FROM user_daily_booking_counts
+    WHERE user_id = ANY($1::uuid[]) AND day = $2
+""", warm=('booking',))
+RESET_DAILY_BOOKING_COUNTS = statements.register(
+    "booking.reset_daily_booking_counts",
+    "UPDATE user_daily_booking_counts SET bookings = 0 WHERE day = $1 AND bookings <> 0"
+)
+RECOUNT_DAILY_BOOKING_COUNTS = statements.register("booking.recount_daily_booking_counts", """
+    INSERT INTO user_daily_booking_counts (user_id, day, bookings)
+    SELECT user_id, $1::date, count(*)
+    FROM bookings
+    WHERE status = 'confirmed'
+      AND created_at >= $1::date::timestamp AT TIME ZONE 'UTC'
+      AND created_at < ($1::date + 1)::timestamp AT TIME ZONE 'UTC'
+    GROUP BY user_id
+    ON CONFLICT (user_id, day) DO UPDATE SET bookings = EXCLUDED.bookings
+""")
+BOOKING_DATE_RANGE = statements.register("booking.booking_date_range", """
+    SELECT (min(created_at) AT TIME ZONE 'UTC')::date as first_day,
+           (max(created_at) AT TIME ZONE 'UTC')::date as last_day
+    FROM bookings
+""")
+EXPIRE_RESERVATIONS = statements.register("booking.expire_reservations", """
+    UPDATE reservations r
+    SET status = 'expired'
+    FROM (
+        SELECT id FROM reservations
+        WHERE status = 'held' AND expires_at <= now()
+        ORDER BY expires_at
+        LIMIT $1
+        FOR UPDATE SKIP LOCKED
+    ) due
+    WHERE r.id = due.id
+""")
+NEXT_RESERVATION_EXPIRY = statements.register(
+    "booking.next_reservation_expiry",
+    "SELECT min(expires_at) FROM reservations WHERE status = 'held'"
+)
+PURGE_EXPIRED_RESERVATIONS = statements.register("booking.purge_expired_reservations", """
+    DELETE FROM reservations
+    WHERE id IN (
+        SELECT id FROM reservations
+        WHERE status = 'expired'
+          AND expires_at < now() - $1::interval
+        ORDER BY expires_at
+        LIMIT $2
+    )
+""")
+EXPIRE_RESERVATION_FOR_SEAT = statements.register("booking.expire_reservation_for_seat", """
+    UPDATE reservations
+    SET status = 'expired'
+    WHERE seat_id = $1
+      AND status = 'held'
+      AND expires_at <= now()
+""")
+ACTIVE_RESERVATION_FOR_SEAT = statements.register("booking.active_reservation_for_seat", """
+    SELECT * FROM reservations 
+    WHERE seat_id = $1 
+      AND status = 'held'
+      AND expires_at > now()
+""")
+
+@instrumented
 class BookingRepository:
     @staticmethod
     async def create_reservation(
@@ -19,57 +387,130 @@ class BookingRepository:
     ) -> dict:
         """Create a reservation (with SELECT FOR UPDATE to prevent double booking)"""
         # First, lock the seat to prevent concurrent reservations
-        query_lock = """
-            SELECT id, trip_id, seat_number, price
-            FROM seats
-            WHERE id = $1
-            FOR UPDATE
-        """
-        seat = await conn.fetchrow(query_lock, seat_id)
+        seat = await LOCK_SEAT.fetchrow(conn, seat_id)
         if not seat:
             raise ValueError("Seat not found")
         
-        # Check if seat is already reserved
-        query_check = """
-            SELECT id FROM reservations
-            WHERE seat_id = $1 
-              AND status = 'held'
-              AND expires_at > now()
-        """
-        existing = await conn.fetchrow(query_check, seat_id)
+        # An expired hold no longer blocks the seat
+        await BookingRepository.expire_reservation_for_seat(conn, seat_id)
+        
+        # Check if seat is already reserved or sold
+        existing = await SEAT_HELD.fetchrow(conn, seat_id)
         if existing:
             raise ValueError("Seat is already reserved")
+        booked = await SEAT_BOOKED.fetchrow(conn, seat_id)
+        if booked:
+            raise ValueError("Seat is already reserved")
         
         # Create reservation
-        query = """
-            INSERT INTO reservations (user_id, seat_id, trip_id, first_name, last_name, national_id, gender, expires_at, status)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, 'held')
-            RETURNING id, user_id, seat_id, trip_id, first_name, last_name, national_id, gender, expires_at, status, created_at
-        """
-        row = await conn.fetchrow(query, user_id, seat_id, trip_id, first_name, last_name, national_id, gender, expires_at)
+        row = await CREATE_RESERVATION.fetchrow(conn, user_id, seat_id, trip_id, first_name, last_name, national_id, gender, expires_at)
         return dict(row)
-    
+
+    @staticmethod
+    async def claim_seat(
+        conn: asyncpg.Connection,
+        user_id: UUID,
+        seat_id: UUID,
+        trip_id: UUID,
+        first_name: str,
+        last_name: str,
+        national_id: str,
+        gender: bool,
+        expires_at: datetime
+    ) -> dict:
+        """Claim a seat in a single statement.
+
+        The partial unique index on held reservations decides concurrent claims;
+        an expired hold on the seat is taken over in the same statement.
+        """
+        row = await CLAIM_SEAT.fetchrow(conn, user_id, seat_id, trip_id, first_name, last_name, national_id, gender, expires_at)
+        if row['seat_trip_id'] is None:
+            raise ValueError("Seat not found")
+        if row['seat_trip_id'] != trip_id:
+            raise ValueError("Seat does not belong to this trip")
+        if row['id'] is None:
+            raise ValueError("Seat is already reserved")
+        reservation = dict(row)
+        del reservation['seat_trip_id']
+        return reservation
+
+    @staticmethod
+    async def claim_seats(
+        conn: asyncpg.Connection,
+        user_id: UUID,
+        trip_id: UUID,
+        passengers: List[SeatPassenger],
+        expires_at: datetime,
+        group_id: UUID
+    ) -> List[dict]:
+        """Claim several seats of one trip for one user.
+
+        Raises on the first seat (in request order) that could not be claimed;
+        run it inside a transaction so a partial claim is rolled back.
+        """
+        rows = await BookingRepository.claim_seats_batch(
+            conn,
+            [user_id] * len(passengers),
+            [trip_id] * len(passengers),
+            passengers,
+            expires_at,
+            group_id
+        )
+        reservations = []
+        for row in rows:
+            seat_id = row.pop('requested_seat_id')
+            seat_trip_id = row.pop('seat_trip_id')
+            if seat_trip_id is None:
+                raise ValueError(f"Seat {seat_id} not found")
+            if seat_trip_id != trip_id:
+                raise ValueError(f"Seat {seat_id} does not belong to this trip")
+            if row['id'] is None:
+                raise ValueError(f"Seat {seat_id} is already reserved")
+            reservations.append(row)
+        return reservations
+
+    @staticmethod
+    async def claim_seats_batch(
+        conn: asyncpg.Connection,
+        user_ids: List[UUID],
+        trip_ids: List[UUID],
+        passengers: List[SeatPassenger],
+        expires_at: datetime,
+        group_id: Optional[UUID] = None
+    ) -> List[dict]:
+        """Claim many seats, possibly for different users and trips, in a single statement.
+
+        Entries are matched by position and their seat ids must be distinct.
+        Returns one row per entry, in order, with `requested_seat_id`, the
+        seat's actual `seat_trip_id` (None if the seat does not exist) and the
+        reservation columns, which are None when the seat could not be claimed.
+        Run it inside a transaction: the seat locks are held until it ends.
+        """
+        await LOCK_SEATS.fetch(conn, [p.seat_id for p in passengers])
+        rows = await CLAIM_SEATS_BATCH.fetch(
+            conn,
+            user_ids,
+            trip_ids,
+            [p.seat_id for p in passengers],
+            [p.first_name for p in passengers],
+            [p.last_name for p in passengers],
+            [p.national_id for p in passengers],
+            [p.gender for p in passengers],
+            expires_at,
+            group_id
+        )
+        return [dict(row) for row in rows]
+
     @staticmethod
     async def get_reservation(conn: asyncpg.Connection, reservation_id: UUID) -> Optional[dict]:
         """Get reservation by ID"""
-        query = """
-            SELECT id, user_id, seat_id, trip_id, first_name, last_name, national_id, gender, expires_at, status, created_at
-            FROM reservations
-            WHERE id = $1
-        """
-        row = await conn.fetchrow(query, reservation_id)
+        row = await GET_RESERVATION.fetchrow(conn, reservation_id)
         return dict(row) if row else None
     
     @staticmethod
     async def cancel_reservation(conn: asyncpg.Connection, reservation_id: UUID) -> dict:
         """Cancel a reservation"""
-        query = """
-            UPDATE reservations
-            SET status = 'cancelled'
-            WHERE id = $1 AND status = 'held'
-            RETURNING id, user_id, seat_id, trip_id, first_name, last_name, national_id, gender, expires_at, status, created_at
-        """
-        row = await conn.fetchrow(query, reservation_id)
+        row = await CANCEL_RESERVATION.fetchrow(conn, reservation_id)
         if not row:
             raise ValueError("Reservation not found or already processed")
         return dict(row)
@@ -93,121 +534,185 @@ class BookingRepository:
             raise ValueError("Reservation has expired")
         
         # Create booking
-        query = """
-            INSERT INTO bookings (
-                user_id, trip_id, seat_id, first_name, last_name, 
-                national_id, gender, price_paid, status
+        try:
+            row = await CREATE_BOOKING.fetchrow(
+                conn,
+                reservation['user_id'],
+                reservation['trip_id'],
+                reservation['seat_id'],
+                reservation['first_name'],
+                reservation['last_name'],
+                reservation['national_id'],
+                reservation['gender'],
+                price_paid
             )
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, 'confirmed')
-            RETURNING id, user_id, trip_id, seat_id, first_name, last_name,
-                      national_id, gender, price_paid, status, created_at, cancelled_at
-        """
-        row = await conn.fetchrow(
-            query,
-            reservation['user_id'],
-            reservation['trip_id'],
-            reservation['seat_id'],
-            reservation['first_name'],
-            reservation['last_name'],
-            reservation['national_id'],
-            reservation['gender'],
-            price_paid
-        )
+        except asyncpg.UniqueViolationError as e:
+            if e.constraint_name != CONFIRMED_SEAT_INDEX:
+                raise
+            raise ValueError("Seat is already booked")
         
         # Update reservation status
-        await conn.execute(
-            "UPDATE reservations SET status = 'confirmed' WHERE id = $1",
-            reservation_id
-        )
+        await CONFIRM_RESERVATION.execute(conn, reservation_id)
         
         return dict(row)
-    
+
+    @staticmethod
+    async def checkout_reservation(
+        conn: asyncpg.Connection,
+        user_id: UUID,
+        reservation_id: UUID
+    ) -> dict:
+        """Pay for a held reservation in a single statement.
+
+        Locks the reservation, debits the wallet if the balance covers the seat
+        price, writes the ledger entry and the booking and confirms the
+        reservation. Nothing is written when any check fails.
+        """
+        try:
+            row = await CHECKOUT_RESERVATION.fetchrow(conn, reservation_id, user_id)
+        except asyncpg.UniqueViolationError as e:
+            if e.constraint_name != CONFIRMED_SEAT_INDEX:
+                raise
+            raise ValueError("Seat is already booked")
+        if row['reservation_user_id'] is None:
+            raise ValueError("Reservation not found")
+        if row['reservation_user_id'] != user_id:
+            raise ValueError("Reservation does not belong to this user")
+        if row['reservation_status'] != 'held':
+            raise ValueError("Reservation is not in held status")
+        if not row['reservation_live']:
+            raise ValueError("Reservation has expired")
+        if row['seat_price'] is None:
+            raise ValueError("Seat not found")
+        if row['id'] is None:
+            raise ValueError("Insufficient wallet balance")
+        booking = dict(row)
+        for key in ('reservation_user_id', 'reservation_status', 'reservation_live', 'seat_price'):
+            del booking[key]
+        return booking
+
+    @staticmethod
+    async def checkout_group(
+        conn: asyncpg.Connection,
+        user_id: UUID,
+        group_id: UUID
+    ) -> List[dict]:
+        """Pay for all held reservations of a group in a single statement.
+
+        One wallet debit covers the whole group; every booking gets its own
+        ledger entry. Nothing is written when any reservation fails a check.
+        """
+        try:
+            rows = await CHECKOUT_GROUP.fetch(conn, group_id, user_id)
+        except asyncpg.UniqueViolationError as e:
+            if e.constraint_name != CONFIRMED_SEAT_INDEX:
+                raise
+            raise ValueError("Seat is already booked")
+        summary = rows[0]
+        if summary['seats'] == 0:
+            raise ValueError("Reservation not found")
+        if summary['foreign_seats'] > 0:
+            raise ValueError("Reservation does not belong to this user")
+        if summary['expired_seats'] > 0:
+            raise ValueError("Reservation has expired")
+        if summary['id'] is None:
+            raise ValueError("Insufficient wallet balance")
+        bookings = []
+        for row in rows:
+            booking = dict(row)
+            del booking['seats'], booking['foreign_seats'], booking['expired_seats']
+            bookings.append(booking)
+        return bookings
+
     @staticmethod
     async def get_user_bookings(conn: asyncpg.Connection, user_id: UUID, limit: int = 50) -> List[dict]:
         """Get user's bookings"""
-        query = """
-            SELECT id, user_id, trip_id, seat_id, first_name, last_name,
-                   national_id, gender, price_paid, status, created_at, cancelled_at
-            FROM bookings
-            WHERE user_id = $1
-            ORDER BY created_at DESC
-            LIMIT $2
-        """
-        rows = await conn.fetch(query, user_id, limit)
+        rows = await GET_USER_BOOKINGS.fetch(conn, user_id, limit)
         return [dict(row) for row in rows]
     
+    @staticmethod
+    async def stream_user_bookings(
+        conn: asyncpg.Connection,
+        user_id: UUID,
+        prefetch: int = 500
+    ) -> AsyncIterator[dict]:
+        """Stream all of a user's bookings, newest first (needs a transaction)"""
+        async for row in STREAM_USER_BOOKINGS.cursor(conn, user_id, prefetch=prefetch):
+            yield dict(row)
+    
     @staticmethod
     async def get_user_reservations(conn: asyncpg.Connection, user_id: UUID) -> List[dict]:
         """Get user's active reservations"""
-        query = """
-            SELECT id, user_id, seat_id, trip_id, first_name, last_name, national_id, gender, expires_at, status, created_at
-            FROM reservations
-            WHERE user_id = $1 AND status = 'held' AND expires_at > now()
-            ORDER BY created_at DESC
-        """
-        rows = await conn.fetch(query, user_id)
+        rows = await GET_USER_RESERVATIONS.fetch(conn, user_id)
         return [dict(row) for row in rows]
     
     @staticmethod
     async def cancel_booking(conn: asyncpg.Connection, booking_id: UUID) -> dict:
         """Cancel a booking"""
-        query = """
-            UPDATE bookings
-            SET status = 'cancelled', cancelled_at = now()
-            WHERE id = $1 AND status = 'confirmed'
-            RETURNING id, user_id, trip_id, seat_id, first_name, last_name,
-                      national_id, gender, price_paid, status, created_at, cancelled_at
-        """
-        row = await conn.fetchrow(query, booking_id)
+        row = await CANCEL_BOOKING.fetchrow(conn, booking_id)
         if not row:
             raise ValueError("Booking not found or already cancelled")
         return dict(row)
     
     @staticmethod
-    async def get_daily_booking_count(conn: asyncpg.Connection, user_id: UUID, date: datetime) -> int:
-        """Get count of confirmed bookings for user on a specific date"""
-        query = """
-            SELECT COUNT(*) as count
-            FROM bookings
-            WHERE user_id = $1
-              AND status = 'confirmed'
-              AND DATE(created_at) = DATE($2)
-        """
-        count = await conn.fetchval(query, user_id, date)
+    async def get_daily_booking_count(conn: asyncpg.Connection, user_id: UUID, day: date) -> int:
+        """Get count of confirmed bookings for user on a specific (UTC) day"""
+        count = await GET_DAILY_BOOKING_COUNT.fetchval(conn, user_id, day)
         return count or 0
     
     @staticmethod
-    async def expire_reservations(conn: asyncpg.Connection) -> int:
-        """Expire old reservations"""
-        query = """
-            UPDATE reservations
-            SET status = 'expired'
-            WHERE status = 'held' AND expires_at < now()
+    async def get_daily_booking_counts(conn: asyncpg.Connection, user_ids: List[UUID], day: date) -> dict:
+        """Get count of confirmed bookings on a specific (UTC) day for several users"""
+        rows = await GET_DAILY_BOOKING_COUNTS.fetch(conn, user_ids, day)
+        return {row['user_id']: row['bookings'] for row in rows}
+    
+    @staticmethod
+    async def rebuild_daily_booking_counts(conn: asyncpg.Connection, day: date) -> int:
+        """Recompute the daily booking counters of one (UTC) day from the bookings table"""
+        async with conn.transaction():
+            # Keep bookings from changing so the recount cannot race the counter updates
+            await LOCK_BOOKINGS.execute(conn)
+            await RESET_DAILY_BOOKING_COUNTS.execute(conn, day)
+            result = await RECOUNT_DAILY_BOOKING_COUNTS.execute(conn, day)
+        return int(result.split()[-1]) if result else 0
+    
+    @staticmethod
+    async def get_booking_date_range(conn: asyncpg.Connection) -> Optional[dict]:
+        """Get the first and last (UTC) day that has bookings"""
+        row = await BOOKING_DATE_RANGE.fetchrow(conn)
+        return dict(row) if row['first_day'] else None
+    
+    @staticmethod
+    async def expire_reservations(conn: asyncpg.Connection, limit: int) -> int:
+        """Expire up to `limit` overdue reservations, oldest first.
+
+        Rows locked by a concurrent claim or payment are skipped; they are
+        resolved by that transaction or picked up by the next batch.
         """
-        result = await conn.execute(query)
+        result = await EXPIRE_RESERVATIONS.execute(conn, limit)
         return int(result.split()[-1]) if result else 0
 
     @staticmethod
-    async def cleanup_expired_reservations(conn: asyncpg.Connection):
-        await conn.execute("""
-            DELETE FROM reservations 
-            WHERE expires_at < NOW() AT TIME ZONE 'utc'
-        """)
+    async def get_next_reservation_expiry(conn: asyncpg.Connection) -> Optional[datetime]:
+        """Get the earliest expiry among held reservations"""
+        return await NEXT_RESERVATION_EXPIRY.fetchval(conn)
+
+    @staticmethod
+    async def purge_expired_reservations(
+        conn: asyncpg.Connection,
+        older_than: timedelta,
+        limit: int
+    ) -> int:
+        """Delete up to `limit` expired reservations that expired more than `older_than` ago"""
+        result = await PURGE_EXPIRED_RESERVATIONS.execute(conn, older_than, limit)
+        return int(result.split()[-1]) if result else 0
 
-    # یا فقط برای یه صندلی خاص (سریع‌تر و بهتر)
     @staticmethod
-    async def delete_expired_reservation_for_seat(conn: asyncpg.Connection, seat_id: UUID):
-        await conn.execute("""
-            DELETE FROM reservations 
-            WHERE seat_id = $1 
-              AND expires_at < NOW() AT TIME ZONE 'utc'
-        """, seat_id)
+    async def expire_reservation_for_seat(conn: asyncpg.Connection, seat_id: UUID):
+        """Mark an expired hold on one seat as expired so the seat can be held again"""
+        await EXPIRE_RESERVATION_FOR_SEAT.execute(conn, seat_id)
 
-# چک کردن رزرو فعال
     @staticmethod
     async def get_active_reservation_for_seat(conn: asyncpg.Connection, seat_id: UUID):
-        return await conn.fetchrow("""
-            SELECT * FROM reservations 
-            WHERE seat_id = $1 
-              AND expires_at > NOW() AT TIME ZONE 'utc'
-        """, seat_id)   
\ No newline at end of file
+        """Get the live (held, unexpired) reservation of a seat"""
+        return await ACTIVE_RESERVATION_FOR_SEAT.fetchrow(conn, seat_id)
@@ -1,20 +1,51 @@
 import asyncpg
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 from uuid import UUID
+from app.core.statements import statements
 from app.models.bus import BusCreate
+from app.repositories.instrumentation import instrumented
 
+CREATE_BUS = statements.register("bus.create", """
+    INSERT INTO buses (plate_number, capacity, route_id, owner_id)
+    VALUES ($1, $2, $3, $4)
+    RETURNING id, plate_number, capacity, route_id, owner_id, created_at
+""")
+ADD_DRIVER = statements.register("bus.add_driver", """
+    INSERT INTO bus_drivers (bus_id, driver_id, is_active)
+    VALUES ($1, $2, true)
+    ON CONFLICT (bus_id, driver_id) DO UPDATE SET is_active = true
+    RETURNING id, bus_id, driver_id, is_active, created_at
+""")
+GET_BY_ID = statements.register("bus.get_by_id", """
+    SELECT b.id, b.plate_number, b.capacity, b.route_id, b.owner_id, b.created_at,
+           r.origin, r.destination
+    FROM buses b
+    JOIN routes r ON b.route_id = r.id
+    WHERE b.id = $1
+""")
+GET_BUS_DRIVERS = statements.register("bus.get_bus_drivers", """
+    SELECT bd.id, bd.bus_id, bd.driver_id, bd.is_active, bd.created_at,
+           u.mobile as driver_mobile
+    FROM bus_drivers bd
+    JOIN users u ON bd.driver_id = u.id
+    WHERE bd.bus_id = $1 AND bd.is_active = true
+""")
+GET_ALL = statements.register("bus.get_all", """
+    SELECT * FROM buses
+""")
+STREAM_ALL = statements.register("bus.stream_all", """
+    SELECT * FROM buses
+    ORDER BY created_at, id
+""")
 
+
+@instrumented
 class BusRepository:
     @staticmethod
     async def create(conn: asyncpg.Connection, bus_data: BusCreate) -> dict:
         """Create a new bus"""
-        query = """
-            INSERT INTO buses (plate_number, capacity, route_id, owner_id)
-            VALUES ($1, $2, $3, $4)
-            RETURNING id, plate_number, capacity, route_id, owner_id, created_at
-        """
-        row = await conn.fetchrow(
-            query,
+        row = await CREATE_BUS.fetchrow(
+            conn,
             bus_data.plate_number,
             bus_data.capacity,
             bus_data.route_id,
@@ -32,46 +63,29 @@ class BusRepository:
     @staticmethod
     async def add_driver(conn: asyncpg.Connection, bus_id: UUID, driver_id: UUID) -> dict:
         """Add driver to bus"""
-        query = """
-            INSERT INTO bus_drivers (bus_id, driver_id, is_active)
-            VALUES ($1, $2, true)
-            ON CONFLICT (bus_id, driver_id) DO UPDATE SET is_active = true
-            RETURNING id, bus_id, driver_id, is_active, created_at
-        """
-        row = await conn.fetchrow(query, bus_id, driver_id)
+        row = await ADD_DRIVER.fetchrow(conn, bus_id, driver_id)
         return dict(row)
     
     @staticmethod
     async def get_by_id(conn: asyncpg.Connection, bus_id: UUID) -> Optional[dict]:
         """Get bus by ID"""
-        query = """
-            SELECT b.id, b.plate_number, b.capacity, b.route_id, b.owner_id, b.created_at,
-                   r.origin, r.destination
-            FROM buses b
-            JOIN routes r ON b.route_id = r.id
-            WHERE b.id = $1
-        """
-        row = await conn.fetchrow(query, bus_id)
+        row = await GET_BY_ID.fetchrow(conn, bus_id)
         return dict(row) if row else None
     
     @staticmethod
     async def get_bus_drivers(conn: asyncpg.Connection, bus_id: UUID) -> List[dict]:
         """Get all drivers for a bus"""
-        query = """
-            SELECT bd.id, bd.bus_id, bd.driver_id, bd.is_active, bd.created_at,
-                   u.mobile as driver_mobile
-            FROM bus_drivers bd
-            JOIN users u ON bd.driver_id = u.id
-            WHERE bd.bus_id = $1 AND bd.is_active = true
-        """
-        rows = await conn.fetch(query, bus_id)
+        rows = await GET_BUS_DRIVERS.fetch(conn, bus_id)
         return [dict(row) for row in rows]
 
     @staticmethod
     async def get_bus(conn: asyncpg.Connection) -> List[dict]:
         """Get all drivers for a bus"""
-        query = """
-            SELECT * FROM buses
-        """
-        rows = await conn.fetch(query)
+        rows = await GET_ALL.fetch(conn)
         return [dict(row) for row in rows]
+
+    @staticmethod
+    async def stream_buses(conn: asyncpg.Connection, prefetch: int = 500) -> AsyncIterator[dict]:
+        """Stream all buses (needs a transaction)"""
+        async for row in STREAM_ALL.cursor(conn, prefetch=prefetch):
+            yield dict(row)
@@ -0,0 +1,83 @@
+import functools
+import inspect
+import time
+from app.core.metrics import Counter, Histogram
+
+query_duration = Histogram(
+    "db_query_duration_seconds",
+    "Latency of repository calls (streams: until exhausted or closed)",
+    ["query"]
+)
+query_rows = Counter(
+    "db_query_rows_total",
+    "Rows returned by repository calls (affected, for writes that return a row count)",
+    ["query"]
+)
+query_errors = Counter(
+    "db_query_errors_total",
+    "Repository calls that failed, by exception type (business-rule ValueErrors excluded)",
+    ["query", "error"]
+)
+
+
+def _row_count(result) -> int:
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, int) and not isinstance(result, bool):
+        return result
+    return 1
+
+
+def _timed_call(fn, name: str):
+    @functools.wraps(fn)
+    async def call(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = await fn(*args, **kwargs)
+        except ValueError:
+            raise
+        except Exception as e:
+            query_errors.inc(query=name, error=type(e).__name__)
+            raise
+        finally:
+            query_duration.observe(time.perf_counter() - started, query=name)
+        query_rows.inc(_row_count(result), query=name)
+        return result
+    return call
+
+
+def _timed_stream(fn, name: str):
+    @functools.wraps(fn)
+    async def stream(*args, **kwargs):
+        started = time.perf_counter()
+        rows = 0
+        try:
+            async for row in fn(*args, **kwargs):
+                rows += 1
+                yield row
+        except ValueError:
+            raise
+        except Exception as e:
+            query_errors.inc(query=name, error=type(e).__name__)
+            raise
+        finally:
+            query_duration.observe(time.perf_counter() - started, query=name)
+            query_rows.inc(rows, query=name)
+    return stream
+
+
+def instrumented(cls):
+    """Class decorator recording latency, rows and errors of a repository's public methods,
+    labelled `Class.method`"""
+    for attr, value in list(vars(cls).items()):
+        if attr.startswith("_") or not isinstance(value, staticmethod):
+            continue
+        fn = value.__func__
+        name = f"{cls.__name__}.{attr}"
+        if inspect.isasyncgenfunction(fn):
+            setattr(cls, attr, staticmethod(_timed_stream(fn, name)))
+        elif inspect.iscoroutinefunction(fn):
+            setattr(cls, attr, staticmethod(_timed_call(fn, name)))
+    return cls
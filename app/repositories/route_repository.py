@@ -1,20 +1,33 @@
 import asyncpg
 from typing import Optional
 from uuid import UUID
+from app.core.statements import statements
 from app.models.route import RouteCreate
+from app.repositories.instrumentation import instrumented
 
+CREATE_ROUTE = statements.register("route.create", """
+    INSERT INTO routes (origin, destination, distance_km)
+    VALUES ($1, $2, $3)
+    RETURNING id, origin, destination, distance_km, created_at
+""")
+GET_BY_ID = statements.register(
+    "route.get_by_id",
+    "SELECT id, origin, destination, distance_km, created_at FROM routes WHERE id = $1"
+)
+GET_ALL = statements.register("route.get_all", """
+    SELECT id, origin, destination, distance_km, created_at
+    FROM routes
+    ORDER BY created_at DESC
+""")
 
+
+@instrumented
 class RouteRepository:
     @staticmethod
     async def create(conn: asyncpg.Connection, route_data: RouteCreate) -> dict:
         """Create a new route"""
-        query = """
-            INSERT INTO routes (origin, destination, distance_km)
-            VALUES ($1, $2, $3)
-            RETURNING id, origin, destination, distance_km, created_at
-        """
-        row = await conn.fetchrow(
-            query,
+        row = await CREATE_ROUTE.fetchrow(
+            conn,
             route_data.origin,
             route_data.destination,
             route_data.distance_km
@@ -24,17 +37,11 @@ class RouteRepository:
     @staticmethod
     async def get_by_id(conn: asyncpg.Connection, route_id: UUID) -> Optional[dict]:
         """Get route by ID"""
-        query = "SELECT id, origin, destination, distance_km, created_at FROM routes WHERE id = $1"
-        row = await conn.fetchrow(query, route_id)
+        row = await GET_BY_ID.fetchrow(conn, route_id)
         return dict(row) if row else None
 
 
     @staticmethod
     async def get_all(conn: asyncpg.Connection) -> list[dict]:
-        query = """
-            SELECT id, origin, destination, distance_km, created_at
-            FROM routes
-            ORDER BY created_at DESC
-        """
-        rows = await conn.fetch(query)
+        rows = await GET_ALL.fetch(conn)
         return [dict(row) for row in rows]  
\ No newline at end of file
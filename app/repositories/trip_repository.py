@@ -1,44 +1,209 @@
 import asyncpg
-from typing import Optional, List
+from typing import AsyncIterator, Optional, List, Tuple
 from uuid import UUID
 from datetime import datetime
+from app.core.statements import statements
+from app.repositories.instrumentation import instrumented
 
+CREATE_TRIP = statements.register("trip.create", """
+    INSERT INTO trips (bus_id, departure_time, arrival_time, status)
+    VALUES ($1, $2, $3, $4)
+    RETURNING id, bus_id, departure_time, arrival_time, status, created_at
+""")
+GET_BY_ID = statements.register("trip.get_by_id", """
+    SELECT t.id, t.bus_id, t.departure_time, t.arrival_time, t.status, t.created_at,
+           b.plate_number, b.capacity, r.origin, r.destination
+    FROM trips t
+    JOIN buses b ON t.bus_id = b.id
+    JOIN routes r ON b.route_id = r.id
+    WHERE t.id = $1
+""")
+TRIP_INVENTORY_MISMATCHES = statements.register("trip.trip_inventory_mismatches", """
+    WITH source AS (
+        SELECT * FROM trip_inventory_source(ARRAY(SELECT id FROM trips))
+    ),
+    stored AS (
+        SELECT trip_id, departure_time, active, seats, held_seats, booked_seats,
+               free_seats, min_price, max_price
+        FROM trip_inventory
+    )
+    SELECT
+        coalesce(source.trip_id, stored.trip_id) as trip_id,
+        to_jsonb(stored) - 'trip_id' as stored,
+        to_jsonb(source) - 'trip_id' as expected
+    FROM source
+    FULL JOIN stored ON stored.trip_id = source.trip_id
+    WHERE stored IS DISTINCT FROM source
+      -- Trips with queued changes are caught up by the trip inventory task
+      AND coalesce(source.trip_id, stored.trip_id) NOT IN (SELECT trip_id FROM trip_inventory_changes)
+""")
+ACTIVE_SEAT_STATES = statements.register("trip.active_seat_states", """
+    SELECT
+        t.id as trip_id,
+        t.bus_id,
+        b.plate_number,
+        t.departure_time,
+        t.arrival_time,
+        r.origin,
+        r.destination,
+        s.id as seat_id,
+        s.seat_number,
+        s.price,
+        bk.seat_id IS NOT NULL as booked,
+        res.expires_at as held_until,
+        t.flash_sale,
+        b.route_id
+    FROM trips t
+    JOIN buses b ON t.bus_id = b.id
+    JOIN routes r ON b.route_id = r.id
+    JOIN seats s ON s.trip_id = t.id
+    LEFT JOIN (
+        SELECT DISTINCT seat_id FROM bookings WHERE status = 'confirmed'
+    ) bk ON bk.seat_id = s.id
+    LEFT JOIN (
+        SELECT seat_id, MAX(expires_at) as expires_at
+        FROM reservations
+        WHERE status = 'held' AND expires_at > now()
+        GROUP BY seat_id
+    ) res ON res.seat_id = s.id
+    WHERE t.status = 'active'
+      AND t.departure_time > now()
+    ORDER BY t.id, s.seat_number
+""")
+TRIP_SEAT_STATES = statements.register("trip.trip_seat_states", """
+    SELECT
+        t.id as trip_id,
+        t.bus_id,
+        b.plate_number,
+        t.departure_time,
+        t.arrival_time,
+        r.origin,
+        r.destination,
+        s.id as seat_id,
+        s.seat_number,
+        s.price,
+        EXISTS (
+            SELECT 1 FROM bookings bk
+            WHERE bk.seat_id = s.id AND bk.status = 'confirmed'
+        ) as booked,
+        EXISTS (
+            SELECT 1 FROM reservations res
+            WHERE res.seat_id = s.id AND res.status = 'held' AND res.expires_at > now()
+        ) as held
+    FROM trips t
+    JOIN buses b ON t.bus_id = b.id
+    JOIN routes r ON b.route_id = r.id
+    JOIN seats s ON s.trip_id = t.id
+    WHERE t.id = $1
+    ORDER BY s.seat_number
+""", warm=('read',))
+SET_FLASH_SALE = statements.register("trip.set_flash_sale", """
+    UPDATE trips SET flash_sale = $2
+    WHERE id = $1
+    RETURNING id as trip_id, flash_sale
+""")
+GET_SEAT = statements.register("trip.get_seat", """
+    SELECT s.id, s.trip_id, s.seat_number, s.price,
+           t.departure_time, t.arrival_time
+    FROM seats s
+    JOIN trips t ON s.trip_id = t.id
+    WHERE s.id = $1
+""")
+ALL_TRIP_IDS = statements.register("trip.all_trip_ids", "SELECT id FROM trips")
+REFRESH_TRIP_INVENTORY = statements.register(
+    "trip.refresh_trip_inventory",
+    "SELECT refresh_trip_inventory($1::uuid[])"
+)
+DRAIN_TRIP_INVENTORY_CHANGES = statements.register(
+    "trip.drain_trip_inventory_changes",
+    "SELECT drain_trip_inventory_changes($1)"
+)
 
+
+def _available_summaries_sql(by_route: bool, sort_by: Optional[str], paged: bool) -> str:
+    """Available-trip summaries query; params are the window, route ids, the `after` key and the limit"""
+    conditions = []
+    params = 2
+    
+    if by_route:
+        params += 1
+        conditions.append(f"b.route_id = ANY(${params}::uuid[])")
+    
+    if sort_by == "price_asc":
+        sort_key = ["min_price", "departure_time", "trip_id"]
+    elif sort_by == "price_desc":
+        sort_key = ["-max_price", "departure_time", "trip_id"]
+    else:
+        sort_key = ["departure_time", "trip_id"]
+    
+    page_condition = ""
+    if paged:
+        placeholders = [f"${params + i + 1}" for i in range(len(sort_key))]
+        params += len(sort_key)
+        page_condition = f"WHERE ({', '.join(sort_key)}) > ({', '.join(placeholders)})"
+    
+    return f"""
+        WITH summary AS (
+            SELECT
+                i.trip_id,
+                t.bus_id,
+                b.plate_number,
+                i.departure_time,
+                t.arrival_time,
+                r.origin,
+                r.destination,
+                i.free_seats,
+                i.min_price,
+                i.max_price
+            FROM trip_inventory i
+            JOIN trips t ON t.id = i.trip_id
+            JOIN buses b ON t.bus_id = b.id
+            JOIN routes r ON b.route_id = r.id
+            WHERE i.active
+              AND i.free_seats > 0
+              AND i.departure_time >= $1
+              AND i.departure_time < $2
+              AND i.departure_time > now()
+              {"".join(" AND " + c for c in conditions)}
+        )
+        SELECT * FROM summary
+        {page_condition}
+        ORDER BY {', '.join(sort_key)}
+        LIMIT ${params + 1}
+    """
+
+
+# First pages of the default (departure time) ordering, the common searches
+for _by_route in (False, True):
+    statements.register(
+        "trip.available_summaries",
+        _available_summaries_sql(_by_route, None, False),
+        warm=("read",)
+    )
+
+
+@instrumented
 class TripRepository:
     @staticmethod
     async def create(conn: asyncpg.Connection, bus_id: UUID, departure_time: datetime, 
                      arrival_time: datetime, status: str = "active") -> dict:
         """Create a new trip"""
-        query = """
-            INSERT INTO trips (bus_id, departure_time, arrival_time, status)
-            VALUES ($1, $2, $3, $4)
-            RETURNING id, bus_id, departure_time, arrival_time, status, created_at
-        """
-        row = await conn.fetchrow(query, bus_id, departure_time, arrival_time, status)
+        row = await CREATE_TRIP.fetchrow(conn, bus_id, departure_time, arrival_time, status)
         return dict(row)
     
     @staticmethod
     async def get_by_id(conn: asyncpg.Connection, trip_id: UUID) -> Optional[dict]:
         """Get trip by ID"""
-        query = """
-            SELECT t.id, t.bus_id, t.departure_time, t.arrival_time, t.status, t.created_at,
-                   b.plate_number, b.capacity, r.origin, r.destination
-            FROM trips t
-            JOIN buses b ON t.bus_id = b.id
-            JOIN routes r ON b.route_id = r.id
-            WHERE t.id = $1
-        """
-        row = await conn.fetchrow(query, trip_id)
+        row = await GET_BY_ID.fetchrow(conn, trip_id)
         return dict(row) if row else None
     
     @staticmethod
-    async def get_available_trips(
-        conn: asyncpg.Connection,
-        origin: Optional[str] = None,
-        destination: Optional[str] = None,
-        sort_by: Optional[str] = None
-    ) -> List[dict]:
-        """Get available trips with available seats"""
+    def _available_seats_query(
+        departure_from: datetime,
+        departure_to: datetime,
+        route_ids: Optional[List[UUID]] = None
+    ) -> Tuple[str, list]:
+        """Query (without ORDER BY) and params for free seats of trips departing in the window"""
         base_query = """
             SELECT DISTINCT
                 t.id as trip_id,
@@ -59,28 +224,35 @@ class TripRepository:
                 AND res.status = 'held' 
                 AND res.expires_at > now()
             WHERE t.status = 'active'
+              AND t.departure_time >= $1
+              AND t.departure_time < $2
+              AND t.departure_time > now()
               AND res.id IS NULL
               AND s.id NOT IN (
                   SELECT seat_id FROM bookings WHERE status = 'confirmed'
               )
         """
         
-        conditions = []
-        params = []
-        param_count = 0
+        params = [departure_from, departure_to]
         
-        if origin:
-            param_count += 1
-            conditions.append(f"r.origin ILIKE ${param_count}")
-            params.append(f"%{origin}%")
+        if route_ids is not None:
+            params.append(route_ids)
+            base_query += " AND b.route_id = ANY($3::uuid[])"
         
-        if destination:
-            param_count += 1
-            conditions.append(f"r.destination ILIKE ${param_count}")
-            params.append(f"%{destination}%")
-        
-        if conditions:
-            base_query += " AND " + " AND ".join(conditions)
+        return base_query, params
+    
+    @staticmethod
+    async def get_available_trips(
+        conn: asyncpg.Connection,
+        departure_from: datetime,
+        departure_to: datetime,
+        route_ids: Optional[List[UUID]] = None,
+        sort_by: Optional[str] = None
+    ) -> List[dict]:
+        """Get available trips departing in [departure_from, departure_to) with available seats"""
+        base_query, params = TripRepository._available_seats_query(
+            departure_from, departure_to, route_ids
+        )
         
         if sort_by == "price_asc":
             base_query += " ORDER BY s.price ASC, t.departure_time ASC"
@@ -89,19 +261,98 @@ class TripRepository:
         else:
             base_query += " ORDER BY t.departure_time ASC, s.price ASC"
         
-        rows = await conn.fetch(base_query, *params)
+        rows = await statements.register("trip.available_seats", base_query).fetch(conn, *params)
         return [dict(row) for row in rows]
     
+    @staticmethod
+    async def stream_available_seats(
+        conn: asyncpg.Connection,
+        departure_from: datetime,
+        departure_to: datetime,
+        route_ids: Optional[List[UUID]] = None,
+        prefetch: int = 500
+    ) -> AsyncIterator[dict]:
+        """Stream free seats of trips departing in the window, grouped by trip (needs a transaction)"""
+        base_query, params = TripRepository._available_seats_query(
+            departure_from, departure_to, route_ids
+        )
+        base_query += " ORDER BY t.departure_time ASC, t.id ASC, s.price ASC, s.seat_number ASC"
+        
+        seats = statements.register("trip.stream_available_seats", base_query)
+        async for row in seats.cursor(conn, *params, prefetch=prefetch):
+            yield dict(row)
+    
+    @staticmethod
+    async def get_available_trip_summaries(
+        conn: asyncpg.Connection,
+        departure_from: datetime,
+        departure_to: datetime,
+        route_ids: Optional[List[UUID]] = None,
+        sort_by: Optional[str] = None,
+        after: Optional[list] = None,
+        limit: int = 20
+    ) -> List[dict]:
+        """Get a page of available trips with free-seat count and price range.
+
+        Read from the trip_inventory summary table. Trips are ordered by
+        (departure_time, trip_id), or by the cheapest (price_asc) or dearest
+        (price_desc) free seat first; `after` is the sort key of the last trip
+        of the previous page.
+        """
+        params = [departure_from, departure_to]
+        if route_ids is not None:
+            params.append(route_ids)
+        if after:
+            params.extend(after)
+        params.append(limit)
+        query = statements.register(
+            "trip.available_summaries",
+            _available_summaries_sql(route_ids is not None, sort_by, bool(after))
+        )
+        rows = await query.fetch(conn, *params)
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    async def get_trip_inventory_mismatches(conn: asyncpg.Connection) -> List[dict]:
+        """Get trips whose trip_inventory row differs from a recount of the source tables"""
+        rows = await TRIP_INVENTORY_MISMATCHES.fetch(conn)
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    async def rebuild_trip_inventory(conn: asyncpg.Connection, trip_ids: Optional[List[UUID]] = None) -> int:
+        """Recompute trip_inventory rows from the source tables (all trips when trip_ids is None)"""
+        async with conn.transaction():
+            if trip_ids is None:
+                trip_ids = [row['id'] for row in await ALL_TRIP_IDS.fetch(conn)]
+            await REFRESH_TRIP_INVENTORY.execute(conn, trip_ids)
+        return len(trip_ids)
+
+    @staticmethod
+    async def drain_trip_inventory_changes(conn: asyncpg.Connection, batch_size: int) -> int:
+        """Recount the trips of up to batch_size queued inventory changes; returns the changes drained"""
+        return await DRAIN_TRIP_INVENTORY_CHANGES.fetchval(conn, batch_size)
+
+    @staticmethod
+    async def get_active_seat_states(conn: asyncpg.Connection) -> List[dict]:
+        """Get every seat of every active, not yet departed trip with its current booked/held state"""
+        rows = await ACTIVE_SEAT_STATES.fetch(conn)
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    async def get_trip_seat_states(conn: asyncpg.Connection, trip_id: UUID) -> List[dict]:
+        """Get every seat of one trip with its current booked/held state"""
+        rows = await TRIP_SEAT_STATES.fetch(conn, trip_id)
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    async def set_flash_sale(conn: asyncpg.Connection, trip_id: UUID, enabled: bool) -> Optional[dict]:
+        """Switch a trip's flash-sale mode"""
+        row = await SET_FLASH_SALE.fetchrow(conn, trip_id, enabled)
+        return dict(row) if row else None
+
     @staticmethod
     async def get_seat(conn: asyncpg.Connection, seat_id: UUID) -> Optional[dict]:
         """Get seat by ID"""
-        query = """
-            SELECT s.id, s.trip_id, s.seat_number, s.price,
-                   t.departure_time, t.arrival_time
-            FROM seats s
-            JOIN trips t ON s.trip_id = t.id
-            WHERE s.id = $1
-        """
-        row = await conn.fetchrow(query, seat_id)
+        row = await GET_SEAT.fetchrow(conn, seat_id)
         return dict(row) if row else None
 
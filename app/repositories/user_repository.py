@@ -1,40 +1,70 @@
 import asyncpg
 from typing import Optional
 from uuid import UUID
+from app.core.statements import statements
 from app.models.user import UserCreate, UserResponse, UserProfileCreate
+from app.repositories.instrumentation import instrumented
 
+CREATE_USER = statements.register("user.create", """
+    INSERT INTO users (mobile, password_hash)
+    VALUES ($1, $2)
+    RETURNING id, mobile, created_at
+""")
+GET_BY_MOBILE = statements.register(
+    "user.get_by_mobile",
+    "SELECT id, mobile, password_hash, created_at, updated_at FROM users WHERE mobile = $1",
+    warm=("booking",)
+)
+GET_BY_ID = statements.register(
+    "user.get_by_id",
+    "SELECT id, mobile, created_at, updated_at FROM users WHERE id = $1",
+    warm=("read",)
+)
+GET_PROFILE_ID = statements.register("user.get_profile_id", "SELECT id FROM profiles WHERE name = $1")
+GET_PROFILE_NAME = statements.register("user.get_profile_name", "SELECT name FROM profiles WHERE id = $1")
+CREATE_PROFILE = statements.register("user.create_profile", """
+    INSERT INTO user_profiles (user_id, profile_id)
+    VALUES ($1, $2)
+    ON CONFLICT (user_id, profile_id) DO NOTHING
+    RETURNING id, user_id, profile_id, created_at
+""")
+GET_USER_PROFILES = statements.register("user.get_user_profiles", """
+    SELECT up.id, up.user_id, up.profile_id, p.name as profile_type, up.created_at
+    FROM user_profiles up
+    JOIN profiles p ON up.profile_id = p.id
+    WHERE up.user_id = $1
+""", warm=("read",))
+HAS_PROFILE = statements.register("user.has_profile", """
+    SELECT 1 FROM user_profiles up
+    JOIN profiles p ON up.profile_id = p.id
+    WHERE up.user_id = $1 AND p.name = $2
+""")
 
+
+@instrumented
 class UserRepository:
     @staticmethod
     async def create(conn: asyncpg.Connection, user_data: UserCreate, password_hash: str) -> dict:
         """Create a new user"""
-        query = """
-            INSERT INTO users (mobile, password_hash)
-            VALUES ($1, $2)
-            RETURNING id, mobile, created_at
-        """
-        row = await conn.fetchrow(query, user_data.mobile, password_hash)
+        row = await CREATE_USER.fetchrow(conn, user_data.mobile, password_hash)
         return dict(row)
     
     @staticmethod
     async def get_by_mobile(conn: asyncpg.Connection, mobile: str) -> Optional[dict]:
         """Get user by mobile number"""
-        query = "SELECT id, mobile, password_hash, created_at, updated_at FROM users WHERE mobile = $1"
-        row = await conn.fetchrow(query, mobile)
+        row = await GET_BY_MOBILE.fetchrow(conn, mobile)
         return dict(row) if row else None
     
     @staticmethod
     async def get_by_id(conn: asyncpg.Connection, user_id: UUID) -> Optional[dict]:
         """Get user by ID"""
-        query = "SELECT id, mobile, created_at, updated_at FROM users WHERE id = $1"
-        row = await conn.fetchrow(query, user_id)
+        row = await GET_BY_ID.fetchrow(conn, user_id)
         return dict(row) if row else None
     
     @staticmethod
     async def get_profile_id_by_name(conn: asyncpg.Connection, profile_name: str) -> Optional[UUID]:
         """Get profile ID by profile name"""
-        query = "SELECT id FROM profiles WHERE name = $1"
-        row = await conn.fetchrow(query, profile_name)
+        row = await GET_PROFILE_ID.fetchrow(conn, profile_name)
         return row['id'] if row else None
     
     @staticmethod
@@ -45,16 +75,10 @@ class UserRepository:
         if not profile_id:
             raise ValueError(f"Profile type '{profile_data.profile_type}' not found")
         
-        query = """
-            INSERT INTO user_profiles (user_id, profile_id)
-            VALUES ($1, $2)
-            ON CONFLICT (user_id, profile_id) DO NOTHING
-            RETURNING id, user_id, profile_id, created_at
-        """
-        row = await conn.fetchrow(query, profile_data.user_id, profile_id)
+        row = await CREATE_PROFILE.fetchrow(conn, profile_data.user_id, profile_id)
         if row:
             # Get profile name for response
-            profile_name = await conn.fetchval("SELECT name FROM profiles WHERE id = $1", profile_id)
+            profile_name = await GET_PROFILE_NAME.fetchval(conn, profile_id)
             result = dict(row)
             result['profile_type'] = profile_name
             return result
@@ -63,23 +87,12 @@ class UserRepository:
     @staticmethod
     async def get_user_profiles(conn: asyncpg.Connection, user_id: UUID) -> list:
         """Get all profiles for a user (with profile names)"""
-        query = """
-            SELECT up.id, up.user_id, up.profile_id, p.name as profile_type, up.created_at
-            FROM user_profiles up
-            JOIN profiles p ON up.profile_id = p.id
-            WHERE up.user_id = $1
-        """
-        rows = await conn.fetch(query, user_id)
+        rows = await GET_USER_PROFILES.fetch(conn, user_id)
         return [dict(row) for row in rows]
     
     @staticmethod
     async def has_profile(conn: asyncpg.Connection, user_id: UUID, profile_type: str) -> bool:
         """Check if user has a specific profile"""
-        query = """
-            SELECT 1 FROM user_profiles up
-            JOIN profiles p ON up.profile_id = p.id
-            WHERE up.user_id = $1 AND p.name = $2
-        """
-        row = await conn.fetchrow(query, user_id, profile_type)
+        row = await HAS_PROFILE.fetchrow(conn, user_id, profile_type)
         return row is not None
 
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
 from uuid import UUID
-from typing import List
+from typing import Any, List, Optional
 
 
 class BusCreateRequest(BaseModel):
@@ -72,4 +72,44 @@ class RouteResponse(BaseModel):
     created_at: datetime
 
     class Config:
-        from_attributes = True  # این مهمه! اجازه میده از dict(row) استفاده کنی
\ No newline at end of file
+        from_attributes = True  # این مهمه! اجازه میده از dict(row) استفاده کنی
+
+class FlashSaleRequest(BaseModel):
+    enabled: bool
+
+
+class FlashSaleResponse(BaseModel):
+    trip_id: UUID
+    flash_sale: bool
+
+
+class FlashSaleStatusResponse(BaseModel):
+    trip_id: UUID
+    queue_depth: int
+    free_seats: Optional[int] = None
+    admitted: int
+    rejected_sold_out: int
+    rejected_seat_taken: int
+    rejected_queue_full: int
+    mean_wait_ms: float
+
+
+class SearchCacheStatusResponse(BaseModel):
+    enabled: bool
+    entries: int
+    bytes: int
+    hits: int
+    misses: int
+    stale: int
+    hit_rate: float
+    mean_hit_age_ms: float
+
+
+class SlowQueryResponse(BaseModel):
+    statement: str
+    sql: str
+    params: List[str]
+    duration_ms: float
+    captured_at: datetime
+    plan: Optional[Any] = None
+    error: Optional[str] = None
@@ -1,11 +1,10 @@
 from pydantic import BaseModel, Field, validator
-from datetime import datetime
+from datetime import date, datetime
 from uuid import UUID
 from typing import Optional, List
 
 
-class ReserveSeatRequest(BaseModel):
-    trip_id: UUID
+class SeatPassenger(BaseModel):
     seat_id: UUID
     first_name: str = Field(..., min_length=1, max_length=100)
     last_name: str = Field(..., min_length=1, max_length=100)
@@ -19,6 +18,22 @@ class ReserveSeatRequest(BaseModel):
         return v
 
 
+class ReserveSeatRequest(SeatPassenger):
+    trip_id: UUID
+
+
+class GroupReserveRequest(BaseModel):
+    trip_id: UUID
+    passengers: List[SeatPassenger] = Field(..., min_length=1, max_length=40)
+    
+    @validator('passengers')
+    def validate_unique_seats(cls, v):
+        seat_ids = [p.seat_id for p in v]
+        if len(set(seat_ids)) != len(seat_ids):
+            raise ValueError('Each seat can only be reserved once per group')
+        return v
+
+
 class ReserveSeatResponse(BaseModel):
     reservation_id: UUID
     expires_at: datetime
@@ -54,6 +69,13 @@ class ReservationResponse(BaseModel):
     created_at: datetime
 
 
+class GroupReserveResponse(BaseModel):
+    group_id: UUID
+    reservations: List[ReservationResponse]
+    expires_at: datetime
+    payment_deadline: datetime
+
+
 class AvailableTripResponse(BaseModel):
     trip_id: UUID
     bus_id: UUID
@@ -65,8 +87,41 @@ class AvailableTripResponse(BaseModel):
     available_seats: List[dict]  # List of {seat_id, seat_number, price}
 
 
+class TripSeatMapResponse(BaseModel):
+    trip_id: UUID
+    bus_id: UUID
+    plate_number: str
+    departure_time: datetime
+    arrival_time: datetime
+    origin: str
+    destination: str
+    seat_ids: List[UUID]  # ordered by seat number
+    seat_numbers: List[int]
+    status: str  # base64, 2 bits per seat (seat i at bits 2i..2i+1): 0 free, 1 held, 2 booked
+    prices: List[int]  # distinct prices, ascending
+    price_index: List[int]  # per seat, index into prices
+
+
+class AvailableTripSummaryResponse(BaseModel):
+    trip_id: UUID
+    bus_id: UUID
+    plate_number: str
+    departure_time: datetime
+    arrival_time: datetime
+    origin: str
+    destination: str
+    free_seats: int
+    min_price: int
+    max_price: int
+
+
 class AvailableTripsQuery(BaseModel):
+    departure_from: date
+    departure_to: date
     origin: Optional[str] = None
     destination: Optional[str] = None
     sort_by: Optional[str] = Field(None, pattern="^(price_asc|price_desc)$")
+    summary: bool = False
+    limit: int = Field(20, ge=1, le=100)
+    cursor: Optional[str] = None
 
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+
+class CitySuggestionResponse(BaseModel):
+    city: str
+    origin_routes: int
+    destination_routes: int
+    score: float
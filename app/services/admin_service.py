@@ -1,12 +1,18 @@
 import asyncpg
+from typing import AsyncIterator
 from uuid import UUID
 from datetime import datetime, timezone
+from app.core.singleflight import SingleFlight
 from app.repositories.bus_repository import BusRepository
 from app.repositories.trip_repository import TripRepository
 from app.repositories.admin_repository import AdminRepository
 from app.repositories.user_repository import UserRepository
 from app.models.bus import BusCreate
 from app.models.trip import TripCreate
+from app.services.seat_availability import seat_availability
+
+# Identical report requests in flight at the same time share one query
+reports_flight = SingleFlight("admin_reports")
 
 
 class AdminService:
@@ -37,6 +43,15 @@ class AdminService:
             trip_data.status
         )
     
+    @staticmethod
+    async def set_flash_sale(conn: asyncpg.Connection, trip_id: UUID, enabled: bool) -> dict:
+        """Switch a trip's flash-sale mode"""
+        result = await TripRepository.set_flash_sale(conn, trip_id, enabled)
+        if not result:
+            raise ValueError("Trip not found")
+        seat_availability.set_flash_sale(trip_id, enabled)
+        return result
+    
     @staticmethod
     async def get_hourly_bookings(conn: asyncpg.Connection) -> list:
         """Get successful bookings per hour"""
@@ -70,4 +85,9 @@ class AdminService:
     async def get_bus(conn: asyncpg.Connection) -> dict:
         """Get busiest driver"""
         return await BusRepository.get_bus(conn)
+    
+    @staticmethod
+    def stream_buses(conn: asyncpg.Connection) -> AsyncIterator[dict]:
+        """Stream all buses"""
+        return BusRepository.stream_buses(conn)
 
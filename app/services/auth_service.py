@@ -3,13 +3,30 @@ from datetime import datetime, timedelta
 from uuid import UUID
 from app.repositories.user_repository import UserRepository
 from app.repositories.sms_repository import SMSRepository
-from app.core.security import get_password_hash, verify_password, create_access_token
+from app.core.config import settings
+from app.core.security import password_hasher, create_access_token
 from app.core.sms import sms_service
 from app.models.user import UserCreate, UserProfileCreate
 from app.schemas.auth import SendVerificationRequest, VerifyCodeRequest
+from app.services.user_cache import user_cache
 
 
 class AuthService:
+    @staticmethod
+    async def _issue_token(conn: asyncpg.Connection, user: dict) -> dict:
+        """Token response for the user, with their profile claims when enabled"""
+        claims = {"sub": str(user['id']), "mobile": user['mobile']}
+        if settings.profile_claims_version:
+            profiles = await UserRepository.get_user_profiles(conn, user['id'])
+            claims["profiles"] = [p['profile_type'] for p in profiles]
+            claims["pv"] = settings.profile_claims_version
+        
+        return {
+            "access_token": create_access_token(data=claims),
+            "token_type": "bearer",
+            "user_id": user['id']
+        }
+    
     @staticmethod
     async def send_verification(conn: asyncpg.Connection, request: SendVerificationRequest) -> dict:
         """Send SMS verification code"""
@@ -39,31 +56,28 @@ class AuthService:
             if not request.password:
                 raise ValueError("Password is required for registration")
             
-            password_hash = get_password_hash(request.password)
+            password_hash = await password_hasher.hash(request.password)
             user_data = UserCreate(mobile=request.mobile, password=request.password)
-            user = await UserRepository.create(conn, user_data, password_hash)
-            
-            # Create default passenger profile
-            profile_data = UserProfileCreate(user_id=user['id'], profile_type='passenger')
-            await UserRepository.create_profile(conn, profile_data)
-            
-            # Create wallet
-            from app.repositories.wallet_repository import WalletRepository
-            await WalletRepository.create_wallet(conn, user['id'])
+            # All or nothing, so a failure cannot leave an account without profile or wallet
+            async with conn.transaction():
+                user = await UserRepository.create(conn, user_data, password_hash)
+                
+                # Create default passenger profile
+                profile_data = UserProfileCreate(user_id=user['id'], profile_type='passenger')
+                await UserRepository.create_profile(conn, profile_data)
+                
+                # Create wallet
+                from app.repositories.wallet_repository import WalletRepository
+                await WalletRepository.create_wallet(conn, user['id'])
+            user_cache.invalidate(user['id'])
         else:
             # Existing user - verify password if provided
             if request.password:
-                if not verify_password(request.password, user['password_hash']):
+                if not await password_hasher.verify(request.password, user['password_hash']):
                     raise ValueError("Invalid password")
         
         # Create JWT token
-        token = create_access_token(data={"sub": str(user['id']), "mobile": user['mobile']})
-        
-        return {
-            "access_token": token,
-            "token_type": "bearer",
-            "user_id": user['id']
-        }
+        return await AuthService._issue_token(conn, user)
     
     @staticmethod
     async def login(conn: asyncpg.Connection, mobile: str, password: str) -> dict:
@@ -73,17 +87,11 @@ class AuthService:
         if not user:
             raise ValueError("Invalid mobile or password")
         
-        if not verify_password(password, user['password_hash']):
+        if not await password_hasher.verify(password, user['password_hash']):
             raise ValueError("Invalid mobile or password")
         
         # Create JWT token
-        token = create_access_token(data={"sub": str(user['id']), "mobile": user['mobile']})
-        
-        return {
-            "access_token": token,
-            "token_type": "bearer",
-            "user_id": user['id']
-        }
+        return await AuthService._issue_token(conn, user)
     
     @staticmethod
     async def get_current_user(conn: asyncpg.Connection, user_id: UUID) -> dict:
@@ -1,15 +1,31 @@
 import asyncpg
-from datetime import datetime, timedelta,timezone
-from uuid import UUID
+import base64
+import json
+from datetime import date, datetime, time, timedelta,timezone
+from typing import AsyncIterator, List, Optional, Set, Tuple, Union
+from uuid import UUID, uuid4
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
 from app.repositories.booking_repository import BookingRepository
 from app.repositories.trip_repository import TripRepository
 from app.repositories.wallet_repository import WalletRepository
-from app.schemas.booking import ReserveSeatRequest
+from app.schemas.booking import ReserveSeatRequest, GroupReserveRequest
+from app.services.route_search import normalize_city, route_search
+from app.services.search_cache import search_cache
+from app.services.seat_availability import seat_availability
+
+# (user_id, day) -> confirmed bookings; entries this worker changes are dropped,
+# other workers' bookings show up once an entry expires
+_daily_counts = TTLCache(settings.daily_booking_count_cache_size, settings.daily_booking_count_cache_seconds)
+# Identical available-trip searches in flight at the same time share one query
+available_trips_flight = SingleFlight("available_trips")
 
 
 class BookingService:
     MAX_DAILY_BOOKINGS = 20
     RESERVATION_DURATION_MINUTES = 10
+    SEAT_STATUS_CODES = {"free": 0, "held": 1, "booked": 2}
     
     @staticmethod
     async def reserve_seat(
@@ -18,23 +34,179 @@ class BookingService:
         request: ReserveSeatRequest
     ) -> dict:
         """Reserve a seat for 10 minutes"""
+        if settings.reservation_claim_mode == "constraint":
+            reservation = await BookingService._claim_seat(conn, user_id, request)
+        else:
+            reservation = await BookingService._reserve_seat_locking(conn, user_id, request)
+        
+        seat_availability.mark_held(reservation['seat_id'], reservation['expires_at'])
+        
+        return {
+            "reservation_id": reservation['id'],
+            "expires_at": reservation['expires_at'],
+            "payment_deadline": reservation['expires_at']
+        }
+    
+    @staticmethod
+    async def reserve_group(
+        conn: asyncpg.Connection,
+        user_id: UUID,
+        request: GroupReserveRequest
+    ) -> dict:
+        """Reserve several seats of one trip for 10 minutes, all or nothing"""
+        group_id = uuid4()
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=BookingService.RESERVATION_DURATION_MINUTES)
+        async with conn.transaction():
+            await BookingService._check_daily_limit(conn, user_id, len(request.passengers))
+            reservations = await BookingRepository.claim_seats(
+                conn,
+                user_id,
+                request.trip_id,
+                request.passengers,
+                expires_at,
+                group_id
+            )
+        
+        for reservation in reservations:
+            seat_availability.mark_held(reservation['seat_id'], reservation['expires_at'])
+        
+        return {
+            "group_id": group_id,
+            "reservations": reservations,
+            "expires_at": expires_at,
+            "payment_deadline": expires_at
+        }
+    
+    @staticmethod
+    async def reserve_seats_batch(
+        conn: asyncpg.Connection,
+        claims: List[Tuple[UUID, ReserveSeatRequest]]
+    ) -> List[Union[dict, ValueError]]:
+        """Resolve many users' reserve_seat requests in one transaction.
+
+        Returns, per claim and in order, the reserve_seat result or the
+        ValueError that reserve_seat would have raised for it.
+        """
+        outcomes: List[Union[dict, ValueError]] = [None] * len(claims)
+        today = datetime.now(timezone.utc)
+        expires_at = today + timedelta(minutes=BookingService.RESERVATION_DURATION_MINUTES)
+        
+        async with conn.transaction():
+            daily_counts = await BookingService._get_daily_counts(
+                conn, list({user_id for user_id, _ in claims}), today.date()
+            )
+            
+            # Earlier requests win seats asked for more than once in the batch
+            pending, seen_seats = [], set()
+            for index, (user_id, request) in enumerate(claims):
+                if daily_counts.get(user_id, 0) >= BookingService.MAX_DAILY_BOOKINGS:
+                    outcomes[index] = ValueError(f"Daily booking limit reached (max {BookingService.MAX_DAILY_BOOKINGS})")
+                elif request.seat_id in seen_seats:
+                    outcomes[index] = ValueError("Seat is already reserved")
+                else:
+                    seen_seats.add(request.seat_id)
+                    pending.append(index)
+            
+            rows = []
+            if pending:
+                rows = await BookingRepository.claim_seats_batch(
+                    conn,
+                    [claims[i][0] for i in pending],
+                    [claims[i][1].trip_id for i in pending],
+                    [claims[i][1] for i in pending],
+                    expires_at
+                )
+        
+        for index, row in zip(pending, rows):
+            if row['seat_trip_id'] is None:
+                outcomes[index] = ValueError("Seat not found")
+            elif row['seat_trip_id'] != claims[index][1].trip_id:
+                outcomes[index] = ValueError("Seat does not belong to this trip")
+            elif row['id'] is None:
+                outcomes[index] = ValueError("Seat is already reserved")
+            else:
+                seat_availability.mark_held(row['seat_id'], row['expires_at'])
+                outcomes[index] = {
+                    "reservation_id": row['id'],
+                    "expires_at": row['expires_at'],
+                    "payment_deadline": row['expires_at']
+                }
+        return outcomes
+    
+    @staticmethod
+    async def _check_daily_limit(conn: asyncpg.Connection, user_id: UUID, seats: int = 1):
+        """Raise if booking `seats` more seats would exceed the daily booking limit"""
+        today = datetime.now(timezone.utc).date()
+        daily_count = (await BookingService._get_daily_counts(conn, [user_id], today)).get(user_id, 0)
+        if daily_count + seats > BookingService.MAX_DAILY_BOOKINGS:
+            raise ValueError(f"Daily booking limit reached (max {BookingService.MAX_DAILY_BOOKINGS})")
+    
+    @staticmethod
+    async def _get_daily_counts(conn: asyncpg.Connection, user_ids: List[UUID], day: date) -> dict:
+        """Confirmed bookings of each user on a day, served from the cache when enabled"""
+        if settings.daily_booking_count_cache_seconds <= 0:
+            if len(user_ids) == 1:
+                count = await BookingRepository.get_daily_booking_count(conn, user_ids[0], day)
+                return {user_ids[0]: count}
+            return await BookingRepository.get_daily_booking_counts(conn, user_ids, day)
+        
+        counts, missing = {}, []
+        for user_id in user_ids:
+            count = _daily_counts.get((user_id, day))
+            if count is None:
+                missing.append(user_id)
+            else:
+                counts[user_id] = count
+        if missing:
+            fetched = await BookingRepository.get_daily_booking_counts(conn, missing, day)
+            for user_id in missing:
+                counts[user_id] = fetched.get(user_id, 0)
+                _daily_counts.set((user_id, day), counts[user_id])
+        return counts
+    
+    @staticmethod
+    def _daily_count_changed(booking: dict):
+        """Drop the cached daily count a confirmed or cancelled booking affects"""
+        _daily_counts.pop((booking['user_id'], booking['created_at'].astimezone(timezone.utc).date()))
+    
+    @staticmethod
+    async def _claim_seat(
+        conn: asyncpg.Connection,
+        user_id: UUID,
+        request: ReserveSeatRequest
+    ) -> dict:
+        """Claim the seat in one statement, arbitrated by the held-seat unique index"""
+        await BookingService._check_daily_limit(conn, user_id)
+        
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=BookingService.RESERVATION_DURATION_MINUTES)
+        return await BookingRepository.claim_seat(
+            conn,
+            user_id,
+            request.seat_id,
+            request.trip_id,
+            request.first_name,
+            request.last_name,
+            request.national_id,
+            request.gender,
+            expires_at
+        )
+    
+    @staticmethod
+    async def _reserve_seat_locking(
+        conn: asyncpg.Connection,
+        user_id: UUID,
+        request: ReserveSeatRequest
+    ) -> dict:
+        """Reserve the seat inside a transaction that locks the seat row"""
         async with conn.transaction():
             # Check daily booking limit
-            today = datetime.now(timezone.utc)
-            daily_count = await BookingRepository.get_daily_booking_count(conn, user_id, today)
-            if daily_count >= BookingService.MAX_DAILY_BOOKINGS:
-                raise ValueError(f"Daily booking limit reached (max {BookingService.MAX_DAILY_BOOKINGS})")
+            await BookingService._check_daily_limit(conn, user_id)
             
-            # Verify seat exists and get price
-            await BookingRepository.cleanup_expired_reservations(conn)
-
-            # یا حداقل برای این صندلی خاص:
-            await BookingRepository.delete_expired_reservation_for_seat(conn, request.seat_id)
-
-            # 2. چک کن هنوز رزرو فعال برای این صندلی وجود نداشته باشه
+            # Only the target seat is looked at; expired holds count as free
+            # and are reclaimed by the background cleanup task
             existing = await BookingRepository.get_active_reservation_for_seat(conn, request.seat_id)
             if existing:
-                raise ValueError("این صندلی در حال حاضر رزرو موقت شده است")
+                raise ValueError("Seat is already reserved")
             seat = await TripRepository.get_seat(conn, request.seat_id)
             if not seat:
                 raise ValueError("Seat not found")
@@ -44,7 +216,7 @@ class BookingService:
             
             # Create reservation (with locking)
             expires_at = datetime.now(timezone.utc) + timedelta(minutes=BookingService.RESERVATION_DURATION_MINUTES)
-            reservation = await BookingRepository.create_reservation(
+            return await BookingRepository.create_reservation(
                 conn,
                 user_id,
                 request.seat_id,
@@ -55,12 +227,6 @@ class BookingService:
                 request.gender,
                 expires_at
             )
-            
-            return {
-                "reservation_id": reservation['id'],
-                "expires_at": reservation['expires_at'],
-                "payment_deadline": reservation['expires_at']
-            }
     
     @staticmethod
     async def pay_booking(
@@ -69,6 +235,38 @@ class BookingService:
         reservation_id: UUID
     ) -> dict:
         """Pay for reserved booking"""
+        if settings.checkout_mode == "multi_statement":
+            booking = await BookingService._pay_booking_multi_statement(conn, user_id, reservation_id)
+        else:
+            booking = await BookingRepository.checkout_reservation(conn, user_id, reservation_id)
+        
+        seat_availability.mark_booked(booking['seat_id'])
+        BookingService._daily_count_changed(booking)
+        
+        return booking
+    
+    @staticmethod
+    async def pay_group(
+        conn: asyncpg.Connection,
+        user_id: UUID,
+        group_id: UUID
+    ) -> list:
+        """Pay for all held reservations of a group with one wallet debit"""
+        bookings = await BookingRepository.checkout_group(conn, user_id, group_id)
+        
+        for booking in bookings:
+            seat_availability.mark_booked(booking['seat_id'])
+            BookingService._daily_count_changed(booking)
+        
+        return bookings
+    
+    @staticmethod
+    async def _pay_booking_multi_statement(
+        conn: asyncpg.Connection,
+        user_id: UUID,
+        reservation_id: UUID
+    ) -> dict:
+        """Pay for reserved booking with one statement per step"""
         async with conn.transaction():
             # Get reservation
             reservation = await BookingRepository.get_reservation(conn, reservation_id)
@@ -116,13 +314,11 @@ class BookingService:
             )
             
             # Create booking from reservation (passenger info is already in reservation)
-            booking = await BookingRepository.create_booking(
+            return await BookingRepository.create_booking(
                 conn,
                 reservation_id,
                 seat['price']
             )
-            
-            return booking
     
     @staticmethod
     async def cancel_reservation(
@@ -131,17 +327,22 @@ class BookingService:
         reservation_id: UUID
     ) -> dict:
         """Cancel a reservation"""
-        reservation = await BookingRepository.get_reservation(conn, reservation_id)
-        if not reservation:
-            raise ValueError("Reservation not found")
-        
-        if reservation['user_id'] != user_id:
-            raise ValueError("Reservation does not belong to this user")
+        async with conn.transaction():
+            reservation = await BookingRepository.get_reservation(conn, reservation_id)
+            if not reservation:
+                raise ValueError("Reservation not found")
+            
+            if reservation['user_id'] != user_id:
+                raise ValueError("Reservation does not belong to this user")
+            
+            if reservation['status'] != 'held':
+                raise ValueError("Reservation cannot be cancelled")
+            
+            cancelled = await BookingRepository.cancel_reservation(conn, reservation_id)
         
-        if reservation['status'] != 'held':
-            raise ValueError("Reservation cannot be cancelled")
+        seat_availability.release_hold(cancelled['seat_id'])
         
-        return await BookingRepository.cancel_reservation(conn, reservation_id)
+        return cancelled
     
     @staticmethod
     async def cancel_booking(
@@ -172,22 +373,130 @@ class BookingService:
                 'refund',
                 booking_id
             )
-            
-            return cancelled
+        
+        seat_availability.release_booking(cancelled['seat_id'])
+        BookingService._daily_count_changed(cancelled)
+        
+        return cancelled
     
     @staticmethod
     async def get_available_trips(
         conn: asyncpg.Connection,
+        departure_from: date,
+        departure_to: date,
         origin: str = None,
         destination: str = None,
-        sort_by: str = None
-    ) -> list:
-        """Get available trips with seats"""
-        trips = await TripRepository.get_available_trips(conn, origin, destination, sort_by)
+        sort_by: str = None,
+        summary: bool = False,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[list, Optional[str]]:
+        """Get a page of trips departing between two (UTC) dates that have free seats.
+
+        Returns the trips, with their free seats or, in summary mode, their
+        free-seat count and price range, and the cursor of the next page.
+        """
+        window_start, window_end = BookingService.departure_window(departure_from, departure_to)
+        after = BookingService._decode_trips_cursor(cursor, sort_by) if cursor else None
+        route_ids = await route_search.resolve_route_ids(conn, origin, destination)
+        if route_ids is not None and not route_ids:
+            return [], None
+        
+        cache_key = (
+            normalize_city(origin) if origin else None,
+            normalize_city(destination) if destination else None,
+            route_search.version, departure_from, departure_to, sort_by, summary, limit, cursor
+        )
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        token = search_cache.token(route_ids)
         
-        # Group by trip
+        if summary:
+            trips = await TripRepository.get_available_trip_summaries(
+                conn, window_start, window_end, BookingService._route_id_list(route_ids), sort_by, after, limit
+            )
+        else:
+            # Seat state is served from the in-process index once it is loaded
+            if seat_availability.loaded:
+                trips = seat_availability.available_trips(window_start, window_end, route_ids, sort_by)
+            else:
+                trips = BookingService._group_available_seats(
+                    await TripRepository.get_available_trips(
+                        conn, window_start, window_end, BookingService._route_id_list(route_ids), sort_by
+                    )
+                )
+            trips.sort(key=lambda trip: BookingService._trip_sort_key(trip, sort_by))
+            if after:
+                trips = [trip for trip in trips if BookingService._trip_sort_key(trip, sort_by) > after]
+            trips = trips[:limit]
+        
+        next_cursor = None
+        if len(trips) == limit:
+            next_cursor = BookingService._encode_trips_cursor(
+                BookingService._trip_sort_key(trips[-1], sort_by), sort_by
+            )
+        search_cache.set(cache_key, token, (trips, next_cursor))
+        return trips, next_cursor
+    
+    @staticmethod
+    def _route_id_list(route_ids: Optional[Set[UUID]]) -> Optional[List[UUID]]:
+        return list(route_ids) if route_ids is not None else None
+    
+    @staticmethod
+    def departure_window(departure_from: date, departure_to: date) -> Tuple[datetime, datetime]:
+        """Validate a departure date window and return it as [start, end) UTC datetimes"""
+        if departure_to < departure_from:
+            raise ValueError("departure_to must not be before departure_from")
+        if (departure_to - departure_from).days >= settings.available_trips_max_window_days:
+            raise ValueError(f"Departure window is limited to {settings.available_trips_max_window_days} days")
+        return (
+            datetime.combine(departure_from, time.min, timezone.utc),
+            datetime.combine(departure_to + timedelta(days=1), time.min, timezone.utc)
+        )
+    
+    @staticmethod
+    async def stream_available_trips(
+        conn: asyncpg.Connection,
+        window_start: datetime,
+        window_end: datetime,
+        origin: str = None,
+        destination: str = None
+    ) -> AsyncIterator[dict]:
+        """Stream available trips of a departure window with their free seats, one trip at a time"""
+        route_ids = await route_search.resolve_route_ids(conn, origin, destination)
+        if route_ids is not None and not route_ids:
+            return
+        trip = None
+        async for row in TripRepository.stream_available_seats(
+            conn, window_start, window_end, BookingService._route_id_list(route_ids)
+        ):
+            if trip is None or trip['trip_id'] != row['trip_id']:
+                if trip is not None:
+                    yield trip
+                trip = {
+                    "trip_id": row['trip_id'],
+                    "bus_id": row['bus_id'],
+                    "plate_number": row['plate_number'],
+                    "departure_time": row['departure_time'],
+                    "arrival_time": row['arrival_time'],
+                    "origin": row['origin'],
+                    "destination": row['destination'],
+                    "available_seats": []
+                }
+            trip["available_seats"].append({
+                "seat_id": row['seat_id'],
+                "seat_number": row['seat_number'],
+                "price": row['price']
+            })
+        if trip is not None:
+            yield trip
+    
+    @staticmethod
+    def _group_available_seats(rows: List[dict]) -> List[dict]:
+        """Group available seat rows by trip"""
         trips_dict = {}
-        for trip in trips:
+        for trip in rows:
             trip_id = trip['trip_id']
             if trip_id not in trips_dict:
                 trips_dict[trip_id] = {
@@ -198,21 +507,103 @@ class BookingService:
                     "arrival_time": trip['arrival_time'],
                     "origin": trip['origin'],
                     "destination": trip['destination'],
-                    "available_seats": []
+                    "available_seats": [],
+                    "min_price": trip['price'],
+                    "max_price": trip['price']
                 }
-            trips_dict[trip_id]["available_seats"].append({
+            grouped = trips_dict[trip_id]
+            grouped["available_seats"].append({
                 "seat_id": trip['seat_id'],
                 "seat_number": trip['seat_number'],
                 "price": trip['price']
             })
+            grouped["min_price"] = min(grouped["min_price"], trip['price'])
+            grouped["max_price"] = max(grouped["max_price"], trip['price'])
         
         return list(trips_dict.values())
     
+    @staticmethod
+    def _trip_sort_key(trip: dict, sort_by: Optional[str]) -> list:
+        """Keyset of a trip in the listing order; same order as the summary query"""
+        if sort_by == "price_asc":
+            return [trip['min_price'], trip['departure_time'], trip['trip_id']]
+        if sort_by == "price_desc":
+            return [-trip['max_price'], trip['departure_time'], trip['trip_id']]
+        return [trip['departure_time'], trip['trip_id']]
+    
+    @staticmethod
+    def _encode_trips_cursor(key: list, sort_by: Optional[str]) -> str:
+        payload = [sort_by] + [
+            value.isoformat() if isinstance(value, datetime) else str(value) if isinstance(value, UUID) else value
+            for value in key
+        ]
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+    
+    @staticmethod
+    def _decode_trips_cursor(cursor: str, sort_by: Optional[str]) -> list:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if payload[0] != sort_by:
+                raise ValueError
+            *price, departure_time, trip_id = payload[1:]
+            if len(price) != (0 if sort_by is None else 1):
+                raise ValueError
+            return [int(p) for p in price] + [datetime.fromisoformat(departure_time), UUID(trip_id)]
+        except (ValueError, TypeError, IndexError):
+            raise ValueError("Invalid cursor")
+    
+    @staticmethod
+    async def get_trip_seat_map(conn: asyncpg.Connection, trip_id: UUID) -> dict:
+        """Full seat map of one trip in compact form"""
+        info = seat_availability.trip_info(trip_id)
+        if info is not None:
+            seats = seat_availability.seat_map(trip_id)
+        else:
+            # Trips outside the index (not active, departed, or index not loaded yet)
+            rows = await TripRepository.get_trip_seat_states(conn, trip_id)
+            if not rows:
+                raise ValueError("Trip not found")
+            info = {
+                key: rows[0][key]
+                for key in ("trip_id", "bus_id", "plate_number", "departure_time",
+                            "arrival_time", "origin", "destination")
+            }
+            seats = [
+                {
+                    "seat_id": row['seat_id'],
+                    "seat_number": row['seat_number'],
+                    "price": row['price'],
+                    "status": "booked" if row['booked'] else "held" if row['held'] else "free"
+                }
+                for row in rows
+            ]
+        
+        # 2 bits per seat, four seats per byte
+        bitmap = bytearray((len(seats) + 3) // 4)
+        for i, seat in enumerate(seats):
+            bitmap[i // 4] |= BookingService.SEAT_STATUS_CODES[seat['status']] << (i % 4 * 2)
+        prices = sorted({seat['price'] for seat in seats})
+        price_positions = {price: i for i, price in enumerate(prices)}
+        
+        return {
+            **info,
+            "seat_ids": [seat['seat_id'] for seat in seats],
+            "seat_numbers": [seat['seat_number'] for seat in seats],
+            "status": base64.b64encode(bitmap).decode(),
+            "prices": prices,
+            "price_index": [price_positions[seat['price']] for seat in seats]
+        }
+    
     @staticmethod
     async def get_user_bookings(conn: asyncpg.Connection, user_id: UUID) -> list:
         """Get user's bookings"""
         return await BookingRepository.get_user_bookings(conn, user_id)
     
+    @staticmethod
+    def stream_user_bookings(conn: asyncpg.Connection, user_id: UUID) -> AsyncIterator[dict]:
+        """Stream all of a user's bookings"""
+        return BookingRepository.stream_user_bookings(conn, user_id)
+    
     @staticmethod
     async def get_user_reservations(conn: asyncpg.Connection, user_id: UUID) -> list:
         """Get user's active reservations"""
@@ -0,0 +1,164 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from app.core.config import settings
+from app.core.database import Database
+from app.core.metrics import Counter, Gauge, Histogram
+from app.schemas.booking import ReserveSeatRequest
+from app.services.booking_service import BookingService
+from app.services.seat_availability import seat_availability
+
+queue_depth = Gauge(
+    "flash_sale_queue_depth",
+    "Reservation attempts waiting in a flash-sale queue",
+    ["trip_id"]
+)
+queue_wait = Histogram(
+    "flash_sale_queue_wait_seconds",
+    "Time a reservation attempt waited in a flash-sale queue",
+    ["trip_id"]
+)
+admitted = Counter(
+    "flash_sale_admitted_total",
+    "Reservation attempts handed to the database by a flash-sale queue",
+    ["trip_id"]
+)
+rejections = Counter(
+    "flash_sale_rejections_total",
+    "Reservation attempts rejected by a flash-sale queue without touching the database",
+    ["trip_id", "reason"]
+)
+
+
+class FlashSaleQueueFull(ValueError):
+    """A flash-sale queue has no room for another reservation attempt"""
+
+
+class FlashSaleQueue:
+    """Bounded FIFO of reservation attempts for one trip, served by a single consumer"""
+
+    def __init__(self, trip_id: UUID, max_depth: int):
+        self.trip_id = trip_id
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_depth)
+        self._closed = False
+        self._consumer = asyncio.create_task(self._consume())
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def _reject_unavailable(self, request: ReserveSeatRequest):
+        """Turn the attempt away if the index already knows it cannot succeed"""
+        if seat_availability.free_seat_count(self.trip_id) == 0:
+            rejections.inc(trip_id=self.trip_id, reason="sold_out")
+            raise ValueError("Trip is sold out")
+        if seat_availability.is_seat_free(request.seat_id) is False:
+            rejections.inc(trip_id=self.trip_id, reason="seat_taken")
+            raise ValueError("Seat is already reserved")
+
+    async def reserve_seat(self, user_id: UUID, request: ReserveSeatRequest) -> dict:
+        """Queue a reservation attempt and wait for the consumer to serve it"""
+        self._reject_unavailable(request)
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((user_id, request, future, asyncio.get_running_loop().time()))
+        except asyncio.QueueFull:
+            rejections.inc(trip_id=self.trip_id, reason="queue_full")
+            raise FlashSaleQueueFull("Too many pending reservations for this trip, try again")
+        queue_depth.set(self.depth, trip_id=self.trip_id)
+        return await future
+
+    def _took(self, item) -> Tuple[UUID, ReserveSeatRequest, asyncio.Future]:
+        user_id, request, future, enqueued_at = item
+        if not self._closed:
+            queue_depth.set(self.depth, trip_id=self.trip_id)
+        queue_wait.observe(asyncio.get_running_loop().time() - enqueued_at, trip_id=self.trip_id)
+        return user_id, request, future
+
+    async def _serve(self, conn, user_id: UUID, request: ReserveSeatRequest, future: asyncio.Future):
+        if future.done():
+            # The caller went away while queued
+            return
+        try:
+            self._reject_unavailable(request)
+            admitted.inc(trip_id=self.trip_id)
+            result = await BookingService.reserve_seat(conn, user_id, request)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
+
+    async def _consume(self):
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            try:
+                async with Database.acquire() as conn:
+                    # Serve in arrival order, keeping the connection while the queue is busy
+                    while item is not None:
+                        await self._serve(conn, *self._took(item))
+                        item = None if self._queue.empty() else self._queue.get_nowait()
+            except Exception as e:
+                # Connection trouble: fail this attempt and whatever is still queued
+                while True:
+                    if item is not None and not item[2].done():
+                        item[2].set_exception(e)
+                    if self._queue.empty():
+                        break
+                    item = self._queue.get_nowait()
+            if self._closed and self._queue.empty():
+                return
+
+    def close(self):
+        """Stop accepting attempts; already queued ones are still served"""
+        self._closed = True
+        queue_depth.remove(trip_id=self.trip_id)
+        try:
+            # Wake an idle consumer so it can exit
+            self._queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+
+class FlashSales:
+    """Per-trip flash-sale queues of this worker, following the trips' flash_sale flag"""
+
+    def __init__(self):
+        self._queues: Dict[UUID, FlashSaleQueue] = {}
+
+    def queue_for(self, trip_id: UUID) -> Optional[FlashSaleQueue]:
+        """The trip's queue if it is in flash-sale mode, created on first use"""
+        queue = self._queues.get(trip_id)
+        if not seat_availability.is_flash_sale(trip_id):
+            if queue is not None:
+                del self._queues[trip_id]
+                queue.close()
+            return None
+        if queue is None:
+            queue = self._queues[trip_id] = FlashSaleQueue(trip_id, settings.flash_sale_queue_max_depth)
+        return queue
+
+    def status(self) -> List[dict]:
+        """Queue depth, wait time and rejections of this worker's flash-sale queues"""
+        result = []
+        for trip_id, queue in list(self._queues.items()):
+            if self.queue_for(trip_id) is None:
+                continue
+            wait = queue_wait.summary(trip_id=trip_id)
+            result.append({
+                "trip_id": trip_id,
+                "queue_depth": queue.depth,
+                "free_seats": seat_availability.free_seat_count(trip_id),
+                "admitted": int(admitted.get(trip_id=trip_id)),
+                "rejected_sold_out": int(rejections.get(trip_id=trip_id, reason="sold_out")),
+                "rejected_seat_taken": int(rejections.get(trip_id=trip_id, reason="seat_taken")),
+                "rejected_queue_full": int(rejections.get(trip_id=trip_id, reason="queue_full")),
+                "mean_wait_ms": wait["mean"] * 1000
+            })
+        return result
+
+
+flash_sales = FlashSales()
@@ -0,0 +1,81 @@
+import asyncio
+import asyncpg
+from typing import List, Optional, Tuple, Union
+from uuid import UUID
+from app.core.config import settings
+from app.core.database import Database
+from app.schemas.booking import ReserveSeatRequest
+from app.services.booking_service import BookingService
+
+
+class ReservationBatcher:
+    """Collects reserve-seat requests arriving within a short linger window
+    and resolves them together in one transaction on one pooled connection.
+    """
+
+    def __init__(self):
+        self._pending: List[Tuple[UUID, ReserveSeatRequest, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes = set()
+
+    async def reserve_seat(self, user_id: UUID, request: ReserveSeatRequest) -> dict:
+        """Queue a reservation and wait for the batch it lands in"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((user_id, request, future))
+        if len(self._pending) >= settings.reservation_batch_max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(settings.reservation_batch_linger_ms / 1000, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    @staticmethod
+    async def _reserve_one(user_id: UUID, request: ReserveSeatRequest) -> Union[dict, Exception]:
+        try:
+            async with Database.acquire() as conn:
+                return await BookingService.reserve_seat(conn, user_id, request)
+        except Exception as e:
+            return e
+
+    @staticmethod
+    async def _reserve(claims: List[Tuple[UUID, ReserveSeatRequest]]) -> List[Union[dict, Exception]]:
+        """Outcome of every claim; a batch that keeps deadlocking is resolved claim by claim"""
+        for attempt in range(settings.reservation_batch_retries + 1):
+            try:
+                async with Database.acquire() as conn:
+                    return await BookingService.reserve_seats_batch(conn, claims)
+            except (asyncpg.DeadlockDetectedError, asyncpg.SerializationError):
+                continue
+        # One conflict must not fail every caller of the batch
+        return [await ReservationBatcher._reserve_one(user_id, request) for user_id, request in claims]
+
+    async def _run(self, batch: List[Tuple[UUID, ReserveSeatRequest, asyncio.Future]]):
+        try:
+            outcomes = await self._reserve([(user_id, request) for user_id, request, _ in batch])
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), outcome in zip(batch, outcomes):
+            if future.done():
+                # The caller went away; its reservation simply expires
+                continue
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+
+reservation_batcher = ReservationBatcher()
@@ -0,0 +1,168 @@
+import asyncio
+import asyncpg
+import re
+from typing import Dict, List, Optional, Set
+from uuid import UUID
+from app.repositories.route_repository import RouteRepository
+
+# Arabic letter forms and digits folded onto their Persian/ASCII equivalents
+_CHAR_MAP = str.maketrans({
+    "\u064a": "\u06cc",  # Arabic yeh
+    "\u0649": "\u06cc",  # alef maksura
+    "\u0643": "\u06a9",  # Arabic kaf
+    "\u0629": "\u0647",  # teh marbuta
+    "\u0623": "\u0627",  # alef with hamza above
+    "\u0625": "\u0627",  # alef with hamza below
+    "\u0622": "\u0627",  # alef with madda
+    "\u0624": "\u0648",  # waw with hamza
+    "\u200c": None,      # zero-width non-joiner
+    **{chr(0x06f0 + d): str(d) for d in range(10)},
+    **{chr(0x0660 + d): str(d) for d in range(10)},
+})
+# Harakat, superscript alef and tatweel
+_IGNORED = re.compile("[\u064b-\u065f\u0670\u0640]")
+# Fuzzy (non-substring) matches need at least this trigram similarity
+MIN_SIMILARITY = 0.3
+
+
+def normalize_city(text: str) -> str:
+    """Fold a city name or query to the form the index compares.
+
+    Spaces and ZWNJs are dropped since compound names are written with either or neither.
+    """
+    text = _IGNORED.sub("", text.translate(_CHAR_MAP)).casefold()
+    return "".join(text.split())
+
+
+def _trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class City:
+    __slots__ = ("name", "key", "grams", "origin_routes", "destination_routes")
+
+    def __init__(self, name: str, key: str):
+        self.name = name
+        self.key = key
+        self.grams = _trigrams(key)
+        self.origin_routes: Set[UUID] = set()
+        self.destination_routes: Set[UUID] = set()
+
+
+class RouteSearchIndex:
+    """In-process dictionary of route cities with a trigram index.
+
+    Answers city autocomplete and resolves origin/destination text to route
+    IDs, with Persian/Arabic spelling variants normalized away.
+    """
+
+    def __init__(self):
+        self._cities: Dict[str, City] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        self._lock = asyncio.Lock()
+        self._route_ids: Set[UUID] = set()
+        # Bumped whenever a route is added, so cached searches pick it up
+        self.version = 0
+        self.loaded = False
+
+    async def load(self, conn: asyncpg.Connection):
+        """(Re)build the dictionary from the routes table"""
+        async with self._lock:
+            routes = await RouteRepository.get_all(conn)
+            route_ids = self._route_ids
+            self._cities, self._grams, self._route_ids = {}, {}, set()
+            for route in routes:
+                self.add_route(route)
+            if self._route_ids != route_ids:
+                self.version += 1
+            self.loaded = True
+
+    async def ensure_loaded(self, conn: asyncpg.Connection):
+        if not self.loaded:
+            await self.load(conn)
+
+    def add_route(self, route: dict):
+        """Index a route's origin and destination"""
+        if route['id'] not in self._route_ids:
+            self._route_ids.add(route['id'])
+            self.version += 1
+        self._city(route['origin']).origin_routes.add(route['id'])
+        self._city(route['destination']).destination_routes.add(route['id'])
+
+    def _city(self, name: str) -> City:
+        key = normalize_city(name)
+        city = self._cities.get(key)
+        if city is None:
+            city = self._cities[key] = City(name.strip(), key)
+            for gram in city.grams:
+                self._grams.setdefault(gram, set()).add(key)
+        return city
+
+    def _candidates(self, key: str) -> List[City]:
+        """Cities sharing a trigram with the key; every city for keys too short to have inner trigrams"""
+        if len(key) < 3:
+            return list(self._cities.values())
+        keys = set()
+        for gram in _trigrams(key):
+            keys |= self._grams.get(gram, set())
+        return [self._cities[k] for k in keys]
+
+    def search(self, q: str, limit: int = 10) -> List[dict]:
+        """Cities matching an autocomplete query, best first"""
+        key = normalize_city(q)
+        if not key:
+            return []
+        grams = _trigrams(key)
+        matches = []
+        for city in self._candidates(key):
+            similarity = len(grams & city.grams) / len(grams | city.grams)
+            if city.key.startswith(key):
+                score = 2 + similarity
+            elif key in city.key:
+                score = 1 + similarity
+            elif similarity >= MIN_SIMILARITY:
+                score = similarity
+            else:
+                continue
+            matches.append((score, city))
+        matches.sort(key=lambda match: (-match[0], match[1].name))
+        return [
+            {
+                "city": city.name,
+                "origin_routes": len(city.origin_routes),
+                "destination_routes": len(city.destination_routes),
+                "score": round(score, 3)
+            }
+            for score, city in matches[:limit]
+        ]
+
+    def _routes_matching(self, text: str, role: str) -> Set[UUID]:
+        """Routes whose origin/destination city contains the (normalized) text"""
+        key = normalize_city(text)
+        routes: Set[UUID] = set()
+        for city in self._candidates(key):
+            if key in city.key:
+                routes |= getattr(city, role)
+        return routes
+
+    async def resolve_route_ids(
+        self,
+        conn: asyncpg.Connection,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None
+    ) -> Optional[Set[UUID]]:
+        """IDs of the routes matching origin/destination text, None when neither is given"""
+        if not origin and not destination:
+            return None
+        await self.ensure_loaded(conn)
+        route_ids = None
+        if origin:
+            route_ids = self._routes_matching(origin, "origin_routes")
+        if destination:
+            matching = self._routes_matching(destination, "destination_routes")
+            route_ids = matching if route_ids is None else route_ids & matching
+        return route_ids
+
+
+route_search = RouteSearchIndex()
@@ -0,0 +1,130 @@
+import sys
+import time
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+from uuid import UUID
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Histogram
+
+requests = Counter(
+    "search_cache_requests_total",
+    "Available-trip search cache lookups",
+    ["result"]
+)
+entries = Gauge(
+    "search_cache_entries",
+    "Available-trip search results cached by this worker"
+)
+size = Gauge(
+    "search_cache_bytes",
+    "Approximate memory held by cached available-trip search results"
+)
+hit_age = Histogram(
+    "search_cache_hit_age_seconds",
+    "Age of the cached available-trip search results served",
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+)
+
+
+def _size_of(value: Any) -> int:
+    """Rough deep size of a result built from dicts, lists and scalars"""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_size_of(k) + _size_of(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_size_of(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class SearchToken:
+    """Route versions seen before a result was computed"""
+    __slots__ = ("routes", "versions")
+
+    def __init__(self, routes: Optional[Tuple[UUID, ...]], versions: Tuple[int, ...]):
+        self.routes = routes
+        self.versions = versions
+
+
+class SearchCache:
+    """Per-worker LRU/TTL cache of available-trip search results.
+
+    Every route has a version counter that is bumped whenever a seat on one
+    of its trips changes state; an entry is only served while the versions of
+    its routes are the ones it was computed under. Results not filtered by
+    route depend on the version of all routes (the None key).
+    """
+
+    def __init__(self):
+        self._entries = TTLCache(settings.search_cache_size, settings.search_cache_seconds)
+        self._versions: Dict[Optional[UUID], int] = {}
+        # Bumped when changes may have been missed; invalidates every entry
+        self._epoch = 0
+        entries.set_function(lambda: {(): len(self._entries)})
+        size.set_function(lambda: {(): sum(entry[2] for entry in self._entries.values())})
+
+    @property
+    def enabled(self) -> bool:
+        return settings.search_cache_seconds > 0
+
+    def _versions_of(self, routes: Optional[Tuple[UUID, ...]]) -> Tuple[int, ...]:
+        if routes is None:
+            return self._epoch, self._versions.get(None, 0)
+        return (self._epoch, *(self._versions.get(route_id, 0) for route_id in routes))
+
+    def token(self, route_ids: Optional[Set[UUID]]) -> SearchToken:
+        """Capture the route versions; take it before reading the data to be cached"""
+        routes = tuple(sorted(route_ids)) if route_ids is not None else None
+        return SearchToken(routes, self._versions_of(routes))
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached result, None on a miss or when a seat on its routes changed since"""
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            requests.inc(result="miss")
+            return None
+        result, token, _, created_at = entry
+        if self._versions_of(token.routes) != token.versions:
+            self._entries.pop(key)
+            requests.inc(result="stale")
+            return None
+        requests.inc(result="hit")
+        hit_age.observe(time.monotonic() - created_at)
+        return result
+
+    def set(self, key: Hashable, token: SearchToken, result: Any):
+        if not self.enabled:
+            return
+        if self._versions_of(token.routes) != token.versions:
+            # A seat changed while the result was computed
+            return
+        self._entries.set(key, (result, token, _size_of(result), time.monotonic()))
+
+    def route_changed(self, route_id: UUID):
+        """A seat on one of the route's trips changed state"""
+        self._versions[route_id] = self._versions.get(route_id, 0) + 1
+        self._versions[None] = self._versions.get(None, 0) + 1
+
+    def invalidate_all(self):
+        self._epoch += 1
+
+    def status(self) -> dict:
+        """Hit rate, staleness and memory of the cache"""
+        hits = int(requests.get(result="hit"))
+        misses = int(requests.get(result="miss"))
+        stale = int(requests.get(result="stale"))
+        lookups = hits + misses + stale
+        age = hit_age.summary()
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": sum(entry[2] for entry in self._entries.values()),
+            "hits": hits,
+            "misses": misses,
+            "stale": stale,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "mean_hit_age_ms": age["mean"] * 1000
+        }
+
+
+search_cache = SearchCache()
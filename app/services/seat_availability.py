@@ -0,0 +1,311 @@
+import asyncio
+import asyncpg
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import UUID
+from app.repositories.trip_repository import TripRepository
+from app.services.search_cache import search_cache
+
+
+class TripSeats:
+    """Seat layout of one trip with held/booked bitsets (bit i = i-th seat)"""
+    __slots__ = (
+        "info", "route_id", "seat_ids", "seat_numbers",
+        "prices", "price_order", "held", "booked", "held_until", "next_expiry",
+        "flash_sale"
+    )
+
+    def __init__(self, info: dict, route_id: UUID):
+        self.info = info
+        self.route_id = route_id
+        self.seat_ids: List[UUID] = []
+        self.seat_numbers: List[int] = []
+        self.prices: List[int] = []
+        # Seat positions ordered by (price, seat_number)
+        self.price_order: List[int] = []
+        self.held = 0
+        self.booked = 0
+        self.held_until: Dict[int, datetime] = {}
+        self.next_expiry: Optional[datetime] = None
+        self.flash_sale = False
+
+    def add_seat(self, seat_id: UUID, seat_number: int, price: int) -> int:
+        """Append a seat and return its bit position"""
+        self.seat_ids.append(seat_id)
+        self.seat_numbers.append(seat_number)
+        self.prices.append(price)
+        return len(self.seat_ids) - 1
+
+    def finalize(self):
+        """Precompute the price ordering once all seats are added"""
+        self.price_order = sorted(
+            range(len(self.seat_ids)),
+            key=lambda p: (self.prices[p], self.seat_numbers[p])
+        )
+
+    def hold(self, position: int, expires_at: datetime):
+        self.held |= 1 << position
+        self.held_until[position] = expires_at
+        if self.next_expiry is None or expires_at < self.next_expiry:
+            self.next_expiry = expires_at
+
+    def release_hold(self, position: int):
+        self.held &= ~(1 << position)
+        self.held_until.pop(position, None)
+
+    def book(self, position: int):
+        self.release_hold(position)
+        self.booked |= 1 << position
+
+    def release_booking(self, position: int):
+        self.booked &= ~(1 << position)
+
+    def expire_holds(self, now: datetime):
+        """Drop holds whose expiry has passed"""
+        if self.next_expiry is None or self.next_expiry > now:
+            return
+        for position, until in list(self.held_until.items()):
+            if until <= now:
+                self.release_hold(position)
+        self.next_expiry = min(self.held_until.values(), default=None)
+
+    def status(self, position: int, now: datetime) -> str:
+        if self.booked >> position & 1:
+            return "booked"
+        self.expire_holds(now)
+        return "held" if self.held >> position & 1 else "free"
+
+    def seat(self, position: int, now: datetime) -> dict:
+        return {
+            "seat_id": self.seat_ids[position],
+            "seat_number": self.seat_numbers[position],
+            "price": self.prices[position],
+            "status": self.status(position, now)
+        }
+
+    def available_mask(self, now: datetime) -> int:
+        self.expire_holds(now)
+        return ((1 << len(self.seat_ids)) - 1) & ~(self.held | self.booked)
+
+
+class SeatAvailabilityIndex:
+    """In-process seat availability of all active trips.
+
+    Loaded from the database at startup and periodically reloaded; the booking
+    paths update it as seats are held, booked and released so searches can be
+    answered without querying seat state.
+    """
+
+    def __init__(self):
+        self._trips: Dict[UUID, TripSeats] = {}
+        self._seats: Dict[UUID, Tuple[TripSeats, int]] = {}
+        # Mutations made while a reload is in flight, replayed onto the new state
+        self._journal: Optional[list] = None
+        self._lock = asyncio.Lock()
+        self.loaded = False
+
+    async def load(self, conn: asyncpg.Connection):
+        """(Re)build the index from the database.
+
+        Departed trips are left out, so every reload also drops the trips
+        that left since the previous one.
+        """
+        async with self._lock:
+            self._journal = []
+            try:
+                rows = await TripRepository.get_active_seat_states(conn)
+                trips, seats = self._build(rows)
+            finally:
+                journal, self._journal = self._journal, None
+            self._trips, self._seats = trips, seats
+            for mutation, args in journal:
+                mutation(*args)
+            self.loaded = True
+        # The reload may bring changes no seat event announced
+        search_cache.invalidate_all()
+
+    @staticmethod
+    def _build(rows: List[dict]):
+        trips: Dict[UUID, TripSeats] = {}
+        seats: Dict[UUID, Tuple[TripSeats, int]] = {}
+        for row in rows:
+            trip = trips.get(row['trip_id'])
+            if trip is None:
+                trip = trips[row['trip_id']] = TripSeats({
+                    "trip_id": row['trip_id'],
+                    "bus_id": row['bus_id'],
+                    "plate_number": row['plate_number'],
+                    "departure_time": row['departure_time'],
+                    "arrival_time": row['arrival_time'],
+                    "origin": row['origin'],
+                    "destination": row['destination'],
+                }, row['route_id'])
+                trip.flash_sale = row['flash_sale']
+            position = trip.add_seat(row['seat_id'], row['seat_number'], row['price'])
+            seats[row['seat_id']] = (trip, position)
+            if row['booked']:
+                trip.book(position)
+            elif row['held_until'] is not None:
+                trip.hold(position, row['held_until'])
+        for trip in trips.values():
+            trip.finalize()
+        return trips, seats
+
+    def _apply(self, mutation, *args):
+        if self._journal is not None:
+            self._journal.append((mutation, args))
+        mutation(*args)
+
+    def _seat_changed(self, seat_id: UUID):
+        """Drop cached searches that may include the seat's trip"""
+        entry = self._seats.get(seat_id)
+        if entry is None:
+            # A trip not indexed yet can still be in SQL-served summaries
+            search_cache.invalidate_all()
+        else:
+            search_cache.route_changed(entry[0].route_id)
+
+    def inventory_changed(self, trip_id: UUID):
+        """trip_inventory caught up with the trip's seats: drop summaries cached before that"""
+        trip = self._trips.get(trip_id)
+        if trip is None:
+            search_cache.invalidate_all()
+        else:
+            search_cache.route_changed(trip.route_id)
+
+    def _hold(self, seat_id: UUID, expires_at: datetime):
+        entry = self._seats.get(seat_id)
+        if entry:
+            entry[0].hold(entry[1], expires_at)
+
+    def _release_hold(self, seat_id: UUID):
+        entry = self._seats.get(seat_id)
+        if entry:
+            entry[0].release_hold(entry[1])
+
+    def _book(self, seat_id: UUID):
+        entry = self._seats.get(seat_id)
+        if entry:
+            entry[0].book(entry[1])
+
+    def _release_booking(self, seat_id: UUID):
+        entry = self._seats.get(seat_id)
+        if entry:
+            entry[0].release_booking(entry[1])
+
+    def _set_flash_sale(self, trip_id: UUID, enabled: bool):
+        trip = self._trips.get(trip_id)
+        if trip:
+            trip.flash_sale = enabled
+
+    def mark_held(self, seat_id: UUID, expires_at: datetime):
+        """Seat got a temporary reservation until expires_at"""
+        self._apply(self._hold, seat_id, expires_at)
+        self._seat_changed(seat_id)
+
+    def mark_booked(self, seat_id: UUID):
+        """Seat got a confirmed booking"""
+        self._apply(self._book, seat_id)
+        self._seat_changed(seat_id)
+
+    def release_hold(self, seat_id: UUID):
+        """Seat's reservation was cancelled or expired"""
+        self._apply(self._release_hold, seat_id)
+        self._seat_changed(seat_id)
+
+    def release_booking(self, seat_id: UUID):
+        """Seat's booking was cancelled"""
+        self._apply(self._release_booking, seat_id)
+        self._seat_changed(seat_id)
+
+    def set_flash_sale(self, trip_id: UUID, enabled: bool):
+        """Trip's flash-sale mode was switched"""
+        self._apply(self._set_flash_sale, trip_id, enabled)
+
+    def is_flash_sale(self, trip_id: UUID) -> bool:
+        trip = self._trips.get(trip_id)
+        return trip is not None and trip.flash_sale
+
+    def free_seat_count(self, trip_id: UUID) -> Optional[int]:
+        """Number of free seats of a trip, None if the trip is not indexed"""
+        trip = self._trips.get(trip_id)
+        if trip is None:
+            return None
+        return bin(trip.available_mask(datetime.now(timezone.utc))).count("1")
+
+    def is_seat_free(self, seat_id: UUID) -> Optional[bool]:
+        """Whether a seat is neither held nor booked, None if it is not indexed"""
+        entry = self._seats.get(seat_id)
+        if entry is None:
+            return None
+        trip, position = entry
+        return bool(trip.available_mask(datetime.now(timezone.utc)) >> position & 1)
+
+    def has_trip(self, trip_id: UUID) -> bool:
+        return trip_id in self._trips
+
+    def trip_info(self, trip_id: UUID) -> Optional[dict]:
+        trip = self._trips.get(trip_id)
+        return trip.info if trip else None
+
+    def seat_map(self, trip_id: UUID) -> Optional[List[dict]]:
+        """Every seat of a trip with its status, None if the trip is not indexed"""
+        trip = self._trips.get(trip_id)
+        if trip is None:
+            return None
+        now = datetime.now(timezone.utc)
+        return [trip.seat(position, now) for position in range(len(trip.seat_ids))]
+
+    def seat_state(self, seat_id: UUID) -> Optional[Tuple[UUID, dict]]:
+        """(trip_id, seat with its status) of one seat, None if it is not indexed"""
+        entry = self._seats.get(seat_id)
+        if entry is None:
+            return None
+        trip, position = entry
+        return trip.info['trip_id'], trip.seat(position, datetime.now(timezone.utc))
+
+    def expire_holds(self):
+        """Drop every hold whose expiry has passed"""
+        now = datetime.now(timezone.utc)
+        for trip in self._trips.values():
+            trip.expire_holds(now)
+
+    def available_trips(
+        self,
+        departure_from: datetime,
+        departure_to: datetime,
+        route_ids: Optional[Set[UUID]] = None,
+        sort_by: Optional[str] = None
+    ) -> List[dict]:
+        """Available trips departing in [departure_from, departure_to) with their free seats (unordered)"""
+        now = datetime.now(timezone.utc)
+
+        results = []
+        for trip in self._trips.values():
+            departure_time = trip.info['departure_time']
+            if not departure_from <= departure_time < departure_to or departure_time <= now:
+                continue
+            if route_ids is not None and trip.route_id not in route_ids:
+                continue
+            mask = trip.available_mask(now)
+            if not mask:
+                continue
+            order = reversed(trip.price_order) if sort_by == "price_desc" else trip.price_order
+            seats = [
+                {
+                    "seat_id": trip.seat_ids[p],
+                    "seat_number": trip.seat_numbers[p],
+                    "price": trip.prices[p]
+                }
+                for p in order if mask >> p & 1
+            ]
+            results.append({
+                **trip.info,
+                "available_seats": seats,
+                "min_price": min(seat['price'] for seat in seats),
+                "max_price": max(seat['price'] for seat in seats)
+            })
+        return results
+
+
+seat_availability = SeatAvailabilityIndex()
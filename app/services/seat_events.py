@@ -0,0 +1,141 @@
+import asyncio
+import asyncpg
+import json
+from datetime import datetime
+from typing import Dict, Optional, Set
+from uuid import UUID
+from app.core.config import settings
+from app.core.database import Database
+from app.services.seat_availability import seat_availability
+
+CHANNEL = "seat_events"
+# trip_inventory recounts, which summary searches read
+INVENTORY_CHANNEL = "trip_inventory"
+# How often the idle LISTEN connection is probed, and the wait before reconnecting
+HEALTH_CHECK_SECONDS = 30
+RECONNECT_SECONDS = 2
+
+
+class SeatEventHub:
+    """Per-worker fan-out of seat state changes.
+
+    Holds one LISTEN connection for the seat_events channel, applies every
+    change to the seat availability index and forwards it to the subscribers
+    of the trip. Each subscriber gets a queue that starts with the trip's
+    seat map and then receives seat deltas. The same connection hears the
+    trip_inventory recounts that summary searches depend on.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[UUID, Set[asyncio.Queue]] = {}
+        self._task: Optional[asyncio.Task] = None
+        # Whether the LISTEN connection is up; subscribers hear nothing while it is not
+        self.listening = False
+
+    def subscribe(self, trip_id: UUID) -> Optional[asyncio.Queue]:
+        """Queue of seat-map messages for a trip, None if the trip is not indexed"""
+        snapshot = self._snapshot(trip_id)
+        if snapshot is None:
+            return None
+        queue = asyncio.Queue(maxsize=settings.seat_events_subscriber_buffer)
+        queue.put_nowait(snapshot)
+        self._subscribers.setdefault(trip_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, trip_id: UUID, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(trip_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[trip_id]
+
+    @staticmethod
+    def _snapshot(trip_id: UUID) -> Optional[dict]:
+        seats = seat_availability.seat_map(trip_id)
+        if seats is None:
+            return None
+        return {"type": "snapshot", "trip_id": trip_id, "seats": seats}
+
+    def _publish(self, trip_id: UUID, message: dict):
+        for queue in self._subscribers.get(trip_id, ()):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A slow subscriber gets a fresh seat map instead of the backlog
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self._snapshot(trip_id))
+
+    def _on_notification(self, conn, pid, channel, payload):
+        event = json.loads(payload)
+        seat_id = UUID(event['seat_id'])
+        if event['event'] == "held":
+            seat_availability.mark_held(seat_id, datetime.fromisoformat(event['expires_at']))
+        elif event['event'] == "released":
+            seat_availability.release_hold(seat_id)
+        elif event['event'] == "booked":
+            seat_availability.mark_booked(seat_id)
+        elif event['event'] == "unbooked":
+            seat_availability.release_booking(seat_id)
+
+        state = seat_availability.seat_state(seat_id)
+        if state is not None and state[0] in self._subscribers:
+            trip_id, seat = state
+            self._publish(trip_id, {"type": "seat", "trip_id": trip_id, **seat})
+
+    def _on_inventory_notification(self, conn, pid, channel, payload):
+        seat_availability.inventory_changed(UUID(payload))
+
+    async def _resync(self):
+        """Reload the index and resend seat maps after notifications may have been missed"""
+        async with Database.acquire("read", primary=True) as conn:
+            await seat_availability.load(conn)
+        for trip_id in list(self._subscribers):
+            snapshot = self._snapshot(trip_id)
+            if snapshot is not None:
+                self._publish(trip_id, snapshot)
+
+    async def _listen(self):
+        connected_before = False
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(settings.database_url)
+                lost = asyncio.Event()
+                conn.add_termination_listener(lambda _: lost.set())
+                await conn.add_listener(CHANNEL, self._on_notification)
+                await conn.add_listener(INVENTORY_CHANNEL, self._on_inventory_notification)
+                if connected_before:
+                    await self._resync()
+                connected_before = True
+                self.listening = True
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), timeout=HEALTH_CHECK_SECONDS)
+                    except asyncio.TimeoutError:
+                        await conn.execute("SELECT 1")
+            except Exception as e:
+                print(f"Error listening for seat events: {e}")
+            finally:
+                self.listening = False
+                if conn is not None:
+                    conn.terminate()
+            await asyncio.sleep(RECONNECT_SECONDS)
+
+    def start(self):
+        """Start listening for seat events"""
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        """Stop listening and drop the LISTEN connection"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+seat_events = SeatEventHub()
@@ -0,0 +1,91 @@
+from typing import List, Optional
+from uuid import UUID
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import Database
+from app.core.metrics import Counter, Gauge
+from app.repositories.user_repository import UserRepository
+
+requests = Counter(
+    "user_cache_requests_total",
+    "Authenticated-user cache lookups, by record (user, profiles) and result",
+    ["record", "result"]
+)
+entries = Gauge(
+    "user_cache_entries",
+    "Users cached by this worker"
+)
+
+
+class CachedUser:
+    __slots__ = ("user", "profiles")
+
+    def __init__(self, user: dict):
+        self.user = user
+        self.profiles: Optional[List[str]] = None
+
+
+class UserCache:
+    """Per-worker LRU/TTL cache of authenticated users and their profile types.
+
+    Profile changes made by this worker drop the user's entry; the TTL bounds
+    how long changes made elsewhere (other workers, the seeders) go unseen.
+    Misses load from the primary: a lagging replica could otherwise put the
+    records from before a change back for a whole TTL.
+    """
+
+    def __init__(self):
+        self._entries = TTLCache(settings.user_cache_size, settings.user_cache_seconds)
+        # Bumped by every invalidation, so a lookup that raced one is not cached
+        self._generation = 0
+        entries.set_function(lambda: {(): len(self._entries)})
+
+    @property
+    def enabled(self) -> bool:
+        return settings.user_cache_seconds > 0
+
+    def _entry(self, user_id: UUID) -> Optional[CachedUser]:
+        return self._entries.get(user_id) if self.enabled else None
+
+    async def get_user(self, user_id: UUID) -> Optional[dict]:
+        """User record (without the password hash), None if there is no such user"""
+        entry = self._entry(user_id)
+        if entry is not None:
+            requests.inc(record="user", result="hit")
+            return dict(entry.user)
+        requests.inc(record="user", result="miss")
+
+        generation = self._generation
+        async with Database.acquire("read", primary=True) as conn:
+            user = await UserRepository.get_by_id(conn, user_id)
+        if user is not None and self.enabled and generation == self._generation:
+            self._entries.set(user_id, CachedUser(dict(user)))
+        return user
+
+    async def get_profile_types(self, user_id: UUID) -> List[str]:
+        """Names of the user's profiles (passenger, driver, ...)"""
+        entry = self._entry(user_id)
+        if entry is not None and entry.profiles is not None:
+            requests.inc(record="profiles", result="hit")
+            return entry.profiles
+        requests.inc(record="profiles", result="miss")
+
+        generation = self._generation
+        async with Database.acquire("read", primary=True) as conn:
+            profiles = await UserRepository.get_user_profiles(conn, user_id)
+        profile_types = [p['profile_type'] for p in profiles]
+        if entry is not None and generation == self._generation:
+            entry.profiles = profile_types
+        return profile_types
+
+    def invalidate(self, user_id: UUID):
+        """The user or their profiles changed"""
+        self._generation += 1
+        self._entries.pop(user_id)
+
+    def clear(self):
+        self._generation += 1
+        self._entries.clear()
+
+
+user_cache = UserCache()
@@ -0,0 +1,34 @@
+import asyncio
+from typing import Optional
+from app.core.config import settings
+from app.core.database import Database, replica_urls
+
+_task: Optional[asyncio.Task] = None
+
+
+async def monitor_replica_lag():
+    """Periodically measure replica lag so that lagging replicas are skipped"""
+    while True:
+        try:
+            await Database.check_replica_lag()
+        except Exception as e:
+            print(f"Error monitoring replica lag: {e}")
+        await asyncio.sleep(settings.replica_lag_check_seconds)
+
+
+def start_replica_lag_task():
+    """Start the background task for monitoring replica lag, if replicas are configured"""
+    global _task
+    if replica_urls():
+        _task = asyncio.create_task(monitor_replica_lag())
+
+
+async def stop_replica_lag_task():
+    """Stop the monitoring task"""
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
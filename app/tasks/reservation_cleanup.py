@@ -1,25 +1,101 @@
 import asyncio
-from app.core.database import Database
+import asyncpg
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from app.core.config import settings
 from app.repositories.booking_repository import BookingRepository
 
+# Advisory lock held by the worker that currently leads the expiry task
+EXPIRY_LEADER_LOCK_ID = 420_001
+# Shortest sleep between rounds, so a burst of expiries is handled in a few rounds
+MIN_SLEEP_SECONDS = 0.5
 
-async def cleanup_expired_reservations():
-    """Periodically clean up expired reservations"""
+_task: Optional[asyncio.Task] = None
+_stopping: Optional[asyncio.Event] = None
+
+
+async def purge_old_reservations(conn) -> int:
+    """Delete expired reservations past the retention in bounded batches"""
+    retention = timedelta(minutes=settings.reservation_retention_minutes)
+    batch_size = settings.reservation_purge_batch_size
+    total = 0
+    while True:
+        deleted = await BookingRepository.purge_expired_reservations(conn, retention, batch_size)
+        total += deleted
+        if deleted < batch_size or _stopping.is_set():
+            return total
+        # Let request handlers run between batches
+        await asyncio.sleep(0)
+
+
+async def expire_due_reservations(conn) -> int:
+    """Expire every overdue reservation in bounded batches"""
+    batch_size = settings.reservation_expiry_batch_size
+    total = 0
     while True:
+        expired = await BookingRepository.expire_reservations(conn, batch_size)
+        total += expired
+        if expired < batch_size or _stopping.is_set():
+            return total
+        await asyncio.sleep(0)
+
+
+async def _sleep(seconds: float):
+    """Sleep, waking up early when the task is being stopped"""
+    try:
+        await asyncio.wait_for(_stopping.wait(), timeout=seconds)
+    except asyncio.TimeoutError:
+        pass
+
+
+async def _lead(conn: asyncpg.Connection):
+    """Expire and purge reservations until stopped or the connection fails"""
+    while not _stopping.is_set():
+        count = await expire_due_reservations(conn)
+        if count > 0:
+            print(f"Expired {count} reservations")
+        purged = await purge_old_reservations(conn)
+        if purged > 0:
+            print(f"Purged {purged} old reservations")
+
+        # Sleep until the next hold expires; holds created meanwhile expire later
+        next_expiry = await BookingRepository.get_next_reservation_expiry(conn)
+        delay = settings.reservation_expiry_max_sleep_seconds
+        if next_expiry is not None:
+            until_expiry = (next_expiry - datetime.now(timezone.utc)).total_seconds()
+            delay = max(MIN_SLEEP_SECONDS, min(delay, until_expiry))
+        await _sleep(delay)
+
+
+async def cleanup_expired_reservations():
+    """Expire and purge reservations while this worker holds the expiry leadership"""
+    while not _stopping.is_set():
+        conn = None
         try:
-            pool = await Database.get_pool()
-            async with pool.acquire() as conn:
-                count = await BookingRepository.expire_reservations(conn)
-                if count > 0:
-                    print(f"Expired {count} reservations")
+            # A dedicated connection: pooled ones drop advisory locks on release
+            conn = await asyncpg.connect(settings.database_url)
+            if await conn.fetchval("SELECT pg_try_advisory_lock($1)", EXPIRY_LEADER_LOCK_ID):
+                print("Leading reservation expiry")
+                await _lead(conn)
         except Exception as e:
             print(f"Error cleaning up reservations: {e}")
-        
-        # Run every minute
-        await asyncio.sleep(60)
+        finally:
+            if conn is not None:
+                # Ending the session releases the leadership
+                conn.terminate()
+        await _sleep(settings.reservation_expiry_leader_retry_seconds)
 
 
 def start_reservation_cleanup_task():
     """Start the background task for cleaning up expired reservations"""
-    asyncio.create_task(cleanup_expired_reservations())
+    global _task, _stopping
+    _stopping = asyncio.Event()
+    _task = asyncio.create_task(cleanup_expired_reservations())
+
 
+async def stop_reservation_cleanup_task():
+    """Stop the cleanup task after its current batch and release the leadership"""
+    if _task is None:
+        return
+    _stopping.set()
+    await _task
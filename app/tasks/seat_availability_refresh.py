@@ -0,0 +1,40 @@
+import asyncio
+from typing import Optional
+from app.core.config import settings
+from app.core.database import Database
+from app.services.route_search import route_search
+from app.services.seat_availability import seat_availability
+
+_task: Optional[asyncio.Task] = None
+
+
+async def refresh_seat_availability():
+    """Periodically reload the seat availability and route search indexes.
+
+    Picks up new trips/seats/routes and changes made by other workers.
+    """
+    while True:
+        await asyncio.sleep(settings.seat_index_refresh_seconds)
+        try:
+            async with Database.acquire("read", primary=True) as conn:
+                await seat_availability.load(conn)
+                await route_search.load(conn)
+        except Exception as e:
+            print(f"Error refreshing seat availability index: {e}")
+
+
+def start_seat_availability_refresh_task():
+    """Start the background task for refreshing the seat availability index"""
+    global _task
+    _task = asyncio.create_task(refresh_seat_availability())
+
+
+async def stop_seat_availability_refresh_task():
+    """Stop the refresh task"""
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
@@ -0,0 +1,40 @@
+import asyncio
+from typing import Optional
+from app.core.config import settings
+from app.core.database import Database
+from app.repositories.trip_repository import TripRepository
+
+_task: Optional[asyncio.Task] = None
+
+
+async def refresh_trip_inventory():
+    """Periodically recount the trips whose seats changed since the last run.
+
+    Every worker runs it; concurrent runs skip each other's queued changes.
+    """
+    while True:
+        await asyncio.sleep(settings.trip_inventory_refresh_seconds)
+        try:
+            async with Database.acquire() as conn:
+                batch_size = settings.trip_inventory_refresh_batch_size
+                while await TripRepository.drain_trip_inventory_changes(conn, batch_size) >= batch_size:
+                    pass
+        except Exception as e:
+            print(f"Error refreshing trip inventory: {e}")
+
+
+def start_trip_inventory_refresh_task():
+    """Start the background task for refreshing trip_inventory"""
+    global _task
+    _task = asyncio.create_task(refresh_trip_inventory())
+
+
+async def stop_trip_inventory_refresh_task():
+    """Stop the refresh task"""
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
@@ -0,0 +1,8 @@
+import os
+
+# Settings are read on import; these tests need no database, SMS gateway or .env
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/bus_fleet_test")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+os.environ.setdefault("IPPANEL_API_KEY", "test-key")
+os.environ.setdefault("DEBUG", "false")
+os.environ.setdefault("APP_NAME", "Bus Fleet Management System")
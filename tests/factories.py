@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID, uuid4
+
+
+def seat_row(
+    trip_id: UUID,
+    departure_time: datetime,
+    seat_number: int,
+    price: int,
+    route_id: Optional[UUID] = None,
+    booked: bool = False,
+    held_until: Optional[datetime] = None
+) -> dict:
+    """One row of TripRepository.get_active_seat_states()"""
+    return {
+        "trip_id": trip_id,
+        "bus_id": uuid4(),
+        "plate_number": "12A345",
+        "departure_time": departure_time,
+        "arrival_time": departure_time + timedelta(hours=5),
+        "origin": "Tehran",
+        "destination": "Isfahan",
+        "route_id": route_id,
+        "flash_sale": False,
+        "seat_id": uuid4(),
+        "seat_number": seat_number,
+        "price": price,
+        "booked": booked,
+        "held_until": held_until,
+    }
+
+
+def in_days(days: float) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(days=days)
@@ -0,0 +1,70 @@
+import pytest
+from app.core import cache
+from app.core.cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_get_returns_default_on_miss():
+    entries = TTLCache(maxsize=2, ttl=10)
+    assert entries.get("a") is None
+    assert entries.get("a", 0) == 0
+
+
+def test_entries_expire_after_ttl(clock):
+    entries = TTLCache(maxsize=2, ttl=10)
+    entries.set("a", 1)
+    clock[0] += 9.9
+    assert entries.get("a") == 1
+    clock[0] += 0.1
+    assert entries.get("a") is None
+    assert len(entries) == 0
+
+
+def test_evicts_least_recently_used(clock):
+    entries = TTLCache(maxsize=2, ttl=10)
+    entries.set("a", 1)
+    entries.set("b", 2)
+    entries.get("a")
+    entries.set("c", 3)
+    assert entries.get("b") is None
+    assert entries.get("a") == 1
+    assert entries.get("c") == 3
+
+
+def test_set_refreshes_expiry(clock):
+    entries = TTLCache(maxsize=2, ttl=10)
+    entries.set("a", 1)
+    clock[0] += 5
+    entries.set("a", 2)
+    clock[0] += 9
+    assert entries.get("a") == 2
+
+
+def test_values_skip_expired_entries(clock):
+    entries = TTLCache(maxsize=3, ttl=10)
+    entries.set("a", 1)
+    clock[0] += 5
+    entries.set("b", 2)
+    entries.set("c", 3)
+    entries.get("b")
+    assert entries.values() == [1, 3, 2]
+    clock[0] += 5
+    assert entries.values() == [3, 2]
+
+
+def test_pop_and_clear():
+    entries = TTLCache(maxsize=3, ttl=10)
+    entries.set("a", 1)
+    entries.set("b", 2)
+    entries.pop("a")
+    entries.pop("missing")
+    assert entries.get("a") is None
+    assert len(entries) == 1
+    entries.clear()
+    assert len(entries) == 0
@@ -0,0 +1,68 @@
+import asyncio
+from contextlib import asynccontextmanager
+import pytest
+from app.core import database
+from app.core.database import LazyConnection
+
+
+class FakeConnection:
+    def __init__(self, number: int):
+        self.number = number
+
+    async def fetchval(self, query, *args, column=0, timeout=None):
+        return self.number
+
+    @asynccontextmanager
+    async def _transaction(self):
+        yield self
+
+    def transaction(self, **kwargs):
+        return self._transaction()
+
+
+@pytest.fixture
+def checkouts(monkeypatch):
+    checkouts = []
+
+    @asynccontextmanager
+    async def acquire(name="booking", user_id=None, primary=False):
+        checkouts.append((name, user_id, primary))
+        yield FakeConnection(len(checkouts))
+
+    monkeypatch.setattr(database.Database, "acquire", acquire)
+    return checkouts
+
+
+def test_no_query_no_checkout(checkouts):
+    LazyConnection("read")
+    assert checkouts == []
+
+
+def test_each_query_checks_out_its_own_connection(checkouts):
+    conn = LazyConnection("read", user_id="u1")
+
+    async def main():
+        return await conn.fetchval("SELECT 1"), await conn.fetchval("SELECT 1")
+
+    assert asyncio.run(main()) == (1, 2)
+    assert checkouts == [("read", "u1", False), ("read", "u1", False)]
+
+
+def test_transaction_pins_one_primary_connection(checkouts):
+    conn = LazyConnection("read")
+
+    async def main():
+        async with conn.transaction():
+            first = await conn.fetchval("SELECT 1")
+            async with conn.transaction():
+                nested = await conn.fetchval("SELECT 1")
+            after_nested = await conn.fetchval("SELECT 1")
+        return first, nested, after_nested, await conn.fetchval("SELECT 1")
+
+    assert asyncio.run(main()) == (1, 1, 1, 2)
+    assert checkouts == [("read", None, True), ("read", None, False)]
+
+
+def test_cursor_needs_a_transaction(checkouts):
+    with pytest.raises(Exception, match="outside of a transaction"):
+        LazyConnection().cursor("SELECT 1")
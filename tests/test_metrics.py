@@ -0,0 +1,69 @@
+import pytest
+from app.core.metrics import Counter, Gauge, Histogram, registry
+
+
+def _lines(name: str) -> list:
+    return [line for line in registry.exposition().splitlines() if name in line]
+
+
+def test_counter_exposition():
+    requests = Counter("test_requests_total", "Requests handled", ["method", "status"])
+    requests.inc(method="GET", status=200)
+    requests.inc(2, method="GET", status=200)
+    requests.inc(method="POST", status=500)
+    assert requests.get(method="GET", status="200") == 3
+    assert _lines("test_requests_total") == [
+        "# HELP test_requests_total Requests handled",
+        "# TYPE test_requests_total counter",
+        'test_requests_total{method="GET",status="200"} 3.0',
+        'test_requests_total{method="POST",status="500"} 1.0',
+    ]
+
+
+def test_gauge_exposition_and_function():
+    depth = Gauge("test_queue_depth", "Queue depth")
+    depth.set(3)
+    depth.dec()
+    assert _lines("test_queue_depth")[2:] == ["test_queue_depth 2"]
+    depth.set_function(lambda: {(): 7.5})
+    assert _lines("test_queue_depth")[2:] == ["test_queue_depth 7.5"]
+
+
+def test_labels_and_help_are_escaped():
+    gauge = Gauge("test_escaped", 'Line one\nline "two" \\ end', ["path"])
+    gauge.set(1, path='a"b\\c\nd')
+    assert _lines("test_escaped") == [
+        '# HELP test_escaped Line one\\nline "two" \\\\ end',
+        "# TYPE test_escaped gauge",
+        'test_escaped{path="a\\"b\\\\c\\nd"} 1',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    latency = Histogram("test_latency_seconds", "Latency", ["route"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        latency.observe(value, route="/x")
+    assert _lines("test_latency_seconds")[2:] == [
+        'test_latency_seconds_bucket{route="/x",le="0.1"} 2',
+        'test_latency_seconds_bucket{route="/x",le="1.0"} 3',
+        'test_latency_seconds_bucket{route="/x",le="+Inf"} 4',
+        'test_latency_seconds_sum{route="/x"} 2.65',
+        'test_latency_seconds_count{route="/x"} 4',
+    ]
+    assert latency.summary(route="/x") == {"count": 4, "sum": 2.65, "mean": 2.65 / 4}
+
+
+def test_failing_gauge_function_skips_only_that_metric():
+    broken = Gauge("test_broken", "Broken")
+    broken.set_function(lambda: 1 / 0)
+    healthy = Gauge("test_healthy", "Healthy")
+    healthy.set(1)
+    exposition = registry.exposition()
+    assert "test_broken" not in exposition
+    assert "test_healthy 1" in exposition
+
+
+def test_duplicate_registration_is_rejected():
+    Counter("test_duplicate_total", "First")
+    with pytest.raises(ValueError):
+        Counter("test_duplicate_total", "Second")
@@ -0,0 +1,86 @@
+import asyncio
+from contextlib import asynccontextmanager
+from uuid import uuid4
+import asyncpg
+import pytest
+from app.core.config import settings
+from app.schemas.booking import ReserveSeatRequest
+from app.services import reservation_batcher as batcher_module
+from app.services.reservation_batcher import ReservationBatcher
+
+
+def _request() -> ReserveSeatRequest:
+    return ReserveSeatRequest(
+        trip_id=uuid4(), seat_id=uuid4(), first_name="a", last_name="b", national_id="1234567890", gender=True
+    )
+
+
+@pytest.fixture
+def service(monkeypatch):
+    @asynccontextmanager
+    async def acquire(*args, **kwargs):
+        yield None
+
+    monkeypatch.setattr(batcher_module.Database, "acquire", acquire)
+    monkeypatch.setattr(settings, "reservation_batch_max_size", 3)
+    monkeypatch.setattr(settings, "reservation_batch_retries", 2)
+    return batcher_module.BookingService
+
+
+def _reserve_all(requests) -> list:
+    batcher = ReservationBatcher()
+
+    async def main():
+        return await asyncio.gather(
+            *(batcher.reserve_seat(uuid4(), request) for request in requests), return_exceptions=True
+        )
+
+    return asyncio.run(main())
+
+
+def test_batch_outcomes_go_to_their_callers(service, monkeypatch):
+    async def reserve_seats_batch(conn, claims):
+        return [{"seat_id": request.seat_id} for _, request in claims[:-1]] + [ValueError("Seat is already reserved")]
+
+    monkeypatch.setattr(service, "reserve_seats_batch", staticmethod(reserve_seats_batch))
+    requests = [_request() for _ in range(3)]
+    results = _reserve_all(requests)
+    assert results[:2] == [{"seat_id": requests[0].seat_id}, {"seat_id": requests[1].seat_id}]
+    assert isinstance(results[2], ValueError)
+
+
+def test_deadlocked_batch_is_retried(service, monkeypatch):
+    attempts = []
+
+    async def reserve_seats_batch(conn, claims):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise asyncpg.DeadlockDetectedError("deadlock detected")
+        return [{"seat_id": request.seat_id} for _, request in claims]
+
+    monkeypatch.setattr(service, "reserve_seats_batch", staticmethod(reserve_seats_batch))
+    requests = [_request() for _ in range(3)]
+    assert _reserve_all(requests) == [{"seat_id": request.seat_id} for request in requests]
+    assert len(attempts) == 2
+
+
+def test_batch_that_keeps_conflicting_is_resolved_per_caller(service, monkeypatch):
+    attempts = []
+
+    async def reserve_seats_batch(conn, claims):
+        attempts.append(1)
+        raise asyncpg.SerializationError("could not serialize access")
+
+    async def reserve_seat(conn, user_id, request):
+        if request is requests[1]:
+            raise ValueError("Seat is already reserved")
+        return {"seat_id": request.seat_id}
+
+    monkeypatch.setattr(service, "reserve_seats_batch", staticmethod(reserve_seats_batch))
+    monkeypatch.setattr(service, "reserve_seat", staticmethod(reserve_seat))
+    requests = [_request() for _ in range(3)]
+    results = _reserve_all(requests)
+    assert len(attempts) == 3
+    assert results[0] == {"seat_id": requests[0].seat_id}
+    assert isinstance(results[1], ValueError)
+    assert results[2] == {"seat_id": requests[2].seat_id}
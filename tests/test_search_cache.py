@@ -0,0 +1,72 @@
+from uuid import uuid4
+import pytest
+from app.core.config import settings
+from app.services.search_cache import SearchCache
+from app.services.seat_availability import SeatAvailabilityIndex
+from app.services import seat_availability as seat_availability_module
+from tests.factories import in_days, seat_row
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(settings, "search_cache_seconds", 30)
+    cache = SearchCache()
+    monkeypatch.setattr(seat_availability_module, "search_cache", cache)
+    return cache
+
+
+def test_hit_until_a_route_of_the_entry_changes(cache):
+    route, other_route = uuid4(), uuid4()
+    token = cache.token({route})
+    cache.set("key", token, ["page"])
+    cache.route_changed(other_route)
+    assert cache.get("key") == ["page"]
+    cache.route_changed(route)
+    assert cache.get("key") is None
+
+
+def test_unfiltered_entries_depend_on_every_route(cache):
+    cache.set("key", cache.token(None), ["page"])
+    cache.route_changed(uuid4())
+    assert cache.get("key") is None
+
+
+def test_result_computed_across_a_change_is_not_cached(cache):
+    route = uuid4()
+    token = cache.token({route})
+    cache.route_changed(route)
+    cache.set("key", token, ["page"])
+    assert cache.get("key") is None
+
+
+def test_invalidate_all(cache):
+    cache.set("key", cache.token({uuid4()}), ["page"])
+    cache.invalidate_all()
+    assert cache.get("key") is None
+
+
+def test_disabled_cache_stores_nothing(cache, monkeypatch):
+    monkeypatch.setattr(settings, "search_cache_seconds", 0)
+    cache.set("key", cache.token(None), ["page"])
+    assert cache.get("key") is None
+
+
+def test_inventory_recount_drops_summaries_cached_after_the_seat_event(cache):
+    route, other_route = uuid4(), uuid4()
+    trip_id = uuid4()
+    index = SeatAvailabilityIndex()
+    rows = [seat_row(trip_id, in_days(1), 1, 100, route)]
+    index._trips, index._seats = SeatAvailabilityIndex._build(rows)
+
+    # The seat event arrives first; a summary computed before the recount
+    # is cached under the new version with the old counts
+    index.mark_held(rows[0]['seat_id'], in_days(0.01))
+    cache.set("summary", cache.token({route}), ["old counts"])
+    cache.set("other", cache.token({other_route}), ["other counts"])
+
+    index.inventory_changed(trip_id)
+    assert cache.get("summary") is None
+    assert cache.get("other") == ["other counts"]
+
+    index.inventory_changed(uuid4())
+    assert cache.get("other") is None
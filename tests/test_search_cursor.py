@@ -0,0 +1,92 @@
+import asyncio
+from datetime import date, timedelta
+from uuid import uuid4
+import pytest
+from app.services import booking_service
+from app.services.booking_service import BookingService
+from app.services.search_cache import search_cache
+from app.services.seat_availability import SeatAvailabilityIndex
+from tests.factories import in_days, seat_row
+
+
+@pytest.mark.parametrize("sort_by", [None, "price_asc", "price_desc"])
+def test_cursor_round_trips(sort_by):
+    trip = {"trip_id": uuid4(), "departure_time": in_days(1), "min_price": 150, "max_price": 300}
+    key = BookingService._trip_sort_key(trip, sort_by)
+    cursor = BookingService._encode_trips_cursor(key, sort_by)
+    assert BookingService._decode_trips_cursor(cursor, sort_by) == key
+
+
+@pytest.mark.parametrize("cursor, sort_by", [
+    ("not base64!", None),
+    ("W251bGxd", None),  # [null]
+    (BookingService._encode_trips_cursor([in_days(1), uuid4()], None), "price_asc"),
+    (BookingService._encode_trips_cursor([100, in_days(1), uuid4()], "price_asc"), None),
+    (BookingService._encode_trips_cursor(["cheap", in_days(1), uuid4()], "price_asc"), "price_asc"),
+    (BookingService._encode_trips_cursor([in_days(1), "not-a-uuid"], None), None),
+])
+def test_invalid_cursor_is_rejected(cursor, sort_by):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        BookingService._decode_trips_cursor(cursor, sort_by)
+
+
+@pytest.fixture
+def index(monkeypatch):
+    departure = in_days(2)
+    rows = []
+    for hours, price in ((1, 300), (1, 100), (1, 200), (2, 100), (3, 400), (4, 250), (4, 250)):
+        trip_id = uuid4()
+        rows.append(seat_row(trip_id, departure + timedelta(hours=hours), 1, price))
+        rows.append(seat_row(trip_id, departure + timedelta(hours=hours), 2, price + 50))
+    index = SeatAvailabilityIndex()
+    index._trips, index._seats = SeatAvailabilityIndex._build(rows)
+    index.loaded = True
+    monkeypatch.setattr(booking_service, "seat_availability", index)
+    search_cache.invalidate_all()
+    return index
+
+
+def _search(sort_by, limit, cursor=None):
+    today = date.today()
+    return asyncio.run(BookingService.get_available_trips(
+        None, today, today + timedelta(days=7), sort_by=sort_by, limit=limit, cursor=cursor
+    ))
+
+
+@pytest.mark.parametrize("sort_by", [None, "price_asc", "price_desc"])
+def test_pages_cover_every_trip_once_in_order(index, sort_by):
+    everything, cursor = _search(sort_by, 100)
+    assert cursor is None
+    assert len(everything) == 7
+
+    pages, cursor = [], None
+    while True:
+        page, cursor = _search(sort_by, 3, cursor)
+        pages.extend(page)
+        if cursor is None:
+            break
+    assert [trip['trip_id'] for trip in pages] == [trip['trip_id'] for trip in everything]
+
+    keys = [BookingService._trip_sort_key(trip, sort_by) for trip in everything]
+    assert keys == sorted(keys)
+
+
+def test_sort_orders(index):
+    by_price, _ = _search("price_asc", 100)
+    assert [trip['min_price'] for trip in by_price] == [100, 100, 200, 250, 250, 300, 400]
+    by_price_desc, _ = _search("price_desc", 100)
+    assert [trip['max_price'] for trip in by_price_desc] == [450, 350, 300, 300, 250, 150, 150]
+    by_departure, _ = _search(None, 100)
+    departures = [trip['departure_time'] for trip in by_departure]
+    assert departures == sorted(departures)
+
+
+def test_page_after_a_booked_out_trip_still_continues(index):
+    first_page, cursor = _search(None, 2)
+    # The last trip of the page sells out before the next page is fetched
+    for seat_id in list(index._seats):
+        if index._seats[seat_id][0].info['trip_id'] == first_page[-1]['trip_id']:
+            index.mark_booked(seat_id)
+    second_page, _ = _search(None, 2, cursor)
+    everything, _ = _search(None, 100)
+    assert [trip['trip_id'] for trip in second_page] == [trip['trip_id'] for trip in everything[1:3]]
@@ -0,0 +1,151 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+from app.services import seat_availability as seat_availability_module
+from app.services.seat_availability import SeatAvailabilityIndex, TripSeats
+from tests.factories import in_days, seat_row
+
+NOW = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+
+def _trip_seats(prices) -> TripSeats:
+    trip = TripSeats({"trip_id": uuid4()}, uuid4())
+    for number, price in enumerate(prices, start=1):
+        trip.add_seat(uuid4(), number, price)
+    trip.finalize()
+    return trip
+
+
+def test_price_order_breaks_ties_by_seat_number():
+    trip = _trip_seats([300, 100, 200, 100])
+    assert trip.price_order == [1, 3, 2, 0]
+
+
+def test_hold_book_and_release_bits():
+    trip = _trip_seats([100, 100, 100, 100])
+    assert trip.available_mask(NOW) == 0b1111
+    trip.hold(1, NOW + timedelta(minutes=5))
+    trip.book(2)
+    assert trip.available_mask(NOW) == 0b1001
+    assert [trip.status(p, NOW) for p in range(4)] == ["free", "held", "booked", "free"]
+
+    trip.book(1)
+    assert trip.held == 0
+    assert trip.held_until == {}
+    assert trip.status(1, NOW) == "booked"
+
+    trip.release_booking(1)
+    trip.release_booking(2)
+    assert trip.available_mask(NOW) == 0b1111
+
+
+def test_expired_holds_free_their_seats():
+    trip = _trip_seats([100, 100, 100])
+    trip.hold(0, NOW + timedelta(minutes=1))
+    trip.hold(2, NOW + timedelta(minutes=10))
+    assert trip.next_expiry == NOW + timedelta(minutes=1)
+
+    later = NOW + timedelta(minutes=1)
+    assert trip.available_mask(later) == 0b011
+    assert trip.next_expiry == NOW + timedelta(minutes=10)
+    assert trip.status(2, NOW + timedelta(minutes=10)) == "free"
+    assert trip.next_expiry is None
+
+
+def test_build_applies_seat_states():
+    trip_id = uuid4()
+    departure = in_days(1)
+    rows = [
+        seat_row(trip_id, departure, 1, 200, booked=True),
+        seat_row(trip_id, departure, 2, 100, held_until=in_days(0.01)),
+        seat_row(trip_id, departure, 3, 100),
+    ]
+    trips, seats = SeatAvailabilityIndex._build(rows)
+    trip = trips[trip_id]
+    assert trip.booked == 0b001
+    assert trip.held == 0b010
+    assert trip.price_order == [1, 2, 0]
+    assert seats[rows[2]['seat_id']] == (trip, 2)
+
+
+def _loaded_index(monkeypatch, rows, during_load=None) -> SeatAvailabilityIndex:
+    index = SeatAvailabilityIndex()
+
+    async def get_active_seat_states(conn):
+        if during_load:
+            during_load(index)
+            # Let the other requests of the worker run while the query is in flight
+            await asyncio.sleep(0)
+        return rows
+
+    monkeypatch.setattr(
+        seat_availability_module.TripRepository, "get_active_seat_states", staticmethod(get_active_seat_states)
+    )
+    asyncio.run(index.load(None))
+    return index
+
+
+def test_mutations_during_reload_are_replayed(monkeypatch):
+    trip_id = uuid4()
+    departure = in_days(1)
+    rows = [seat_row(trip_id, departure, number, 100) for number in (1, 2, 3)]
+    first, second, third = (row['seat_id'] for row in rows)
+    index = _loaded_index(monkeypatch, rows)
+    index.mark_held(third, in_days(0.01))
+
+    def concurrent_booking(index):
+        # Committed after the reload's snapshot was taken, so the rows miss it
+        index.mark_booked(first)
+        index.mark_held(second, in_days(0.01))
+        index.release_hold(third)
+
+    rows[2]['held_until'] = in_days(0.01)
+    index = _loaded_index(monkeypatch, rows, concurrent_booking)
+    assert index.loaded
+    assert index._journal is None
+    assert index.seat_state(first)[1]['status'] == "booked"
+    assert index.seat_state(second)[1]['status'] == "held"
+    assert index.is_seat_free(third)
+    assert index.free_seat_count(trip_id) == 1
+
+
+def test_mutations_of_unknown_seats_are_ignored(monkeypatch):
+    index = _loaded_index(monkeypatch, [], lambda index: index.mark_booked(uuid4()))
+    assert index.is_seat_free(uuid4()) is None
+    assert index.free_seat_count(uuid4()) is None
+
+
+def test_flash_sale_mode_is_loaded_and_switched(monkeypatch):
+    trip_id = uuid4()
+    row = seat_row(trip_id, in_days(1), 1, 100)
+    row['flash_sale'] = True
+    index = _loaded_index(monkeypatch, [row])
+    assert index.is_flash_sale(trip_id)
+    index.set_flash_sale(trip_id, False)
+    assert not index.is_flash_sale(trip_id)
+    assert not index.is_flash_sale(uuid4())
+
+
+def test_available_trips_filters_and_orders_seats(monkeypatch):
+    route, other_route = uuid4(), uuid4()
+    open_trip, full_trip, departed_trip, other_trip = uuid4(), uuid4(), uuid4(), uuid4()
+    rows = [
+        seat_row(open_trip, in_days(1), 1, 300, route),
+        seat_row(open_trip, in_days(1), 2, 100, route),
+        seat_row(open_trip, in_days(1), 3, 200, route, booked=True),
+        seat_row(full_trip, in_days(1), 1, 100, route, booked=True),
+        seat_row(departed_trip, in_days(-0.01), 1, 100, route),
+        seat_row(other_trip, in_days(1), 1, 100, other_route),
+    ]
+    index = _loaded_index(monkeypatch, rows)
+
+    trips = index.available_trips(in_days(-1), in_days(2), {route})
+    assert [trip['trip_id'] for trip in trips] == [open_trip]
+    assert [seat['price'] for seat in trips[0]['available_seats']] == [100, 300]
+    assert (trips[0]['min_price'], trips[0]['max_price']) == (100, 300)
+
+    trips = index.available_trips(in_days(-1), in_days(2), {route}, "price_desc")
+    assert [seat['price'] for seat in trips[0]['available_seats']] == [300, 100]
+
+    assert {trip['trip_id'] for trip in index.available_trips(in_days(-1), in_days(2))} == {open_trip, other_trip}
+    assert index.available_trips(in_days(2), in_days(3)) == []
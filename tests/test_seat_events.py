@@ -0,0 +1,69 @@
+import asyncio
+from uuid import uuid4
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from app.api.v1.endpoints import bookings
+from app.services.seat_availability import SeatAvailabilityIndex
+from app.services import seat_events as seat_events_module
+from tests.factories import in_days, seat_row
+
+
+@pytest.fixture
+def trip_id(monkeypatch):
+    trip_id = uuid4()
+    index = SeatAvailabilityIndex()
+    index._trips, index._seats = SeatAvailabilityIndex._build([seat_row(trip_id, in_days(1), 1, 100)])
+    monkeypatch.setattr(seat_events_module, "seat_availability", index)
+    return trip_id
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(bookings.seat_events, "listening", True)
+    app = FastAPI()
+    app.include_router(bookings.router, prefix="/bookings")
+    return TestClient(app)
+
+
+def test_sse_refused_while_listener_is_down(client, trip_id, monkeypatch):
+    monkeypatch.setattr(bookings.seat_events, "listening", False)
+    response = client.get(f"/bookings/trips/{trip_id}/seats/events")
+    assert response.status_code == 503
+    assert bookings.seat_events._subscribers == {}
+
+
+def test_sse_unknown_trip_is_not_found(client, trip_id):
+    assert client.get(f"/bookings/trips/{uuid4()}/seats/events").status_code == 404
+
+
+def test_sse_starts_with_the_seat_map_and_unsubscribes(client, trip_id):
+    async def main():
+        response = await bookings.stream_seat_map(trip_id)
+        assert trip_id in bookings.seat_events._subscribers
+        first = await response.body_iterator.__anext__()
+        await response.body_iterator.aclose()
+        return first
+
+    assert asyncio.run(main()).startswith("event: snapshot\n")
+    assert trip_id not in bookings.seat_events._subscribers
+
+
+def test_sse_background_unsubscribes_a_stream_never_started(client, trip_id):
+    response = asyncio.run(bookings.stream_seat_map(trip_id))
+    asyncio.run(response.background())
+    assert trip_id not in bookings.seat_events._subscribers
+
+
+def test_websocket_closed_while_listener_is_down(client, trip_id, monkeypatch):
+    monkeypatch.setattr(bookings.seat_events, "listening", False)
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client.websocket_connect(f"/bookings/trips/{trip_id}/seats/ws") as websocket:
+            websocket.receive_text()
+    assert closed.value.code == 1013
+
+
+def test_websocket_sends_the_seat_map(client, trip_id):
+    with client.websocket_connect(f"/bookings/trips/{trip_id}/seats/ws") as websocket:
+        assert '"type": "snapshot"' in websocket.receive_text()
@@ -0,0 +1,59 @@
+import asyncio
+import bcrypt
+import pytest
+from app.core import security
+from app.core.config import settings
+from app.core.security import PasswordHasher, PasswordHashingBusy, hash_rejections
+
+
+@pytest.fixture
+def hasher(monkeypatch):
+    monkeypatch.setattr(settings, "password_hash_workers", 2)
+    monkeypatch.setattr(settings, "password_hash_max_pending", 3)
+    hasher = PasswordHasher()
+    yield hasher
+    hasher.shutdown()
+
+
+@pytest.fixture
+def hashed():
+    return bcrypt.hashpw(b"secret", bcrypt.gensalt(rounds=4)).decode()
+
+
+def test_verify_runs_off_the_event_loop(hasher, hashed):
+    async def main():
+        return await hasher.verify("secret", hashed), await hasher.verify("wrong", hashed)
+
+    assert asyncio.run(main()) == (True, False)
+    assert hasher._pending == 0
+
+
+def test_hash_round_trips(hasher, monkeypatch):
+    gensalt = bcrypt.gensalt
+    monkeypatch.setattr(security.bcrypt, "gensalt", lambda: gensalt(rounds=4))
+
+    async def main():
+        hashed = await hasher.hash("secret")
+        return await hasher.verify("secret", hashed)
+
+    assert asyncio.run(main()) is True
+
+
+def test_calls_beyond_the_pending_cap_are_rejected(hasher, hashed):
+    rejected = hash_rejections.get(operation="verify")
+
+    async def main():
+        return await asyncio.gather(
+            *(hasher.verify("secret", hashed) for _ in range(5)),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert results[:3] == [True] * 3
+    assert all(isinstance(result, PasswordHashingBusy) for result in results[3:])
+    assert hash_rejections.get(operation="verify") == rejected + 2
+    assert hasher._pending == 0
+
+
+def test_busy_is_a_value_error():
+    assert issubclass(PasswordHashingBusy, ValueError)
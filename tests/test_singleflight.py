@@ -0,0 +1,112 @@
+import asyncio
+from contextlib import asynccontextmanager
+import pytest
+from app.core.singleflight import SingleFlight, calls, coalescing_ratio
+
+
+def test_concurrent_calls_share_one_run():
+    flight = SingleFlight("test_shared")
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return len(runs)
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+    assert asyncio.run(main()) == [1] * 5
+    assert runs == [1]
+    assert calls.get(name="test_shared", role="leader") == 1
+    assert calls.get(name="test_shared", role="shared") == 4
+    assert dict((labels["name"], value) for _, labels, value in coalescing_ratio.samples())["test_shared"] == 0.8
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight("test_keys")
+
+    async def main():
+        return await asyncio.gather(
+            flight.do("a", lambda: asyncio.sleep(0.01, "a")),
+            flight.do("b", lambda: asyncio.sleep(0.01, "b"))
+        )
+
+    assert asyncio.run(main()) == ["a", "b"]
+    assert calls.get(name="test_keys", role="leader") == 2
+
+
+def test_call_after_completion_runs_again():
+    flight = SingleFlight("test_again")
+    runs = []
+
+    async def work():
+        runs.append(1)
+        return len(runs)
+
+    async def main():
+        return await flight.do("key", work), await flight.do("key", work)
+
+    assert asyncio.run(main()) == (1, 2)
+
+
+def test_exception_is_shared():
+    flight = SingleFlight("test_error")
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert runs == [1]
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight("test_cancel")
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do("key", work))
+        follower = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_do_with_connection_checks_out_only_for_queries(monkeypatch):
+    from app.core import database
+
+    checkouts = []
+
+    @asynccontextmanager
+    async def acquire(name="booking", user_id=None, primary=False):
+        checkouts.append(name)
+        yield FakeConnection()
+
+    class FakeConnection:
+        async def fetchval(self, query, *args, column=0, timeout=None):
+            return 42
+
+    monkeypatch.setattr(database.Database, "acquire", acquire)
+    flight = SingleFlight("test_lazy")
+
+    async def main():
+        cached = await flight.do_with_connection("cached", lambda conn: asyncio.sleep(0, "hit"), pool="read")
+        queried = await flight.do_with_connection("queried", lambda conn: conn.fetchval("SELECT 42"), pool="read")
+        return cached, queried
+
+    assert asyncio.run(main()) == ("hit", 42)
+    assert checkouts == ["read"]
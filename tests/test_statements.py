@@ -0,0 +1,49 @@
+import asyncio
+from contextlib import asynccontextmanager
+import asyncpg
+from app.core.statements import StatementRegistry
+
+
+def test_parameters_come_from_the_highest_placeholder():
+    registry = StatementRegistry()
+    assert registry.register("t.none", "SELECT 1").parameters == 0
+    assert registry.register("t.some", "SELECT $2::int + $1 + $10").parameters == 10
+
+
+def test_same_sql_registers_once():
+    registry = StatementRegistry()
+    first = registry.register("t.one", "SELECT $1")
+    assert registry.register("t.one", "SELECT $1") is first
+    registry.register("t.one", "SELECT $1, $2")
+    assert len(registry) == 2
+    assert registry.names() == ["t.one"]
+
+
+def test_warm_runs_each_statement_through_fetch():
+    registry = StatementRegistry()
+    hot = registry.register("t.hot", "SELECT * FROM seats WHERE id = $1 AND trip_id = $2", warm=("booking",))
+    write = registry.register("t.write", "UPDATE seats SET price = $1", warm=("booking", "read"))
+    registry.register("t.cold", "SELECT 2")
+
+    class FakeConnection:
+        def __init__(self):
+            self.runs = []
+
+        @asynccontextmanager
+        async def _transaction(self):
+            yield
+
+        def transaction(self, readonly=False):
+            assert readonly
+            return self._transaction()
+
+        async def fetch(self, sql, *args):
+            self.runs.append((sql, args))
+            if sql.startswith("UPDATE"):
+                raise asyncpg.ReadOnlySQLTransactionError("cannot execute UPDATE in a read-only transaction")
+            return []
+
+    conn = FakeConnection()
+    asyncio.run(registry.prepare_warm("booking", conn))
+    assert conn.runs == [(hot.sql, (None, None)), (write.sql, (None,))]
+    assert registry.warm_for("read") == [write]